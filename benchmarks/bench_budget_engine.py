@@ -0,0 +1,78 @@
+"""
+Проверка 1000 бюджетов: отдельный проход по расходам для каждого бюджета
+против BudgetEngine. Для движка измеряются загрузка, добавление расхода
+и смена дня.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_budget_engine [число расходов]
+"""
+import datetime
+import sys
+import time
+from typing import Any, Callable
+
+from bookkeeper.budget_engine import BudgetEngine
+from bookkeeper.models.budget import Budget
+from bookkeeper.models.expense import Expense
+
+CATEGORIES = 100
+TERMS = (1, 7, 14, 30, 90, 365)
+
+
+def make_expenses(n: int, today: datetime.date) -> list[Expense]:
+    start = datetime.datetime.combine(today, datetime.time()) - datetime.timedelta(400)
+    step = datetime.timedelta(days=400) / n
+    return [Expense(i % 500, i % CATEGORIES, start + i * step) for i in range(n)]
+
+
+def make_budgets() -> list[Budget]:
+    names = [""] + [f"cat{i}" for i in range(CATEGORIES)]
+    return [Budget(1000, TERMS[i % len(TERMS)], names[i % len(names)])
+            for i in range(1000)]
+
+
+def scan(budgets: list[Budget], scopes: dict[str, list[int]],
+         exps: list[Expense], today: datetime.date) -> list[float]:
+    result: list[float] = []
+    for budg in budgets:
+        first = today - datetime.timedelta(budg.term - 1)
+        pks = set(scopes.get(budg.category, ()))
+        result.append(sum(exp.amount for exp in exps
+                          if exp.expense_date.date() >= first
+                          and (not budg.category or exp.category in pks)))
+    return result
+
+
+def timed(func: Callable[[], Any], repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(n: int) -> None:
+    today = datetime.date(2023, 6, 1)
+    exps = make_expenses(n, today)
+    budgets = make_budgets()
+    scopes = {f"cat{i}": [i] for i in range(CATEGORIES)}
+    clock = [today]
+    engine = BudgetEngine(budgets, scopes, lambda: clock[0])
+
+    print(f"scan, s: {timed(lambda: scan(budgets, scopes, exps, today)):.3f}")
+    print(f"engine load, s: {timed(lambda: engine.load_expenses(exps)):.3f}")
+    assert engine.spent() == scan(budgets, scopes, exps, today)
+    exp = Expense(10, 1, datetime.datetime.combine(today, datetime.time()))
+
+    def add() -> None:
+        engine.added(exp)
+        engine.spent()
+    print(f"engine add + spent, ms: {timed(add, 1000) * 1e3:.3f}")
+
+    def next_day() -> None:
+        clock[0] += datetime.timedelta(1)
+        engine.spent()
+    print(f"engine next day, ms: {timed(next_day, 30) * 1e3:.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,50 @@
+"""
+Скорость создания дерева категорий в SQliteRepository:
+прежний способ (add для каждой категории) против Category.create_from_tree,
+который сохраняет категории пакетами по уровням в одной транзакции.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_create_from_tree [число категорий]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bookkeeper.models.category import Category
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+
+def make_tree(n: int, fanout: int = 10) -> list[tuple[str, str | None]]:
+    """ Дерево из n категорий, у каждой не более fanout подкатегорий """
+    return [(str(i), None if i == 0 else str((i - 1) // fanout)) for i in range(n)]
+
+
+def per_node(tree: list[tuple[str, str | None]],
+             repo: SQliteRepository[Category]) -> None:
+    """ Создание дерева так, как оно было реализовано до пакетной версии """
+    created: dict[str, Category] = {}
+    for child, parent in tree:
+        cat = Category(child, created[parent].pk if parent is not None else None)
+        repo.add(cat)
+        created[child] = cat
+
+
+def main(n: int) -> None:
+    tree = make_tree(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        with SQliteRepository[Category](Path(tmp) / "before.db", Category) as repo:
+            start = time.perf_counter()
+            per_node(tree, repo)
+            before = time.perf_counter() - start
+        with SQliteRepository[Category](Path(tmp) / "after.db", Category) as repo:
+            start = time.perf_counter()
+            Category.create_from_tree(tree, repo)
+            after = time.perf_counter() - start
+
+    print(f"before: add per node    {before:8.2f} s  {n / before:>10.0f} nodes/sec")
+    print(f"after: batch by level   {after:8.2f} s  {n / after:>10.0f} nodes/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,75 @@
+"""
+Аналитика по расходам: список объектов Expense против колонок ExpenseFrame.
+Для обоих представлений измеряются объем памяти, фильтры по дате
+и по категории, суммы по категориям и суммы по месяцам.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_expense_frame [число расходов]
+"""
+import datetime
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from bookkeeper.expense_frame import ExpenseFrame
+from bookkeeper.models.expense import Expense
+
+
+def make_expenses(n: int) -> list[Expense]:
+    start = datetime.datetime(2020, 1, 1)
+    comments = ["", "bread", "taxi", "cinema"]
+    return [Expense(i % 5000, i % 50, start + datetime.timedelta(minutes=7 * i),
+                    start, comments[i % 4]) for i in range(n)]
+
+
+def objects_by_category(exps: list[Expense]) -> dict[int, int]:
+    result: dict[int, int] = {}
+    for exp in exps:
+        result[exp.category] = result.get(exp.category, 0) + exp.amount
+    return result
+
+
+def objects_by_month(exps: list[Expense]) -> dict[datetime.date, int]:
+    result: dict[datetime.date, int] = {}
+    for exp in exps:
+        month = exp.expense_date.date().replace(day=1)
+        result[month] = result.get(month, 0) + exp.amount
+    return result
+
+
+def timed(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(n: int) -> None:
+    tracemalloc.start()
+    exps = make_expenses(n)
+    objects_memory, _ = tracemalloc.get_traced_memory()
+    frame = ExpenseFrame.from_expenses(exps)
+    frame_memory = tracemalloc.get_traced_memory()[0] - objects_memory
+    tracemalloc.stop()
+
+    since = datetime.datetime(2021, 1, 1)
+    rows = [
+        ("memory, MiB", objects_memory / 2**20, frame_memory / 2**20),
+        ("filter by date, s",
+         timed(lambda: [exp for exp in exps if exp.expense_date >= since]),
+         timed(lambda: frame.filter({"expense_date__ge": since}))),
+        ("filter by category, s",
+         timed(lambda: [exp for exp in exps if exp.category == 7]),
+         timed(lambda: frame.filter({"category": 7}))),
+        ("sum by category, s",
+         timed(lambda: objects_by_category(exps)), timed(frame.sum_by_category)),
+        ("sum by month, s",
+         timed(lambda: objects_by_month(exps)), timed(lambda: frame.resample("month"))),
+    ]
+    print(f"{'':20} {'objects':>10} {'frame':>10}")
+    for name, before, after in rows:
+        print(f"{name:20} {before:10.2f} {after:10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
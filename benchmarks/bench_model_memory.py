@@ -0,0 +1,60 @@
+"""
+Память, занимаемая объектами моделей: обычный dataclass со словарем
+атрибутов (как были описаны Category и Budget) против dataclass со слотами.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_model_memory [число объектов]
+"""
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from bookkeeper.models.budget import Budget
+from bookkeeper.models.category import Category
+
+
+@dataclass
+class DictCategory:
+    """ Category до перехода на слоты """
+    name: str = ""
+    parent: int | None = None
+    pk: int = 0
+
+
+@dataclass
+class DictBudget:
+    """ Budget до перехода на слоты """
+    summa: float = 0
+    term: int = 0
+    category: str = ""
+    pk: int = 0
+
+
+def measure(make: Callable[[int], Any], n: int) -> float:
+    """ Объем памяти в МиБ, выделенной под n объектов """
+    tracemalloc.start()
+    objs = [make(i) for i in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return size / 2**20
+
+
+def main(n: int) -> None:
+    # строки и числа общие для обоих вариантов, поэтому считается
+    # только память самих объектов и списка
+    names = [f"category {i % 1000}" for i in range(1000)]
+    rows = [
+        ("Category", lambda i: DictCategory(names[i % 1000], i % 1000, i),
+         lambda i: Category(names[i % 1000], i % 1000, i)),
+        ("Budget", lambda i: DictBudget(1000.0, 7, names[i % 1000], i % 1000),
+         lambda i: Budget(1000.0, 7, names[i % 1000], i % 1000)),
+    ]
+    print(f"{n} objects    __dict__, MiB   slots, MiB")
+    for name, before, after in rows:
+        print(f"{name:12} {measure(before, n):14.1f} {measure(after, n):12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
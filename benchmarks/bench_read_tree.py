@@ -0,0 +1,111 @@
+"""
+Чтение дерева категорий из файла с отступами: прежняя реализация read_tree
+против нынешнего read_tree, собирающего список пар целиком, и генераторов
+iter_tree (построчное чтение файла) и iter_tree_file (чтение блоками).
+Для каждого способа выводятся время и пиковый объем памяти, выделенной
+во время чтения.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_read_tree [число строк]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from bookkeeper.utils import iter_tree, iter_tree_file, read_tree
+
+
+def _get_indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _lines_with_indent(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    for line in lines:
+        if not line or line.isspace():
+            continue
+        yield _get_indent(line), line.strip()
+
+
+def original_read_tree(lines: Iterable[str]) -> list[tuple[str, str | None]]:
+    """ read_tree так, как он был реализован до iter_tree """
+    parents: list[tuple[str | None, int]] = []
+    last_indent = -1
+    last_name = None
+    result: list[tuple[str, str | None]] = []
+    for i, (indent, name) in enumerate(_lines_with_indent(lines)):
+        if indent > last_indent:
+            parents.append((last_name, last_indent))
+        elif indent < last_indent:
+            while indent < last_indent:
+                _, last_indent = parents.pop()
+            if indent != last_indent:
+                raise IndentationError(
+                    f'unindent does not match any outer indentation '
+                    f'level in line {i}:\n'
+                )
+        result.append((name, parents[-1][0]))
+        last_name = name
+        last_indent = indent
+    return result
+
+
+def write_tree(path: Path, n: int, fanout: int = 10) -> None:
+    """ Записать дерево из n строк, у каждого узла не более fanout потомков """
+    depth = [0] * n
+    with open(path, 'w', encoding='utf-8') as file:
+        stack: list[int] = []
+        for i in range(n):
+            # потомки узла идут сразу за ним (обход в глубину)
+            while stack and stack[-1] >= fanout:
+                stack.pop()
+            if len(stack) < 6 and i % 3:
+                stack.append(0)
+            elif stack:
+                stack[-1] += 1
+            depth[i] = len(stack)
+            file.write('    ' * depth[i] + f'category {i}\n')
+
+
+def measure(name: str, n: int, func: Callable[[], Any]) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    # память измеряется отдельным запуском, т.к. tracemalloc замедляет код
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:24} {elapsed:6.2f} s  {n / elapsed:>10.0f} lines/sec"
+          f"  peak {peak / 2**20:8.1f} MiB")
+
+
+def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'tree.txt'
+        write_tree(path, n)
+
+        def original() -> None:
+            with open(path, encoding='utf-8') as file:
+                original_read_tree(file)
+
+        def list_pairs() -> None:
+            with open(path, encoding='utf-8') as file:
+                read_tree(file)
+
+        def stream_lines() -> None:
+            with open(path, encoding='utf-8') as file:
+                deque(iter_tree(file), maxlen=0)
+
+        measure("original read_tree", n, original)
+        measure("read_tree (list)", n, list_pairs)
+        measure("iter_tree (lines)", n, stream_lines)
+        measure("iter_tree_file (chunks)", n,
+                lambda: deque(iter_tree_file(path), maxlen=0))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
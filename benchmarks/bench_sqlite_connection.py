@@ -0,0 +1,66 @@
+"""
+Сравнение скорости одиночных add/get в SQliteRepository с постоянными
+соединениями и прежней схемы "новое соединение на каждый вызов".
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sqlite_connection [число операций]
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+
+def connect_per_call_add(base_name: Path, exp: Expense) -> None:
+    """ Вставка так, как она была реализована до пула соединений """
+    with sqlite3.connect(base_name) as con:
+        cur = con.cursor()
+        cur.execute("PRAGMA foreign_keys = ON")
+        cur.execute(
+            "INSERT INTO Expense (amount, category, expense_date, added_date, comment)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (exp.amount, exp.category,
+             exp.expense_date.strftime("%Y-%m-%d %H:%M:%S"),
+             exp.added_date.strftime("%Y-%m-%d %H:%M:%S"), exp.comment),
+        )
+    con.close()
+
+
+def connect_per_call_get(base_name: Path, pk: int) -> None:
+    """ Чтение так, как оно было реализовано до пула соединений """
+    with sqlite3.connect(base_name) as con:
+        cur = con.cursor()
+        cur.execute("PRAGMA foreign_keys = ON")
+        cur.execute(f"SELECT * FROM Expense WHERE pk = {pk}")
+        cur.fetchone()
+    con.close()
+
+
+def measure(name: str, n: int, func: Callable[[int], Any]) -> None:
+    """ Выполнить func n раз и напечатать число операций в секунду """
+    start = time.perf_counter()
+    for i in range(n):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{n / elapsed:>12.0f} ops/sec")
+
+
+def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base_name = Path(tmp) / "bench.db"
+        with SQliteRepository[Expense](base_name, Expense) as repo:
+            measure("before: add", n,
+                    lambda i: connect_per_call_add(base_name, Expense(i, 1)))
+            measure("before: get", n,
+                    lambda i: connect_per_call_get(base_name, i + 1))
+            measure("after: add", n, lambda i: repo.add(Expense(i, 1)))
+            measure("after: get", n, lambda i: repo.get(i + 1))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,62 @@
+"""
+Скорость создания объектов Expense из строк таблицы в SQliteRepository:
+прежний способ (пустой объект, setattr и strptime для каждого поля)
+против предкомпилированной фабрики строк.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sqlite_materialize [число строк]
+"""
+import datetime
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+
+def setattr_strptime(rows: list[tuple[Any, ...]]) -> list[Expense]:
+    """ Материализация так, как она была реализована до фабрики строк """
+    fields = {"amount": int, "category": int, "expense_date": datetime.datetime,
+              "added_date": datetime.datetime, "comment": str}
+    out = []
+    for row in rows:
+        obj = Expense()
+        setattr(obj, "pk", row[0])
+        for i, (name, tpy) in enumerate(fields.items(), 1):
+            val = row[i]
+            if tpy is datetime.datetime:
+                val = datetime.datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
+            setattr(obj, name, val)
+        out.append(obj)
+    return out
+
+
+def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        with SQliteRepository[Expense](Path(tmp) / "bench.db", Expense) as repo:
+            date = datetime.datetime(2023, 1, 1)
+            repo.add_many(Expense(i, i % 10, date, date, "comment") for i in range(n))
+
+            start = time.perf_counter()
+            rows = repo._connection.execute(  # pylint: disable=protected-access
+                "SELECT pk, amount, category, expense_date, added_date, comment"
+                " FROM Expense"
+            ).fetchall()
+            fetched = time.perf_counter() - start
+            setattr_strptime(rows)
+            before = time.perf_counter() - start
+
+            start = time.perf_counter()
+            repo.get_all()
+            after = time.perf_counter() - start
+
+    print(f"fetchall only:          {fetched:8.2f} s")
+    print(f"before: setattr+strptime {before:7.2f} s  {n / before:>10.0f} rows/sec")
+    print(f"after: row factory      {after:8.2f} s  {n / after:>10.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
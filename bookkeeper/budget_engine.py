@@ -0,0 +1,266 @@
+"""
+Расчет исполнения бюджетов по скользящим окнам
+
+Бюджеты с одинаковой категорией делят одну область: для нее хранятся
+дневные суммы расходов за самый длинный срок и по одной сумме на каждый
+различный срок. Поэтому загрузка расходов проходит по ним один раз,
+добавление расхода меняет только суммы его областей, а смена дня вычитает
+лишь суммы дней, вышедших из окон, и не зависит от числа расходов.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Mapping
+
+from bookkeeper.models.budget import Budget
+from bookkeeper.models.category_tree import CategoryTree
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.abstract_repository import AbstractRepository
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+from bookkeeper.repository.sqlite_rollup import DailyRollup
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_DAY_SECONDS = 86400
+
+
+@dataclass(slots=True)
+class BudgetStatus:
+    """
+    Исполнение бюджета на сегодняшний день
+    budget - бюджет
+    spent - сумма расходов за срок бюджета
+    """
+    budget: Budget
+    spent: float
+
+    @property
+    def remaining(self) -> float:
+        """ Остаток бюджета (отрицательный при превышении) """
+        return self.budget.summa - self.spent
+
+    @property
+    def utilization(self) -> float:
+        """ Доля израсходованной суммы бюджета """
+        if self.budget.summa:
+            return self.spent / self.budget.summa
+        return float('inf') if self.spent > 0 else 0.0
+
+    @property
+    def exceeded(self) -> bool:
+        """ Превышен ли бюджет """
+        return self.spent > self.budget.summa
+
+
+def category_scopes(tree: CategoryTree) -> dict[str, list[int]]:
+    """
+    Для каждого названия категории - id категории и всех ее подкатегорий,
+    то есть расходы, которые учитываются в бюджете этой категории
+
+    Parameters
+    ----------
+    tree - дерево категорий
+
+    Returns
+    -------
+    Словарь {название категории: список id категорий}
+    """
+    scopes: dict[str, list[int]] = {}
+    for root in tree.children(None):
+        for pk in tree.subtree(root.pk):
+            cat = tree.get(pk)
+            if cat is not None:
+                scopes.setdefault(cat.name, []).extend(tree.subtree(pk))
+    return scopes
+
+
+class BudgetEngine:
+    """
+    Суммы расходов за сроки бюджетов budgets, заканчивающиеся сегодняшним днем.
+    Бюджет со сроком term учитывает расходы за term дней, включая сегодняшний,
+    расходы будущих дней считаются сегодняшними.
+    Бюджет с пустой категорией учитывает все расходы, бюджет с категорией -
+    расходы категорий categories[category]; если категории нет в categories,
+    расходы бюджета всегда равны нулю.
+
+    categories - словарь {название категории: id категорий расходов},
+    например, результат category_scopes
+    today - функция, возвращающая текущую дату
+
+    Расходы загружаются методами load*, после чего изменения передаются
+    методами added, removed и changed. При смене срока или категории
+    бюджета движок нужно создать и загрузить заново, сумму бюджета можно
+    менять в любой момент.
+    """
+
+    def __init__(self,
+                 budgets: Iterable[Budget],
+                 categories: Mapping[str, Iterable[int]] | None = None,
+                 today: Callable[[], date] = date.today) -> None:
+        self._budgets = list(budgets)
+        self._today_func = today
+        self._today = today().toordinal()
+        scope_terms: dict[str, set[int]] = {}
+        for budg in self._budgets:
+            scope_terms.setdefault(budg.category, set()).add(budg.term)
+        names = list(scope_terms)
+        scope_index = {name: i for i, name in enumerate(names)}
+        self._terms = [sorted(scope_terms[name]) for name in names]
+        self._sums: list[list[float]] = [[0.0] * len(terms) for terms in self._terms]
+        self._days: list[dict[int, float]] = [{} for _ in names]
+        self._slots = [(scope_index[budg.category],
+                        self._terms[scope_index[budg.category]].index(budg.term))
+                       for budg in self._budgets]
+        self._horizon = max((terms[-1] for terms in self._terms), default=0)
+        common = [scope_index[""]] if "" in scope_index else []
+        self._common = common
+        self._pk_scopes: dict[int, list[int]] = {}
+        for name, pks in (categories or {}).items():
+            if name and name in scope_index:
+                for pk in set(pks):
+                    self._pk_scopes.setdefault(pk, list(common)).append(scope_index[name])
+
+    @property
+    def budgets(self) -> list[Budget]:
+        """ Бюджеты в порядке передачи в конструктор """
+        return list(self._budgets)
+
+    def since(self) -> date:
+        """ Первый день, расходы которого входят хотя бы в один бюджет """
+        self._roll_over()
+        return date.fromordinal(max(self._today - self._horizon + 1, 1))
+
+    def _recompute(self) -> None:
+        for terms, sums, days in zip(self._terms, self._sums, self._days):
+            diff = [0.0] * (len(terms) + 1)
+            for day in list(days):
+                idx = bisect_right(terms, max(self._today - day, 0))
+                if idx == len(terms):
+                    del days[day]
+                else:
+                    diff[idx] += days[day]
+            total = 0.0
+            for i in range(len(terms)):
+                total += diff[i]
+                sums[i] = total
+
+    def _roll_over(self) -> None:
+        today = self._today_func().toordinal()
+        if today == self._today:
+            return
+        if today < self._today or today - self._today >= self._horizon:
+            # при переводе даты назад дни, уже вышедшие из окон, не восстанавливаются
+            self._today = today
+            self._recompute()
+            return
+        for terms, sums, days in zip(self._terms, self._sums, self._days):
+            last = len(terms) - 1
+            for i, term in enumerate(terms):
+                if term <= 0:
+                    continue
+                # из окна срока term выходят дни с self._today - term + 1
+                # по today - term
+                for day in range(self._today - term + 1, today - term + 1):
+                    amount = days.pop(day, 0) if i == last else days.get(day, 0)
+                    sums[i] -= amount
+        self._today = today
+
+    def load(self, rows: Iterable[tuple[date, int, float]]) -> None:
+        """
+        Учесть расходы, заданные строками (день, id категории, сумма).
+        Строки могут идти в любом порядке, каждый расход нужно передать
+        один раз.
+        """
+        self._roll_over()
+        first = self._today - self._horizon + 1
+        all_days = self._days
+        scopes_of = self._pk_scopes.get
+        common = self._common
+        for day, category, amount in rows:
+            ordinal = day.toordinal()
+            if ordinal < first:
+                continue
+            for scope in scopes_of(category, common):
+                days = all_days[scope]
+                days[ordinal] = days.get(ordinal, 0) + amount
+        self._recompute()
+
+    def load_expenses(self, expenses: Iterable[Expense]) -> None:
+        """ Учесть расходы expenses """
+        self.load((exp.expense_date.date(), exp.category, exp.amount)
+                  for exp in expenses)
+
+    def load_rollup(self, rollup: DailyRollup) -> None:
+        """
+        Учесть расходы по таблице дневных итогов, сгруппированной по категориям
+        """
+        self.load((day, grp, total) for day, grp, total, _ in rollup.daily(self.since()))
+
+    def load_repository(self, repo: AbstractRepository[Expense],
+                        batch_size: int = 10_000) -> None:
+        """
+        Учесть расходы репозитория, входящие хотя бы в один бюджет.
+        Из SQliteRepository читаются только нужные поля, без создания
+        объектов Expense.
+        """
+        where: dict[str, Any] = {
+            "expense_date__ge": datetime.combine(self.since(), datetime.min.time())
+        }
+        if isinstance(repo, SQliteRepository):
+            columns = repo.iter_columns(("expense_date", "category", "amount"),
+                                        where, batch_size)
+            self.load((date.fromordinal(_EPOCH_ORDINAL + seconds // _DAY_SECONDS),
+                       category, amount) for seconds, category, amount in columns)
+        else:
+            self.load_expenses(repo.iter_all(where, batch_size))
+
+    def _apply(self, exp: Expense, sign: int) -> None:
+        ordinal = exp.expense_date.date().toordinal()
+        age = max(self._today - ordinal, 0)
+        if age >= self._horizon:
+            return
+        amount = sign * exp.amount
+        for scope in self._pk_scopes.get(exp.category, self._common):
+            terms = self._terms[scope]
+            idx = bisect_right(terms, age)
+            if idx == len(terms):
+                continue
+            sums = self._sums[scope]
+            for i in range(idx, len(terms)):
+                sums[i] += amount
+            days = self._days[scope]
+            value = days.get(ordinal, 0) + amount
+            if value:
+                days[ordinal] = value
+            else:
+                days.pop(ordinal, None)
+
+    def added(self, exp: Expense) -> None:
+        """ Учесть добавленный расход """
+        self._roll_over()
+        self._apply(exp, 1)
+
+    def removed(self, exp: Expense) -> None:
+        """ Учесть удаленный расход """
+        self._roll_over()
+        self._apply(exp, -1)
+
+    def changed(self, old: Expense, new: Expense) -> None:
+        """ Учесть изменение расхода old на new """
+        self._roll_over()
+        self._apply(old, -1)
+        self._apply(new, 1)
+
+    def spent(self) -> list[float]:
+        """ Суммы расходов за сроки бюджетов в порядке бюджетов """
+        self._roll_over()
+        return [self._sums[scope][i] for scope, i in self._slots]
+
+    def statuses(self) -> list[BudgetStatus]:
+        """ Исполнение всех бюджетов в порядке бюджетов """
+        return [BudgetStatus(budg, spent)
+                for budg, spent in zip(self._budgets, self.spent())]
+
+    def exceeded(self) -> list[BudgetStatus]:
+        """ Исполнение превышенных бюджетов """
+        return [status for status in self.statuses() if status.exceeded]
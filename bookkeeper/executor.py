@@ -0,0 +1,42 @@
+"""
+Исполнители задач презентера
+
+Презентер не обращается к репозиториям напрямую из обработчиков окна,
+а передает работу исполнителю: функция fn выполняется исполнителем
+(например, в фоновом потоке), а ее результат передается в callback
+в потоке интерфейса.
+"""
+
+from typing import Any, Callable, Hashable, Protocol, TypeVar
+
+R = TypeVar('R')
+
+
+class Executor(Protocol):
+    """
+    Интерфейс исполнителя задач
+    """
+
+    def submit(self, fn: Callable[[], R],
+               callback: Callable[[R], Any] | None = None,
+               key: Hashable | None = None) -> None:
+        """
+        Выполнить fn и передать результат в callback.
+        Задачи без ключа выполняются в порядке отправки. Если задача с ключом
+        key еще не начала выполняться к моменту отправки новой задачи с тем же
+        ключом, старая задача отменяется, а результат уже выполняющейся
+        задачи с этим ключом не передается в callback.
+        """
+
+
+class ImmediateExecutor:
+    """
+    Исполнитель, выполняющий задачу сразу в вызывающем потоке
+    """
+
+    def submit(self, fn: Callable[[], R],
+               callback: Callable[[R], Any] | None = None,
+               key: Hashable | None = None) -> None:
+        result = fn()
+        if callback is not None:
+            callback(result)
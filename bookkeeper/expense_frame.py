@@ -0,0 +1,326 @@
+"""
+Колоночное хранилище расходов для аналитики
+
+Вместо списка объектов Expense значения каждого поля хранятся в отдельном
+массиве array целых 64-битных чисел, а комментарии - в общем пуле строк,
+на который ссылаются номера. Основной выигрыш - в памяти: колонки занимают
+в несколько раз меньше места, чем объекты. Фильтр по дате расходов,
+добавленных в порядке дат, находит границы бисекцией и быстрее перебора
+объектов; остальные фильтры строят маску строк и медленнее перебора,
+а группировка и суммирование проходят по массивам без создания объектов,
+но по времени близки к перебору.
+"""
+
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from functools import partial
+from itertools import compress
+from typing import Any, Callable, Iterable, Iterator, Literal
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.abstract_repository import AbstractRepository
+from bookkeeper.repository.query import like_regex, parse_condition
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+Period = Literal["day", "week", "month"]
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+_DAY_SECONDS = 86400
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_COLUMNS = ("pk", "amount", "category", "expense_date", "comment")
+
+# сравнения с переставленными аргументами: partial(op, значение)(x) == x оп значение
+_REVERSED_COMPARATORS: dict[str, Callable[[Any, Any], bool]] = {
+    'eq': operator.eq,
+    'lt': operator.gt,
+    'le': operator.ge,
+    'gt': operator.lt,
+    'ge': operator.le,
+}
+
+
+def _to_seconds(value: datetime | date) -> int:
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return (value - _EPOCH) // _SECOND
+
+
+def _narrow(column: 'array[int]', op: str, seconds: int,
+            low: int, high: int) -> tuple[int, int]:
+    # сужает границы [low, high) отсортированной колонки условием op
+    if op in ('eq', 'ge'):
+        low = max(low, bisect_left(column, seconds))
+    elif op == 'gt':
+        low = max(low, bisect_right(column, seconds))
+    if op in ('eq', 'le'):
+        high = min(high, bisect_right(column, seconds))
+    elif op == 'lt':
+        high = min(high, bisect_left(column, seconds))
+    return low, high
+
+
+class ExpenseFrame:
+    """
+    Расходы в виде колонок: pk, amount (сумма), category (id категории),
+    expense_date (дата расхода в секундах от 1970-01-01) и comment
+    (номер комментария в пуле comments). Дата добавления не хранится.
+    Суммы должны быть целыми, как в модели Expense.
+    """
+
+    def __init__(self) -> None:
+        self.pk = array('q')
+        self.amount = array('q')
+        self.category = array('q')
+        self.expense_date = array('q')
+        self.comment = array('q')
+        self.comments: list[str] = []
+        self._comment_codes: dict[str, int] = {}
+        # идут ли даты по неубыванию: тогда фильтр по дате ищет границы бисекцией
+        self._dates_sorted = True
+
+    def _intern(self, comment: str) -> int:
+        code = self._comment_codes.get(comment)
+        if code is None:
+            code = self._comment_codes[comment] = len(self.comments)
+            self.comments.append(comment)
+        return code
+
+    def _append_row(self, pk: int, amount: int, category: int,
+                    seconds: int, comment: str) -> None:
+        if self.expense_date and seconds < self.expense_date[-1]:
+            self._dates_sorted = False
+        self.pk.append(pk)
+        self.amount.append(amount)
+        self.category.append(category)
+        self.expense_date.append(seconds)
+        self.comment.append(self._intern(comment))
+
+    def append(self, exp: Expense) -> None:
+        """ Добавить расход в конец колонок """
+        self._append_row(exp.pk, exp.amount, exp.category,
+                         _to_seconds(exp.expense_date), exp.comment)
+
+    def extend(self, expenses: Iterable[Expense]) -> None:
+        """ Добавить несколько расходов """
+        for exp in expenses:
+            self.append(exp)
+
+    @classmethod
+    def from_expenses(cls, expenses: Iterable[Expense]) -> 'ExpenseFrame':
+        """
+        Построить колонки по объектам Expense
+
+        Parameters
+        ----------
+        expenses - итерируемый объект с расходами
+
+        Returns
+        -------
+        Объект ExpenseFrame
+        """
+        frame = cls()
+        frame.extend(expenses)
+        return frame
+
+    @classmethod
+    def from_repository(cls, repo: AbstractRepository[Expense],
+                        where: dict[str, Any] | None = None,
+                        batch_size: int = 10_000) -> 'ExpenseFrame':
+        """
+        Загрузить расходы из репозитория. Из SQliteRepository значения
+        читаются прямо в колонки, без создания объектов Expense, из других
+        репозиториев - перебором iter_all.
+
+        Parameters
+        ----------
+        repo - репозиторий расходов
+        where - условие выборки, как в AbstractRepository.get_all
+        batch_size - сколько записей читать из хранилища за раз
+
+        Returns
+        -------
+        Объект ExpenseFrame
+        """
+        frame = cls()
+        if isinstance(repo, SQliteRepository):
+            for row in repo.iter_columns(_COLUMNS, where, batch_size):
+                frame._append_row(*row)
+        else:
+            frame.extend(repo.iter_all(where, batch_size))
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.pk)
+
+    def dates(self) -> Iterator[datetime]:
+        """ Даты расходов в виде datetime """
+        return (_EPOCH + timedelta(seconds=sec) for sec in self.expense_date)
+
+    def to_expenses(self) -> list[Expense]:
+        """ Восстановить объекты Expense (дата добавления не сохраняется) """
+        return [Expense(amount, category, date_, comment=self.comments[code], pk=pk)
+                for pk, amount, category, date_, code
+                in zip(self.pk, self.amount, self.category, self.dates(), self.comment)]
+
+    def _mask(self, key: str, value: Any) -> Iterable[bool]:
+        field, op = parse_condition(key)
+        if field not in _COLUMNS:
+            raise ValueError(f'Unknown field {field!r}')
+        if field == 'comment':
+            return self._comment_mask(op, value)
+        column: array[int] = getattr(self, field)
+        convert: Callable[[Any], Any] = (
+            _to_seconds if field == 'expense_date' else lambda val: val
+        )
+        if op == 'in':
+            values = {convert(val) for val in value}
+            return map(values.__contains__, column)
+        if op == 'between':
+            low, high = convert(value[0]), convert(value[1])
+            return map(operator.and_, map(partial(operator.le, low), column),
+                       map(partial(operator.ge, high), column))
+        if op not in _REVERSED_COMPARATORS:
+            raise ValueError(f'operator {op!r} is not supported for {field!r}')
+        return map(partial(_REVERSED_COMPARATORS[op], convert(value)), column)
+
+    def _comment_mask(self, op: str, value: Any) -> Iterable[bool]:
+        if op == 'eq':
+            texts: Iterable[str] = [value]
+        elif op == 'in':
+            texts = value
+        elif op == 'like':
+            regex = like_regex(value)
+            texts = [text for text in self.comments if regex.fullmatch(text)]
+        else:
+            raise ValueError(f'operator {op!r} is not supported for comments')
+        codes = {self._comment_codes[text] for text in texts
+                 if text in self._comment_codes}
+        return map(codes.__contains__, self.comment)
+
+    def _date_range(self, where: dict[str, Any]) -> tuple[int, int] | None:
+        # границы строк для условий только на отсортированную дату
+        if where and not self._dates_sorted:
+            return None
+        column = self.expense_date
+        low, high = 0, len(column)
+        for key, value in where.items():
+            field, op = parse_condition(key)
+            if field != 'expense_date':
+                return None
+            if op == 'between':
+                bounds = [('ge', value[0]), ('le', value[1])]
+            else:
+                bounds = [(op, value)]
+            for bound_op, bound in bounds:
+                if bound_op not in _REVERSED_COMPARATORS:
+                    return None
+                low, high = _narrow(column, bound_op, _to_seconds(bound), low, high)
+        return low, max(low, high)
+
+    def _selection(self, where: dict[str, Any]) -> bytes:
+        # маска строк: байт 1 - строка подходит, 0 - нет
+        masks = [bytes(self._mask(key, value)) for key, value in where.items()]
+        if len(masks) == 1:
+            return masks[0]
+        joined = int.from_bytes(masks[0], 'little')
+        for mask in masks[1:]:
+            joined &= int.from_bytes(mask, 'little')
+        return joined.to_bytes(len(self), 'little')
+
+    def indices(self, where: dict[str, Any] | None = None) -> list[int]:
+        """
+        Номера строк расходов, удовлетворяющих условию where (в формате
+        метода filter), в порядке возрастания. Позволяет обращаться
+        к колонкам напрямую, не копируя выбранные строки.
+        """
+        where = where or {}
+        bounds = self._date_range(where)
+        if bounds is not None:
+            return list(range(*bounds))
+        return list(compress(range(len(self)), self._selection(where)))
+
+    def filter(self, where: dict[str, Any] | None = None) -> 'ExpenseFrame':
+        """
+        Выбрать расходы, удовлетворяющие условию where в формате модуля
+        bookkeeper.repository.query по полям pk, amount, category,
+        expense_date (значения - datetime или date) и comment
+        (операторы eq, in и like).
+
+        Если расходы добавлены в порядке дат, условие только на дату
+        находит границы бисекцией. В остальных случаях подряд идущие
+        подходящие строки копируются срезами массивов, разрозненные -
+        поэлементно.
+
+        Returns
+        -------
+        Новый объект ExpenseFrame с общим пулом комментариев
+        """
+        result = ExpenseFrame()
+        result.comments = self.comments
+        result._comment_codes = self._comment_codes
+        result._dates_sorted = self._dates_sorted
+        where = where or {}
+        bounds = self._date_range(where)
+        if bounds is not None:
+            for name in _COLUMNS:
+                getattr(result, name).extend(getattr(self, name)[bounds[0]:bounds[1]])
+            return result
+        mask = self._selection(where)
+        columns = [(getattr(self, name), getattr(result, name)) for name in _COLUMNS]
+        if mask.count(b'\x00\x01') > len(self) // 8:
+            for column, selected in columns:
+                selected.extend(list(compress(column, mask)))
+            return result
+        end = 0
+        while (start := mask.find(1, end)) >= 0:
+            end = mask.find(0, start)
+            if end < 0:
+                end = len(mask)
+            for column, selected in columns:
+                selected.extend(column[start:end])
+        return result
+
+    def total(self) -> int:
+        """ Сумма всех расходов """
+        return sum(self.amount)
+
+    def sum_by_category(self) -> dict[int, int]:
+        """ Суммы расходов по категориям в виде словаря {id категории: сумма} """
+        result: dict[int, int] = {}
+        get = result.get
+        for category, amount in zip(self.category, self.amount):
+            result[category] = get(category, 0) + amount
+        return result
+
+    def resample(self, period: Period = "day") -> dict[date, int]:
+        """
+        Суммы расходов по дням, неделям (с понедельника) или месяцам.
+
+        Parameters
+        ----------
+        period - "day", "week" или "month"
+
+        Returns
+        -------
+        Словарь {первый день периода: сумма} в порядке возрастания дат,
+        периоды без расходов в него не попадают
+        """
+        if period not in ("day", "week", "month"):
+            raise ValueError(f'Unknown period {period!r}')
+        by_day: dict[int, int] = {}
+        get = by_day.get
+        for seconds, amount in zip(self.expense_date, self.amount):
+            day = seconds // _DAY_SECONDS
+            by_day[day] = get(day, 0) + amount
+        result: dict[date, int] = {}
+        for day in sorted(by_day):
+            start = date.fromordinal(_EPOCH_ORDINAL + day)
+            if period == "week":
+                start -= timedelta(days=start.weekday())
+            elif period == "month":
+                start = start.replace(day=1)
+            result[start] = result.get(start, 0) + by_day[day]
+        return result
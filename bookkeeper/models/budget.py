@@ -5,7 +5,7 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Budget:
     """
     Бюджет содержит срок (term), сумму (summa) и категорию расходов (category)
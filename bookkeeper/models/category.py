@@ -8,7 +8,7 @@ from typing import Iterator
 from ..repository.abstract_repository import AbstractRepository
 
 
-@dataclass
+@dataclass(slots=True)
 class Category:
     """
     Категория расходов, хранит название в атрибуте name и ссылку (id) на
@@ -50,12 +50,14 @@ class Category:
         Yields
         -------
         Объекты Category от родителя и выше до категории верхнего уровня
+        (при цикле в иерархии - до первого повтора)
         """
+        seen = {self.pk}
         parent = self.get_parent(repo)
-        if parent is None:
-            return
-        yield parent
-        yield from parent.get_all_parents(repo)
+        while parent is not None and parent.pk not in seen:
+            yield parent
+            seen.add(parent.pk)
+            parent = parent.get_parent(repo)
 
     def get_subcategories(self,
                           repo: AbstractRepository['Category']
@@ -76,9 +78,11 @@ class Category:
         def get_children(graph: dict[int | None, list['Category']],
                          root: int) -> Iterator['Category']:
             """ dfs in graph from root """
-            for x in graph[root]:
+            stack = list(reversed(graph[root]))
+            while stack:
+                x = stack.pop()
                 yield x
-                yield from get_children(graph, x.pk)
+                stack.extend(reversed(graph[x.pk]))
 
         subcats = defaultdict(list)
         for cat in repo.get_all():
@@ -93,13 +97,12 @@ class Category:
         """
         Создать дерево категорий из списка пар "потомок-родитель".
         Список должен быть топологически отсортирован, т.е. потомки
-        не должны встречаться раньше своего родителя.
-        Проверка корректности исходных данных не производится.
-        При использовании СУБД с проверкой внешних ключей, будет получена
-        ошибка (для sqlite3 - IntegrityError). При отсутствии проверки
-        со стороны СУБД, результат, возможно, будет корректным, если исходные
-        данные корректны за исключением сортировки. Если нет, то нет.
-        "Мусор на входе, мусор на выходе".
+        не должны встречаться раньше своего родителя, иначе выбрасывается
+        KeyError и ничего не сохраняется. Родителем считается последняя
+        категория с таким названием, встретившаяся в списке раньше потомка.
+        Категории сохраняются в одной транзакции пакетами по уровням дерева
+        (сначала все категории верхнего уровня, затем их подкатегории
+        и т.д.), так что число обращений к репозиторию равно глубине дерева.
 
         Parameters
         ----------
@@ -110,9 +113,26 @@ class Category:
         -------
         Список созданных объектов Category
         """
-        created: dict[str, Category] = {}
+        cats: list[Category] = []
+        parents: list[int | None] = []
+        depths: list[int] = []
+        levels: list[list[int]] = []
+        created: dict[str, int] = {}
         for child, parent in tree:
-            cat = cls(child, created[parent].pk if parent is not None else None)
-            repo.add(cat)
-            created[child] = cat
-        return list(created.values())
+            parent_index = created[parent] if parent is not None else None
+            level = 0 if parent_index is None else depths[parent_index] + 1
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(len(cats))
+            depths.append(level)
+            created[child] = len(cats)
+            cats.append(cls(child))
+            parents.append(parent_index)
+        with repo.transaction():
+            for level_nodes in levels:
+                for i in level_nodes:
+                    parent_index = parents[i]
+                    if parent_index is not None:
+                        cats[i].parent = cats[parent_index].pk
+                repo.add_many(cats[i] for i in level_nodes)
+        return [cats[i] for i in created.values()]
@@ -0,0 +1,199 @@
+"""
+Индекс иерархии категорий расходов
+"""
+from typing import Iterable
+
+from .category import Category
+from ..repository.abstract_repository import AbstractRepository
+
+
+class CategoryTree:
+    """
+    Дерево категорий в оперативной памяти. Строится один раз по списку
+    категорий и затем обновляется методами add, update и remove без
+    обращения к репозиторию.
+
+    Для каждой категории хранятся номер входа tin в порядке обхода дерева
+    в глубину и номер выхода tout, так что подкатегории категории - ровно
+    те, у кого tin лежит в интервале (tin, tout) родителя. Поэтому проверка
+    "является ли предком" выполняется за O(1), а список всех подкатегорий
+    получается срезом порядка обхода без перебора всего дерева.
+    После изменений интервалы пересчитываются лениво, при первом запросе.
+    Категории, родителя которых нет в дереве, считаются категориями
+    верхнего уровня. Если переданные категории образуют цикл, в обходе
+    он разрывается на первой из них, и она тоже считается категорией
+    верхнего уровня; add и update не допускают появления новых циклов.
+    """
+
+    def __init__(self, categories: Iterable[Category] = ()) -> None:
+        self._nodes: dict[int, Category] = {}
+        self._children: dict[int | None, list[int]] = {None: []}
+        self._order: list[int] = []
+        self._tin: dict[int, int] = {}
+        self._tout: dict[int, int] = {}
+        self._depth: dict[int, int] = {}
+        self._dirty = True
+        for cat in categories:
+            self._link(cat)
+
+    @classmethod
+    def from_repository(cls, repo: AbstractRepository[Category]) -> 'CategoryTree':
+        """
+        Построить дерево по всем категориям репозитория
+
+        Parameters
+        ----------
+        repo - репозиторий категорий
+
+        Returns
+        -------
+        Объект CategoryTree
+        """
+        return cls(repo.get_all())
+
+    def _link(self, cat: Category) -> None:
+        self._nodes[cat.pk] = cat
+        self._children.setdefault(cat.pk, [])
+        self._children.setdefault(cat.parent, []).append(cat.pk)
+        self._dirty = True
+
+    def _unlink(self, pk: int) -> Category:
+        cat = self._nodes.pop(pk)
+        self._children[cat.parent].remove(pk)
+        self._dirty = True
+        return cat
+
+    def _creates_cycle(self, pk: int, parent: int | None) -> bool:
+        seen = set()
+        while parent is not None and parent not in seen:
+            if parent == pk:
+                return True
+            seen.add(parent)
+            cat = self._nodes.get(parent)
+            parent = cat.parent if cat is not None else None
+        return False
+
+    def _visit(self, root: int) -> None:
+        # depth = -1 отмечает выход из категории
+        stack = [(root, 0)]
+        while stack:
+            pk, depth = stack.pop()
+            if depth < 0:
+                self._tout[pk] = len(self._order)
+                continue
+            if pk in self._tin:
+                continue
+            self._tin[pk] = len(self._order)
+            self._depth[pk] = depth
+            self._order.append(pk)
+            stack.append((pk, -1))
+            stack.extend((child, depth + 1)
+                         for child in reversed(self._children[pk]))
+
+    def _rebuild(self) -> None:
+        self._order = []
+        self._tin.clear()
+        self._tout.clear()
+        self._depth.clear()
+        for parent, pks in list(self._children.items()):
+            if parent is None or parent not in self._nodes:
+                for pk in pks:
+                    self._visit(pk)
+        if len(self._order) < len(self._nodes):
+            for pk in self._nodes:
+                if pk not in self._tin:
+                    self._visit(pk)
+        self._dirty = False
+
+    def _ensure(self) -> None:
+        if self._dirty:
+            self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, pk: object) -> bool:
+        return pk in self._nodes
+
+    def get(self, pk: int) -> Category | None:
+        """ Категория по pk или None, если ее нет в дереве """
+        return self._nodes.get(pk)
+
+    def add(self, cat: Category) -> None:
+        """ Добавить сохраненную в репозитории категорию """
+        if cat.pk in self._nodes:
+            raise ValueError(f'category {cat.pk} is already in the tree')
+        if self._creates_cycle(cat.pk, cat.parent):
+            raise ValueError(f'category {cat.pk} would be its own ancestor')
+        self._link(cat)
+
+    def update(self, cat: Category) -> None:
+        """ Заменить категорию с тем же pk, например, после смены родителя """
+        if self._creates_cycle(cat.pk, cat.parent):
+            raise ValueError(f'category {cat.pk} would be its own ancestor')
+        self._unlink(cat.pk)
+        self._link(cat)
+
+    def remove(self, pk: int) -> list[int]:
+        """
+        Удалить категорию вместе со всеми подкатегориями
+
+        Parameters
+        ----------
+        pk - id удаляемой категории
+
+        Returns
+        -------
+        Список id удаленных категорий, начиная с pk
+        """
+        pks = self.subtree(pk)
+        self._unlink(pk)
+        for sub in pks[1:]:
+            del self._nodes[sub]
+        for sub in pks:
+            del self._children[sub]
+        return pks
+
+    def children(self, pk: int | None) -> list[Category]:
+        """ Непосредственные подкатегории (pk=None - категории верхнего уровня) """
+        if pk is None:
+            self._ensure()
+            return [self._nodes[pk] for pk in self._order if self._depth[pk] == 0]
+        return [self._nodes[child] for child in self._children[pk]]
+
+    def parent(self, pk: int) -> Category | None:
+        """ Родительская категория или None для категории верхнего уровня """
+        parent = self._nodes[pk].parent
+        return self._nodes.get(parent) if parent is not None else None
+
+    def ancestors(self, pk: int) -> list[Category]:
+        """ Категории от родителя и выше до категории верхнего уровня """
+        result = []
+        seen = {pk}
+        parent = self.parent(pk)
+        while parent is not None and parent.pk not in seen:
+            result.append(parent)
+            seen.add(parent.pk)
+            parent = self.parent(parent.pk)
+        return result
+
+    def depth(self, pk: int) -> int:
+        """ Уровень категории, у категорий верхнего уровня - 0 """
+        self._ensure()
+        return self._depth[pk]
+
+    def is_ancestor(self, ancestor: int, pk: int) -> bool:
+        """ Является ли категория ancestor предком категории pk (или ей самой) """
+        self._ensure()
+        return self._tin[ancestor] <= self._tin[pk] < self._tout[ancestor]
+
+    def subtree(self, pk: int) -> list[int]:
+        """
+        id категории pk и всех ее подкатегорий в порядке обхода дерева в глубину
+        """
+        self._ensure()
+        return self._order[self._tin[pk]:self._tout[pk]]
+
+    def subcategories(self, pk: int) -> list[Category]:
+        """ Все подкатегории категории pk разного уровня, без нее самой """
+        return [self._nodes[sub] for sub in self.subtree(pk)[1:]]
@@ -5,13 +5,19 @@
 import sys
 
 from typing import Protocol, Callable
-from datetime import datetime, timedelta, date
+from datetime import datetime
 from bookkeeper.models.category import Category
+from bookkeeper.models.category_tree import CategoryTree
 from bookkeeper.models.expense import Expense
 from bookkeeper.models.budget import Budget
+from bookkeeper.executor import Executor, ImmediateExecutor
+from bookkeeper.totals import RunningTotals
 from bookkeeper.view.app_window import MainWindow
+from bookkeeper.view.qt_executor import QtExecutor
+from bookkeeper.repository.cached_repository import CachedRepository
 from bookkeeper.repository.sqlite_repository import SQliteRepository
-from bookkeeper.repository.abstract_repository import AbstractRepository
+from bookkeeper.repository.sqlite_connection import ConnectionPool, FAST_PROFILE
+from bookkeeper.repository.abstract_repository import AbstractRepository, unit_of_work
 
 
 class AbstractView(Protocol):
@@ -67,10 +73,24 @@ class AbstractView(Protocol):
 
     def set_expense_list(
         self,
-        expenses: list[Expense],
+        loader: Callable[[int, int, Callable[[list[Expense]], None]], None],
         categories: dict[int, str],
     ) -> None:
-        pass
+        """
+        Показывает расходы, которые подгружаются функцией
+        loader(pk последнего загруженного расхода, размер страницы,
+        функция, получающая страницу)
+        """
+
+    def set_category_names(self, categories: dict[int, str]) -> None:
+        """
+        Меняет названия категорий в списке расходов
+        """
+
+    def append_expense(self, exp: Expense) -> None:
+        """
+        Добавляет расход в список расходов
+        """
 
     def set_summ(self, summs: list[float]) -> None:
         pass
@@ -78,11 +98,14 @@ class AbstractView(Protocol):
     def do_show(self) -> None:
         pass
 
-    def clear_expense_table(self) -> None:
-        pass
-
 
 class Bookkeeper:
+    """
+    Презентер. Обращения к репозиториям выполняются исполнителем executor
+    (по умолчанию сразу в вызывающем потоке), а окно обновляется
+    по готовности результатов. При использовании фонового исполнителя
+    задачи должны выполняться по очереди в одном потоке.
+    """
 
     def __init__(
         self,
@@ -90,20 +113,20 @@ class Bookkeeper:
         category_repository: AbstractRepository[Category],
         budget_repository: AbstractRepository[Budget],
         expense_repository: AbstractRepository[Expense],
+        executor: Executor | None = None,
     ) -> None:
         self.day_budg = 1000
         self.week_budg = 7000
         self.month_budg = 30000
         self.budgets: list[Budget]
 
-        self.month_summ = 0
-        self.week_summ = 0
-        self.day_summ = 0
-
         self.view = view
         self.category_repository = category_repository
         self.expense_repository = expense_repository
         self.budget_repository = budget_repository
+        self.executor: Executor = executor or ImmediateExecutor()
+        self.totals: RunningTotals | None = None
+        self.category_tree: CategoryTree
 
         self.view.expense_change_handler(self.change_expense)
         self.view.expense_add_handler(self.add_expense)
@@ -115,56 +138,80 @@ class Bookkeeper:
         self.set_budget()
         self.set_categories()
         self.set_expense_list()
-        self.set_summ()
+        # без ключа: задачу загрузки не должно отменить обновление сумм
+        self.executor.submit(self._summs, self.view.set_summ)
         self.view.do_show()
 
-    def set_budget(self) -> None:
-        self.budgets = self.budget_repository.get_all()
-        if not self.budgets:
+    def _load_totals(self) -> RunningTotals:
+        """
+        Суммы расходов; при первом обращении они считаются по репозиторию,
+        поэтому вызывать до изменения репозитория
+        """
+        if self.totals is None:
+            self.totals = RunningTotals(self.expense_repository)
+        return self.totals
+
+    def _summs(self) -> list[float]:
+        return self._load_totals().summs
+
+    def _load_budgets(self) -> list[Budget]:
+        budgets = self.budget_repository.get_all()
+        if not budgets:
             budg_for_day = Budget(self.day_budg, 1)
             budg_for_week = Budget(self.week_budg, 7)
             budg_for_month = Budget(self.month_budg, 30)
-            self.budgets = [budg_for_day, budg_for_week, budg_for_month]
-            for budgs in self.budgets:
-                self.budget_repository.add(budgs)
-        self.view.set_budget(self.budgets)
+            budgets = [budg_for_day, budg_for_week, budg_for_month]
+            self.budget_repository.add_many(budgets)
+        return budgets
 
-    def set_categories(self) -> None:
+    def _show_budgets(self, budgets: list[Budget]) -> None:
+        self.budgets = budgets
+        self.view.set_budget(budgets)
+
+    def set_budget(self) -> None:
+        self.executor.submit(self._load_budgets, self._show_budgets)
+
+    def _load_categories(self) -> list[Category]:
         categories = self.category_repository.get_all()
         if not categories:
             categories = [Category("Продукты"), Category("Дом"), Category("Прочее")]
-            for cat in categories:
-                self.category_repository.add(cat)
-        self.view.set_categories(categories)
+            self.category_repository.add_many(categories)
+        self.category_tree = CategoryTree(categories)
+        return categories
+
+    def set_categories(self) -> None:
+        self.executor.submit(self._load_categories, self.view.set_categories)
+
+    def _category_names(self) -> dict[int, str]:
+        return {cat.pk: cat.name for cat in self.category_repository.get_all()}
+
+    def _category_pk(self, name: str) -> int:
+        if name == "Удаленная категория":
+            return 0
+        cat_list = self.category_repository.get_all({"name": name})
+        assert len(cat_list) == 1
+        return cat_list[0].pk
+
+    def _fetch_expenses(self, after_pk: int, limit: int,
+                        deliver: Callable[[list[Expense]], None]) -> None:
+        self.executor.submit(
+            lambda: self.expense_repository.get_all(
+                {"pk__gt": after_pk}, order_by="pk", limit=limit
+            ),
+            deliver,
+        )
 
     def set_expense_list(self) -> None:
-        self.view.clear_expense_table()
-        expenses = self.expense_repository.get_all()
-        cat_list = self.category_repository.get_all()
-        categories = {}
-        for item in cat_list:
-            categories[item.pk] = item.name
-        self.view.set_expense_list(expenses, categories)
+        self.executor.submit(
+            self._category_names,
+            lambda categories: self.view.set_expense_list(
+                self._fetch_expenses, categories
+            ),
+            key="expenses",
+        )
 
     def set_summ(self) -> None:
-        self.day_summ = 0
-        self.week_summ = 0
-        self.month_summ = 0
-        expenses = self.expense_repository.get_all()
-        if expenses:
-            today = date.today()
-            week = today - timedelta(7)
-            month = today - timedelta(31)
-            for exp in expenses:
-                exp_date = exp.expense_date.date()
-                if exp_date >= month:
-                    self.month_summ += exp.amount
-                if exp_date >= week:
-                    self.week_summ += exp.amount
-                if exp_date >= today:
-                    self.day_summ += exp.amount
-        summs = list(map(float, [self.day_summ, self.week_summ, self.month_summ]))
-        self.view.set_summ(summs)
+        self.executor.submit(self._summs, self.view.set_summ, key="summ")
 
     def change_expense(
         self,
@@ -174,52 +221,68 @@ class Bookkeeper:
         com: str,
         pk: int,
     ) -> None:
-        if cat == "Удаленная категория":
-            prim_key = 0
-        else:
-            cat_list = self.category_repository.get_all({"name": cat})
-            assert len(cat_list) == 1
-            prim_key = cat_list[0].pk
-        exp = Expense(amount, prim_key, datetime_, comment=com, pk=pk)
-        self.expense_repository.update(exp)
+        def change() -> None:
+            totals = self._load_totals()
+            exp = Expense(amount, self._category_pk(cat), datetime_, comment=com, pk=pk)
+            old = self.expense_repository.get(pk)
+            self.expense_repository.update(exp)
+            totals.changed(old, exp)
+
+        self.executor.submit(change)
         self.set_summ()
 
     def add_expense(self, amount: int, cat: str, datetime_: datetime) -> None:
-        cat_list = self.category_repository.get_all({"name": cat})
-        assert len(cat_list) == 1
-        prim_key = cat_list[0].pk
-        exp = Expense(amount, prim_key, datetime_)
-        self.expense_repository.add(exp)
+        def add() -> Expense:
+            totals = self._load_totals()
+            exp = Expense(amount, self._category_pk(cat), datetime_)
+            self.expense_repository.add(exp)
+            totals.added(exp)
+            return exp
+
+        self.executor.submit(add, self.view.append_expense)
         self.set_summ()
 
     def delete_category(self, name: str) -> None:
-        cat_list = self.category_repository.get_all({"name": name})
-        assert len(cat_list) == 1
-        prim_key = cat_list[0].pk
-        self.category_repository.delete(prim_key)
-        self.set_expense_list()
-        expenses = self.expense_repository.get_all()
-        for exp in expenses:
-            if exp.category == prim_key:
-                upd_exp = Expense(
-                    exp.amount, 0, exp.expense_date, comment=exp.comment, pk=exp.pk
+        def delete() -> None:
+            pk = self._category_pk(name)
+            pks = self.category_tree.subtree(pk)
+            with unit_of_work(self.category_repository, self.expense_repository):
+                self.category_repository.delete_many(pks)
+                self.expense_repository.update_where(
+                    {"category__in": pks}, {"category": 0}
                 )
-                self.expense_repository.update(upd_exp)
+            self.category_tree.remove(pk)
+
+        self.executor.submit(delete)
+        self.set_expense_list()
 
     def add_category(self, cat: Category) -> None:
-        self.category_repository.add(cat)
+        def add() -> dict[int, str]:
+            self.category_repository.add(cat)
+            self.category_tree.add(cat)
+            return self._category_names()
+
+        self.executor.submit(add, self.view.set_category_names)
 
     def budget_change(self, budg: Budget) -> None:
-        self.budget_repository.update(budg)
+        self.executor.submit(lambda: self.budget_repository.update(budg))
 
 
 def main() -> int:
     main_window = MainWindow()
-    cat_repo = SQliteRepository[Category]("bookkeper.db", Category)
-    budget_repo = SQliteRepository[Budget]("bookkeper.db", Budget)
-    expense_repo = SQliteRepository[Expense]("bookkeper.db", Expense)
-
-    Bookkeeper(main_window, cat_repo, budget_repo, expense_repo)
+    with ConnectionPool("bookkeper.db", FAST_PROFILE) as pool:
+        cat_repo = CachedRepository[Category](
+            SQliteRepository[Category](pool, Category, indexes=["name", "parent"]),
+            max_queries=64,
+        )
+        budget_repo = SQliteRepository[Budget](pool, Budget)
+        expense_repo = SQliteRepository[Expense](
+            pool, Expense, indexes=["expense_date", "category"]
+        )
+
+        executor = QtExecutor()
+        Bookkeeper(main_window, cat_repo, budget_repo, expense_repo, executor)
+        executor.wait()
     return 0
 
 
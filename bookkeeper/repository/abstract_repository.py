@@ -8,7 +8,12 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Protocol, Any
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import (
+    Generic, TypeVar, Protocol, Any, ContextManager, Iterable, Iterator, cast
+)
+
+from bookkeeper.repository.query import OrderBy
 
 
 class Model(Protocol):  # pylint: disable=too-few-public-methods
@@ -30,6 +35,10 @@ class AbstractRepository(ABC, Generic[T]):
     get_all
     update
     delete
+    Пакетные методы add_many, update_many, delete_many, update_where
+    по умолчанию вызывают одиночные методы для каждого объекта, а агрегатные
+    методы count, sum, sum_by перебирают записи через iter_all. Наследники
+    могут переопределить их более эффективной реализацией.
     """
 
     @abstractmethod
@@ -44,12 +53,33 @@ class AbstractRepository(ABC, Generic[T]):
         """ Получить объект по id """
 
     @abstractmethod
-    def get_all(self, where: dict[str, Any] | None = None) -> list[T]:
+    def get_all(self, where: dict[str, Any] | None = None, *,
+                order_by: OrderBy = None,
+                limit: int | None = None,
+                offset: int = 0) -> list[T]:
         """
         Получить все записи по некоторому условию
-        where - условие в виде словаря {'название_поля': значение}
+        where - условие в виде словаря {'название_поля': значение},
+        допускаются операторы {'название_поля__ge': значение},
+        см. модуль bookkeeper.repository.query
         если условие не задано (по умолчанию), вернуть все записи
+        order_by - поле или список полей для сортировки ('-поле' - по убыванию)
+        limit, offset - вернуть не более limit записей, пропустив первые offset
+        """
+
+    def iter_all(self, where: dict[str, Any] | None = None,
+                 batch_size: int = 1000, *,
+                 order_by: OrderBy = None,
+                 limit: int | None = None,
+                 offset: int = 0) -> Iterator[T]:
+        """
+        Лениво перебрать все записи по некоторому условию.
+        where, order_by, limit, offset - как в get_all
+        batch_size - сколько записей читать из хранилища за раз
+        По умолчанию вызывает get_all, наследники могут переопределить метод
+        так, чтобы не держать в памяти все записи сразу.
         """
+        yield from self.get_all(where, order_by=order_by, limit=limit, offset=offset)
 
     @abstractmethod
     def update(self, obj: T) -> None:
@@ -58,3 +88,79 @@ class AbstractRepository(ABC, Generic[T]):
     @abstractmethod
     def delete(self, pk: int) -> None:
         """ Удалить запись """
+
+    def transaction(self) -> ContextManager[Any]:
+        """
+        Контекстный менеджер транзакции: изменения внутри блока фиксируются
+        вместе при выходе из него и откатываются при исключении, если
+        хранилище это поддерживает. По умолчанию ничего не делает.
+        """
+        return nullcontext()
+
+    def add_many(self, objs: Iterable[T]) -> list[int]:
+        """
+        Добавить несколько объектов в репозиторий, вернуть список их id,
+        также записать id в атрибут pk каждого объекта.
+        """
+        return [self.add(obj) for obj in objs]
+
+    def update_many(self, objs: Iterable[T]) -> None:
+        """ Обновить данные о нескольких объектах """
+        for obj in objs:
+            self.update(obj)
+
+    def delete_many(self, pks: Iterable[int]) -> None:
+        """ Удалить несколько записей """
+        for pk in pks:
+            self.delete(pk)
+
+    def update_where(self, where: dict[str, Any] | None,
+                     values: dict[str, Any]) -> int:
+        """
+        Присвоить полям всех записей, удовлетворяющих условию where,
+        значения из словаря values {'название_поля': значение}.
+        Вернуть количество измененных записей.
+        """
+        objs = self.get_all(where)
+        for obj in objs:
+            for field, value in values.items():
+                setattr(obj, field, value)
+        self.update_many(objs)
+        return len(objs)
+
+    def count(self, where: dict[str, Any] | None = None) -> int:
+        """ Количество записей, удовлетворяющих условию where """
+        return sum(1 for _ in self.iter_all(where))
+
+    def sum(self, field: str, where: dict[str, Any] | None = None) -> float:
+        """ Сумма значений поля field по записям, удовлетворяющим условию where """
+        return cast(float, sum(getattr(obj, field) for obj in self.iter_all(where)))
+
+    def sum_by(self, field: str, group_by: str,
+               where: dict[str, Any] | None = None) -> dict[Any, float]:
+        """
+        Суммы значений поля field, сгруппированные по значению поля group_by,
+        в виде словаря {значение_group_by: сумма}
+        """
+        result: dict[Any, float] = {}
+        for obj in self.iter_all(where):
+            key = getattr(obj, group_by)
+            result[key] = result.get(key, 0) + getattr(obj, field)
+        return result
+
+
+@contextmanager
+def unit_of_work(*repos: AbstractRepository[Any]) -> Iterator[None]:
+    """
+    Открыть транзакцию сразу в нескольких репозиториях. Репозитории sqlite
+    на общем пуле соединений разделяют одну транзакцию, поэтому все
+    изменения внутри блока фиксируются одним commit.
+    Транзакции начинаются при входе в блок with, а не при вызове.
+
+    with unit_of_work(category_repo, expense_repo):
+        ...
+    """
+    with ExitStack() as stack:
+        for repo in repos:
+            stack.enter_context(repo.transaction())
+        yield
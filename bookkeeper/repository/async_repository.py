@@ -0,0 +1,333 @@
+"""
+Модуль описывает асинхронный интерфейс репозитория для работы из asyncio
+
+Блокирующие вызовы sqlite выполняются в отдельном потоке базы данных,
+который берет задачи из очереди по одной, поэтому множество сопрограмм
+может одновременно пользоваться одной базой, не блокируя цикл событий.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from abc import ABC, abstractmethod
+from itertools import islice
+from os import PathLike
+from types import TracebackType
+from typing import Any, AsyncIterator, Callable, Generic, Iterable, TypeVar
+
+from bookkeeper.repository.abstract_repository import AbstractRepository, T
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.query import OrderBy
+from bookkeeper.repository.sqlite_connection import ConnectionPool, PragmaProfile
+from bookkeeper.repository.sqlite_repository import (
+    DatetimeStorage, Index, SQliteRepository
+)
+
+R = TypeVar('R')
+
+_Job = Callable[[], None]
+
+
+def _set_result(fut: 'asyncio.Future[Any]', result: Any) -> None:
+    if not fut.done():
+        fut.set_result(result)
+
+
+def _set_exception(fut: 'asyncio.Future[Any]', exc: BaseException) -> None:
+    if not fut.done():
+        fut.set_exception(exc)
+
+
+class DatabaseThread:
+    """
+    Поток, выполняющий блокирующие функции по очереди в порядке вызова call.
+    Один поток можно разделить между несколькими асинхронными репозиториями.
+    """
+
+    def __init__(self, name: str = 'bookkeeper-db') -> None:
+        self._queue: queue.Queue[_Job | None] = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while (job := self._queue.get()) is not None:
+            job()
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError('Cannot operate on a closed database thread')
+
+    def call(self, fn: Callable[[], R]) -> 'asyncio.Future[R]':
+        """
+        Выполнить fn в потоке базы данных. Вернуть future текущего цикла
+        событий, который получит результат fn или ее исключение.
+        """
+        self._check_open()
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[R] = loop.create_future()
+
+        def job() -> None:
+            if fut.cancelled():
+                return
+            callback: Callable[['asyncio.Future[Any]', Any], None] = _set_result
+            value: Any
+            try:
+                value = fn()
+            except BaseException as exc:  # pylint: disable=broad-except
+                callback, value = _set_exception, exc
+            try:
+                loop.call_soon_threadsafe(callback, fut, value)
+            except RuntimeError:
+                pass  # цикл событий уже закрыт, результат никому не нужен
+
+        self._queue.put(job)
+        return fut
+
+    def call_blocking(self, fn: Callable[[], R]) -> R:
+        """
+        Выполнить fn в потоке базы данных и дождаться результата.
+        Вызывается вне цикла событий, например, из конструктора.
+        """
+        self._check_open()
+        fut: concurrent.futures.Future[R] = concurrent.futures.Future()
+
+        def job() -> None:
+            if not fut.set_running_or_notify_cancel():
+                return
+            try:
+                fut.set_result(fn())
+            except BaseException as exc:  # pylint: disable=broad-except
+                fut.set_exception(exc)
+
+        self._queue.put(job)
+        return fut.result()
+
+    def close(self) -> None:
+        """ Выполнить уже поставленные в очередь функции и остановить поток """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+
+class AsyncAbstractRepository(ABC, Generic[T]):
+    """
+    Асинхронный репозиторий. Методы повторяют AbstractRepository,
+    но являются сопрограммами, а iter_all - асинхронным генератором.
+    Абстрактные методы:
+    add
+    get
+    get_all
+    update
+    delete
+    """
+
+    @abstractmethod
+    async def add(self, obj: T) -> int:
+        """
+        Добавить объект в репозиторий, вернуть id объекта,
+        также записать id в атрибут pk.
+        """
+
+    @abstractmethod
+    async def get(self, pk: int) -> T | None:
+        """ Получить объект по id """
+
+    @abstractmethod
+    async def get_all(self, where: dict[str, Any] | None = None, *,
+                      order_by: OrderBy = None,
+                      limit: int | None = None,
+                      offset: int = 0) -> list[T]:
+        """
+        Получить все записи по некоторому условию,
+        параметры - как в AbstractRepository.get_all
+        """
+
+    async def iter_all(self, where: dict[str, Any] | None = None,
+                       batch_size: int = 1000, *,
+                       order_by: OrderBy = None,
+                       limit: int | None = None,
+                       offset: int = 0) -> AsyncIterator[T]:
+        """
+        Лениво перебрать все записи по некоторому условию,
+        параметры - как в AbstractRepository.iter_all.
+        По умолчанию вызывает get_all.
+        """
+        for obj in await self.get_all(where, order_by=order_by,
+                                      limit=limit, offset=offset):
+            yield obj
+
+    @abstractmethod
+    async def update(self, obj: T) -> None:
+        """ Обновить данные об объекте. Объект должен содержать поле pk. """
+
+    @abstractmethod
+    async def delete(self, pk: int) -> None:
+        """ Удалить запись """
+
+
+class AsyncRepositoryAdapter(AsyncAbstractRepository[T]):
+    """
+    Асинхронный репозиторий поверх обычного: все вызовы repo выполняются
+    в потоке базы данных thread. Если поток не передан, адаптер создает
+    собственный и останавливает его в методе close.
+    """
+
+    def __init__(self, repo: AbstractRepository[T],
+                 thread: DatabaseThread | None = None) -> None:
+        self._repo = repo
+        self._owns_thread = thread is None
+        self._thread = thread or DatabaseThread()
+
+    @property
+    def repo(self) -> AbstractRepository[T]:
+        """ Обернутый репозиторий """
+        return self._repo
+
+    async def run(self, fn: Callable[[AbstractRepository[T]], R]) -> R:
+        """
+        Выполнить fn(repo) в потоке базы данных, например, чтобы сделать
+        несколько изменений в одной транзакции:
+
+        await repo.run(lambda r: r.update_where(where, values))
+        """
+        return await self._thread.call(lambda: fn(self._repo))
+
+    async def add(self, obj: T) -> int:
+        return await self._thread.call(lambda: self._repo.add(obj))
+
+    async def add_many(self, objs: Iterable[T]) -> list[int]:
+        """ Добавить несколько объектов за один вызов в потоке базы данных """
+        objs = list(objs)
+        return await self._thread.call(lambda: self._repo.add_many(objs))
+
+    async def get(self, pk: int) -> T | None:
+        return await self._thread.call(lambda: self._repo.get(pk))
+
+    async def get_all(self, where: dict[str, Any] | None = None, *,
+                      order_by: OrderBy = None,
+                      limit: int | None = None,
+                      offset: int = 0) -> list[T]:
+        return await self._thread.call(lambda: self._repo.get_all(
+            where, order_by=order_by, limit=limit, offset=offset))
+
+    async def iter_all(self, where: dict[str, Any] | None = None,
+                       batch_size: int = 1000, *,
+                       order_by: OrderBy = None,
+                       limit: int | None = None,
+                       offset: int = 0) -> AsyncIterator[T]:
+        """
+        Перебрать записи, читая их в потоке базы данных по batch_size штук.
+        Между пачками в потоке могут выполняться запросы других сопрограмм.
+        """
+        records = self._repo.iter_all(where, batch_size, order_by=order_by,
+                                      limit=limit, offset=offset)
+        while batch := await self._thread.call(
+                lambda: list(islice(records, batch_size))):
+            for obj in batch:
+                yield obj
+
+    async def update(self, obj: T) -> None:
+        await self._thread.call(lambda: self._repo.update(obj))
+
+    async def delete(self, pk: int) -> None:
+        await self._thread.call(lambda: self._repo.delete(pk))
+
+    def close(self) -> None:
+        """ Остановить поток базы данных, если он принадлежит адаптеру """
+        if self._owns_thread:
+            self._thread.close()
+
+    async def __aenter__(self) -> 'AsyncRepositoryAdapter[T]':
+        return self
+
+    async def __aexit__(self,
+                        exc_type: type[BaseException] | None,
+                        exc_val: BaseException | None,
+                        exc_tb: TracebackType | None) -> None:
+        self.close()
+
+
+class AsyncSQliteRepository(AsyncRepositoryAdapter[T]):
+    """
+    Асинхронный репозиторий sqlite. Параметры base_name, class_type,
+    indexes, datetime_storage, profile - как у SQliteRepository.
+    Репозиторий, таблица и индексы создаются в конструкторе в потоке базы
+    данных, на том же соединении, что и последующие запросы; поэтому
+    работает и база ":memory:", у которой в каждом потоке своя копия.
+    """
+
+    def __init__(self,
+                 base_name: str | PathLike[str] | ConnectionPool,
+                 class_type: type,
+                 indexes: Iterable[str | tuple[str, ...] | Index] = (),
+                 datetime_storage: DatetimeStorage = "text",
+                 profile: PragmaProfile | None = None,
+                 thread: DatabaseThread | None = None) -> None:
+        owns_thread = thread is None
+        thread = thread or DatabaseThread()
+        indexes = list(indexes)
+        self._sqlite_repo = thread.call_blocking(lambda: SQliteRepository[T](
+            base_name, class_type, indexes, datetime_storage, profile
+        ))
+        super().__init__(self._sqlite_repo, thread)
+        self._owns_thread = owns_thread
+
+    def close(self) -> None:
+        """ Остановить поток базы данных и закрыть соединения репозитория """
+        super().close()
+        self._sqlite_repo.close()
+
+
+class AsyncMemoryRepository(AsyncAbstractRepository[T]):
+    """
+    Асинхронный репозиторий в оперативной памяти. Операции MemoryRepository
+    не блокируются, поэтому выполняются прямо в цикле событий.
+    Параметры indexes, sorted_indexes - как у MemoryRepository.
+    """
+
+    def __init__(self, indexes: Iterable[str] = (),
+                 sorted_indexes: Iterable[str] = ()) -> None:
+        self._repo = MemoryRepository[T](indexes, sorted_indexes)
+
+    @property
+    def repo(self) -> MemoryRepository[T]:
+        """ Обернутый репозиторий """
+        return self._repo
+
+    async def add(self, obj: T) -> int:
+        return self._repo.add(obj)
+
+    async def get(self, pk: int) -> T | None:
+        return self._repo.get(pk)
+
+    async def get_all(self, where: dict[str, Any] | None = None, *,
+                      order_by: OrderBy = None,
+                      limit: int | None = None,
+                      offset: int = 0) -> list[T]:
+        return self._repo.get_all(where, order_by=order_by, limit=limit, offset=offset)
+
+    async def iter_all(self, where: dict[str, Any] | None = None,
+                       batch_size: int = 1000, *,
+                       order_by: OrderBy = None,
+                       limit: int | None = None,
+                       offset: int = 0) -> AsyncIterator[T]:
+        """
+        Перебрать снимок выбранных записей, уступая цикл событий после
+        каждых batch_size записей. Изменения репозитория во время перебора
+        в снимок не попадают.
+        """
+        objs = self._repo.get_all(where, order_by=order_by, limit=limit, offset=offset)
+        for start in range(0, len(objs), batch_size):
+            for obj in objs[start:start + batch_size]:
+                yield obj
+            await asyncio.sleep(0)
+
+    async def update(self, obj: T) -> None:
+        self._repo.update(obj)
+
+    async def delete(self, pk: int) -> None:
+        self._repo.delete(pk)
@@ -0,0 +1,215 @@
+"""
+Модуль описывает кеширующую обертку над репозиторием
+
+Объекты, прочитанные или записанные через обертку, запоминаются в кеше
+ограниченного размера, поэтому повторные запросы, например обход
+родительских категорий, не обращаются к хранилищу.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable, Iterator
+
+from bookkeeper.repository.abstract_repository import AbstractRepository, T
+from bookkeeper.repository.query import OrderBy, parse_order_by
+
+_QueryKey = tuple[Hashable, ...]
+
+
+@dataclass
+class CacheStats:
+    """
+    Счетчики обращений к кешу
+    hits - сколько запросов обслужено из кеша
+    misses - сколько запросов пришлось передать репозиторию
+    evictions - сколько записей вытеснено из кеша из-за ограничения размера
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """ Доля запросов, обслуженных из кеша """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(val) for val in value)
+    if isinstance(value, Hashable):
+        return value
+    raise TypeError(f'unhashable condition value {value!r}')
+
+
+class CachedRepository(AbstractRepository[T]):
+    """
+    Кеширующая обертка над репозиторием repo.
+
+    maxsize - сколько объектов хранить в кеше по pk; при переполнении
+    вытесняются объекты, к которым дольше всего не обращались
+    max_queries - сколько результатов get_all хранить в кеше
+    (0 - не кешировать get_all)
+
+    Запись (add, update, delete и пакетные методы) передается репозиторию
+    и сразу отражается в кеше объектов, а кеш запросов get_all при любой
+    записи очищается. Метод update_where и откат транзакции очищают оба кеша.
+    Кеш считается верным, только если все изменения проходят через обертку.
+    Обертка возвращает объекты из кеша, а не копии, поэтому после изменения
+    полученного объекта нужно вызвать update. Обертка не потокобезопасна.
+    """
+
+    def __init__(self, repo: AbstractRepository[T],
+                 maxsize: int = 1024,
+                 max_queries: int = 0) -> None:
+        if maxsize < 0 or max_queries < 0:
+            raise ValueError('cache size must not be negative')
+        self._repo = repo
+        self._maxsize = maxsize
+        self._max_queries = max_queries
+        self._objects: OrderedDict[int, T] = OrderedDict()
+        self._queries: OrderedDict[_QueryKey, list[T]] = OrderedDict()
+        self.object_stats = CacheStats()
+        self.query_stats = CacheStats()
+
+    @property
+    def repo(self) -> AbstractRepository[T]:
+        """ Обернутый репозиторий """
+        return self._repo
+
+    def clear(self) -> None:
+        """ Очистить кеш, счетчики обращений сохраняются """
+        self._objects.clear()
+        self._queries.clear()
+
+    def _remember(self, obj: T) -> None:
+        if self._maxsize == 0:
+            return
+        self._objects[obj.pk] = obj
+        self._objects.move_to_end(obj.pk)
+        if len(self._objects) > self._maxsize:
+            self._objects.popitem(last=False)
+            self.object_stats.evictions += 1
+
+    def _forget(self, pk: int) -> None:
+        self._objects.pop(pk, None)
+
+    def _query_key(self, where: dict[str, Any] | None, order_by: OrderBy,
+                   limit: int | None, offset: int) -> _QueryKey | None:
+        if self._max_queries == 0:
+            return None
+        try:
+            condition = frozenset((key, _freeze(val))
+                                  for key, val in (where or {}).items())
+        except TypeError:
+            return None
+        return condition, tuple(parse_order_by(order_by)), limit, offset
+
+    def add(self, obj: T) -> int:
+        pk = self._repo.add(obj)
+        self._queries.clear()
+        self._remember(obj)
+        return pk
+
+    def get(self, pk: int) -> T | None:
+        obj = self._objects.get(pk)
+        if obj is not None:
+            self.object_stats.hits += 1
+            self._objects.move_to_end(pk)
+            return obj
+        self.object_stats.misses += 1
+        obj = self._repo.get(pk)
+        if obj is not None:
+            self._remember(obj)
+        return obj
+
+    def get_all(self, where: dict[str, Any] | None = None, *,
+                order_by: OrderBy = None,
+                limit: int | None = None,
+                offset: int = 0) -> list[T]:
+        key = self._query_key(where, order_by, limit, offset)
+        if key is not None and key in self._queries:
+            self.query_stats.hits += 1
+            self._queries.move_to_end(key)
+            return list(self._queries[key])
+        self.query_stats.misses += 1
+        objs = self._repo.get_all(where, order_by=order_by, limit=limit, offset=offset)
+        for obj in objs:
+            self._remember(obj)
+        if key is not None:
+            self._queries[key] = objs
+            if len(self._queries) > self._max_queries:
+                self._queries.popitem(last=False)
+                self.query_stats.evictions += 1
+            return list(objs)
+        return objs
+
+    def iter_all(self, where: dict[str, Any] | None = None,
+                 batch_size: int = 1000, *,
+                 order_by: OrderBy = None,
+                 limit: int | None = None,
+                 offset: int = 0) -> Iterator[T]:
+        """ Перебрать записи репозитория, не заполняя кеш """
+        return self._repo.iter_all(where, batch_size, order_by=order_by,
+                                   limit=limit, offset=offset)
+
+    def update(self, obj: T) -> None:
+        self._repo.update(obj)
+        self._queries.clear()
+        self._remember(obj)
+
+    def delete(self, pk: int) -> None:
+        self._repo.delete(pk)
+        self._queries.clear()
+        self._forget(pk)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        """ Транзакция репозитория; при откате кеш очищается """
+        with self._repo.transaction() as con:
+            try:
+                yield con
+            except BaseException:
+                self.clear()
+                raise
+
+    def add_many(self, objs: Iterable[T]) -> list[int]:
+        objs = list(objs)
+        pks = self._repo.add_many(objs)
+        self._queries.clear()
+        for obj in objs:
+            self._remember(obj)
+        return pks
+
+    def update_many(self, objs: Iterable[T]) -> None:
+        objs = list(objs)
+        self._repo.update_many(objs)
+        self._queries.clear()
+        for obj in objs:
+            self._remember(obj)
+
+    def delete_many(self, pks: Iterable[int]) -> None:
+        pks = list(pks)
+        self._repo.delete_many(pks)
+        self._queries.clear()
+        for pk in pks:
+            self._forget(pk)
+
+    def update_where(self, where: dict[str, Any] | None,
+                     values: dict[str, Any]) -> int:
+        self.clear()
+        return self._repo.update_where(where, values)
+
+    def count(self, where: dict[str, Any] | None = None) -> int:
+        return self._repo.count(where)
+
+    def sum(self, field: str, where: dict[str, Any] | None = None) -> float:
+        return self._repo.sum(field, where)
+
+    def sum_by(self, field: str, group_by: str,
+               where: dict[str, Any] | None = None) -> dict[Any, float]:
+        return self._repo.sum_by(field, group_by, where)
@@ -0,0 +1,77 @@
+"""
+Модуль описывает условия выборки по иерархии записей
+
+Записи иерархии (например, категории) ссылаются на родителя через поле
+parent_field. Значения Subtree и Ancestors подставляются в условие
+с оператором in:
+
+{'category__in': Subtree(category_repo, pk)} - расходы категории pk
+и всех ее подкатегорий
+{'pk__in': Ancestors(category_repo, pk)} - все родители категории pk
+
+Репозиторий sqlite, открытый на той же базе, что и репозиторий иерархии,
+компилирует такое условие в один запрос WITH RECURSIVE. Остальные
+репозитории перебирают значение как обычный набор pk, который вычисляется
+запросами к репозиторию иерархии по одному на уровень.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from bookkeeper.repository.abstract_repository import AbstractRepository
+
+
+@dataclass(frozen=True, eq=False)
+class HierarchyQuery(ABC):
+    """
+    Набор pk записей иерархии, связанных с записью pk.
+    repo - репозиторий записей иерархии
+    parent_field - поле, в котором хранится pk родителя
+    include_root - включать ли в набор саму запись pk
+    """
+    repo: AbstractRepository[Any]
+    pk: int
+    parent_field: str = 'parent'
+    include_root: bool = True
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[int]:
+        """ Перебрать pk записей набора """
+
+
+class Subtree(HierarchyQuery):
+    """ pk записи и всех ее потомков разного уровня """
+
+    def __iter__(self) -> Iterator[int]:
+        if self.repo.get(self.pk) is None:
+            return
+        if self.include_root:
+            yield self.pk
+        seen = {self.pk}
+        level = [self.pk]
+        while level:
+            children = self.repo.get_all({f'{self.parent_field}__in': level})
+            level = [obj.pk for obj in children if obj.pk not in seen]
+            seen.update(level)
+            yield from level
+
+
+class Ancestors(HierarchyQuery):
+    """ pk записи и всех ее предков, начиная с родителя и выше """
+
+    def __iter__(self) -> Iterator[int]:
+        obj = self.repo.get(self.pk)
+        if obj is None:
+            return
+        if self.include_root:
+            yield self.pk
+        seen = {self.pk}
+        parent = getattr(obj, self.parent_field)
+        while parent is not None and parent not in seen:
+            obj = self.repo.get(parent)
+            if obj is None:
+                return
+            yield parent
+            seen.add(parent)
+            parent = getattr(obj, self.parent_field)
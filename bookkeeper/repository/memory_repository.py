@@ -2,20 +2,109 @@
 Модуль описывает репозиторий, работающий в оперативной памяти
 """
 
+from bisect import bisect_left, bisect_right, insort
 from itertools import count
-from typing import Any
+from operator import itemgetter
+from typing import Any, Collection, Iterable, Iterator
 
 from bookkeeper.repository.abstract_repository import AbstractRepository, T
+from bookkeeper.repository.query import (
+    OrderBy, make_predicate, order_and_slice, parse_condition
+)
+
+_value = itemgetter(0)
 
 
 class MemoryRepository(AbstractRepository[T]):
     """
     Репозиторий, работающий в оперативной памяти. Хранит данные в словаре.
+
+    indexes - поля, по которым строится хеш-индекс для условий eq и in
+    sorted_indexes - поля, по которым строится упорядоченный индекс для условий
+    lt, le, gt, ge, between (значения None в него не попадают)
+    Условия по индексированным полям выбирают записи без полного перебора.
+    Индексы обновляются методами add, update и delete, поэтому после изменения
+    индексированного поля объекта нужно вызвать update.
+    Транзакции (метод transaction) откат изменений не поддерживают.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, indexes: Iterable[str] = (),
+                 sorted_indexes: Iterable[str] = ()) -> None:
         self._container: dict[int, T] = {}
         self._counter = count(1)
+        self._hash_indexes: dict[str, dict[Any, set[int]]] = {
+            field: {} for field in indexes
+        }
+        self._sorted_indexes: dict[str, list[tuple[Any, int]]] = {
+            field: [] for field in sorted_indexes
+        }
+        self._indexed_fields = tuple({**self._hash_indexes, **self._sorted_indexes})
+        self._indexed_values: dict[int, tuple[Any, ...]] = {}
+
+    def _index(self, pk: int, obj: T) -> None:
+        if not self._indexed_fields:
+            return
+        values = tuple(getattr(obj, field) for field in self._indexed_fields)
+        self._indexed_values[pk] = values
+        for field, value in zip(self._indexed_fields, values):
+            if field in self._hash_indexes:
+                self._hash_indexes[field].setdefault(value, set()).add(pk)
+            if field in self._sorted_indexes and value is not None:
+                insort(self._sorted_indexes[field], (value, pk))
+
+    def _unindex(self, pk: int) -> None:
+        values = self._indexed_values.pop(pk, None)
+        if values is None:
+            return
+        for field, value in zip(self._indexed_fields, values):
+            if field in self._hash_indexes:
+                pks = self._hash_indexes[field][value]
+                pks.discard(pk)
+                if not pks:
+                    del self._hash_indexes[field][value]
+            if field in self._sorted_indexes and value is not None:
+                entries = self._sorted_indexes[field]
+                del entries[bisect_left(entries, (value, pk))]
+
+    def _range(self, field: str, op: str, value: Any) -> Collection[int] | None:
+        entries = self._sorted_indexes[field]
+        lo, hi = 0, len(entries)
+        if op == 'between':
+            lo = bisect_left(entries, value[0], key=_value)
+            hi = bisect_right(entries, value[1], key=_value)
+        elif op == 'ge':
+            lo = bisect_left(entries, value, key=_value)
+        elif op == 'gt':
+            lo = bisect_right(entries, value, key=_value)
+        elif op == 'le':
+            hi = bisect_right(entries, value, key=_value)
+        elif op == 'lt':
+            hi = bisect_left(entries, value, key=_value)
+        else:
+            return None
+        return [pk for _, pk in entries[lo:hi]]
+
+    def _lookup(self, field: str, op: str, value: Any) -> Collection[int] | None:
+        """ pk записей, выбранных по индексу, или None, если индекс не подходит """
+        if field in self._hash_indexes:
+            index = self._hash_indexes[field]
+            if op == 'eq':
+                return index.get(value, set())
+            if op == 'in':
+                return set().union(*(index.get(val, ()) for val in value))
+        if field in self._sorted_indexes:
+            return self._range(field, op, value)
+        return None
+
+    def _candidates(self, where: dict[str, Any]) -> Collection[int] | None:
+        """ Наименьший набор pk, выбранный по одному из индексов условия """
+        best: Collection[int] | None = None
+        for key, value in where.items():
+            field, op = parse_condition(key)
+            pks = self._lookup(field, op, value)
+            if pks is not None and (best is None or len(pks) < len(best)):
+                best = pks
+        return best
 
     def add(self, obj: T) -> int:
         if getattr(obj, 'pk', None) != 0:
@@ -23,21 +112,68 @@ class MemoryRepository(AbstractRepository[T]):
         pk = next(self._counter)
         self._container[pk] = obj
         obj.pk = pk
+        self._index(pk, obj)
         return pk
 
     def get(self, pk: int) -> T | None:
         return self._container.get(pk)
 
-    def get_all(self, where: dict[str, Any] | None = None) -> list[T]:
-        if where is None:
-            return list(self._container.values())
-        return [obj for obj in self._container.values()
-                if all(getattr(obj, attr) == value for attr, value in where.items())]
+    def get_all(self, where: dict[str, Any] | None = None, *,
+                order_by: OrderBy = None,
+                limit: int | None = None,
+                offset: int = 0) -> list[T]:
+        return list(self.iter_all(where, order_by=order_by, limit=limit, offset=offset))
+
+    def iter_all(self, where: dict[str, Any] | None = None,
+                 batch_size: int = 1000, *,
+                 order_by: OrderBy = None,
+                 limit: int | None = None,
+                 offset: int = 0) -> Iterator[T]:
+        """
+        Перебрать записи без копирования словаря.
+        Изменять репозиторий во время перебора нельзя.
+        """
+        objs: Iterable[T] = self._container.values()
+        if where:
+            # значение in может быть одноразовым итератором или запросом
+            # Subtree/Ancestors, поэтому оно вычисляется один раз
+            where = {key: set(value) if parse_condition(key)[1] == 'in' else value
+                     for key, value in where.items()}
+            candidates = self._candidates(where)
+            if candidates is not None:
+                objs = (self._container[pk] for pk in sorted(candidates))
+            objs = filter(make_predicate(where), objs)
+        yield from order_and_slice(objs, order_by, limit, offset)
 
     def update(self, obj: T) -> None:
         if obj.pk == 0:
             raise ValueError('attempt to update object with unknown primary key')
+        self._unindex(obj.pk)
         self._container[obj.pk] = obj
+        self._index(obj.pk, obj)
 
     def delete(self, pk: int) -> None:
         self._container.pop(pk)
+        self._unindex(pk)
+
+    def add_many(self, objs: Iterable[T]) -> list[int]:
+        objs = list(objs)
+        for obj in objs:
+            if getattr(obj, 'pk', None) != 0:
+                raise ValueError(f'trying to add object {obj} with filled `pk` attribute')
+        return [self.add(obj) for obj in objs]
+
+    def update_many(self, objs: Iterable[T]) -> None:
+        objs = list(objs)
+        if any(obj.pk == 0 for obj in objs):
+            raise ValueError('attempt to update object with unknown primary key')
+        for obj in objs:
+            self.update(obj)
+
+    def delete_many(self, pks: Iterable[int]) -> None:
+        pks = list(pks)
+        missing = [pk for pk in pks if pk not in self._container]
+        if missing:
+            raise KeyError(missing[0])
+        for pk in pks:
+            self.delete(pk)
@@ -0,0 +1,172 @@
+"""
+Модуль описывает условия выборки записей из репозитория
+
+Условие задается словарем, ключи которого имеют вид 'название_поля' или
+'название_поля__оператор'. Без оператора поле сравнивается на равенство.
+Поддерживаемые операторы:
+eq - равно
+lt - меньше
+le - меньше или равно
+gt - больше
+ge - больше или равно
+between - между двумя значениями включительно, значение - пара (от, до)
+in - входит в набор значений, значение - итерируемый объект
+like - соответствует шаблону SQL LIKE ('%' - любая подстрока,
+       '_' - любой символ; как и в sqlite, регистр не учитывается
+       только для латинских букв)
+
+Пример: {'category__in': [1, 2], 'expense_date__between': (начало, конец)}
+
+Порядок записей задается параметром order_by - названием поля или списком
+названий, перед названием можно поставить '-' для сортировки по убыванию.
+Значения None при сортировке по возрастанию идут первыми, как в sqlite,
+а условия lt, le, gt, ge, between и like для них не выполняются, как для NULL.
+"""
+
+import operator
+import re
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+OrderBy = str | Sequence[str] | None
+
+OPERATORS: dict[str, str] = {
+    'eq': '=',
+    'lt': '<',
+    'le': '<=',
+    'gt': '>',
+    'ge': '>=',
+    'between': 'BETWEEN',
+    'in': 'IN',
+    'like': 'LIKE',
+}
+
+
+def _like_char(char: str) -> str:
+    if char == '%':
+        return '.*'
+    if char == '_':
+        return '.'
+    if char.isascii() and char.isalpha():
+        return f'[{char.lower()}{char.upper()}]'
+    return re.escape(char)
+
+
+def like_regex(pattern: str) -> re.Pattern[str]:
+    """
+    Регулярное выражение, равносильное шаблону SQL LIKE в sqlite:
+    регистр не учитывается только для латинских букв
+    """
+    return re.compile(''.join(map(_like_char, pattern)), re.DOTALL)
+
+
+def _between(value: Any, bounds: tuple[Any, Any]) -> bool:
+    low, high = bounds
+    return bool(low <= value <= high)
+
+
+def _not_null(cmp: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """ Сравнение, ложное для None, как сравнение с NULL в SQL """
+    return lambda value, arg: value is not None and cmp(value, arg)
+
+
+_COMPARATORS: dict[str, Callable[[Any, Any], bool]] = {
+    'eq': operator.eq,
+    'lt': _not_null(operator.lt),
+    'le': _not_null(operator.le),
+    'gt': _not_null(operator.gt),
+    'ge': _not_null(operator.ge),
+    'between': _not_null(_between),
+    'in': lambda value, values: value in values,
+    'like': _not_null(lambda value, regex: regex.fullmatch(value) is not None),
+}
+
+
+def parse_condition(key: str) -> tuple[str, str]:
+    """
+    Разобрать ключ условия на название поля и оператор.
+    Для неизвестного оператора выбрасывает ValueError.
+    """
+    field, sep, op = key.rpartition('__')
+    if not sep:
+        return key, 'eq'
+    if op not in OPERATORS:
+        raise ValueError(f'unknown operator {op!r} in condition {key!r}')
+    return field, op
+
+
+def _prepare(op: str, value: Any) -> Any:
+    if op == 'in':
+        return set(value)
+    if op == 'like':
+        return like_regex(value)
+    return value
+
+
+def make_predicate(where: dict[str, Any] | None) -> Callable[[Any], bool]:
+    """
+    Построить функцию, проверяющую, удовлетворяет ли объект условию where.
+    Пустое условие выполняется для любого объекта.
+    """
+    if not where:
+        return lambda obj: True
+    conditions = []
+    for key, value in where.items():
+        field, op = parse_condition(key)
+        conditions.append((field, _COMPARATORS[op], _prepare(op, value)))
+    return lambda obj: all(cmp(getattr(obj, field), value)
+                           for field, cmp, value in conditions)
+
+
+def sql_condition(field: str, op: str, value: Any,
+                  to_sql: Callable[[Any], Any]) -> tuple[str, list[Any]]:
+    """
+    Скомпилировать одно условие в параметризованный SQL.
+    field - название столбца (должно быть проверено вызывающим кодом)
+    to_sql - функция преобразования значения в тип sqlite
+
+    Returns
+    -------
+    Текст условия и список параметров
+    """
+    if op == 'between':
+        low, high = value
+        return f'{field} BETWEEN ? AND ?', [to_sql(low), to_sql(high)]
+    if op == 'in':
+        params = [to_sql(val) for val in value]
+        return f'{field} IN ({", ".join("?" * len(params))})', params
+    return f'{field} {OPERATORS[op]} ?', [to_sql(value)]
+
+
+def parse_order_by(order_by: OrderBy) -> list[tuple[str, bool]]:
+    """
+    Разобрать параметр order_by в список пар (название_поля, по_убыванию)
+    """
+    if order_by is None:
+        return []
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    return [(key[1:], True) if key.startswith('-') else (key, False)
+            for key in order_by]
+
+
+def _sort_key(field: str) -> Callable[[Any], tuple[bool, Any]]:
+    def key(obj: Any) -> tuple[bool, Any]:
+        value = getattr(obj, field)
+        return value is not None, value
+    return key
+
+
+def order_and_slice(objs: Iterable[Any], order_by: OrderBy = None,
+                    limit: int | None = None, offset: int = 0) -> Iterator[Any]:
+    """
+    Упорядочить объекты по order_by и выбрать limit из них, начиная с offset.
+    Без сортировки объекты не накапливаются в памяти.
+    """
+    ordering = parse_order_by(order_by)
+    if ordering:
+        objs = list(objs)
+        for field, descending in reversed(ordering):
+            objs.sort(key=_sort_key(field), reverse=descending)
+    stop = None if limit is None else offset + limit
+    return islice(objs, offset, stop)
@@ -0,0 +1,167 @@
+"""
+Модуль описывает пул соединений с базой данных sqlite
+
+Пул держит по одному долгоживущему соединению на поток, поэтому несколько
+репозиториев, открытых на одном файле, могут пользоваться общими соединениями
+вместо того, чтобы открывать новое соединение на каждый запрос.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from os import PathLike
+from types import TracebackType
+from typing import Iterator
+
+_PRAGMA_VALUES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+}
+
+
+@dataclass(frozen=True)
+class PragmaProfile:
+    """
+    Набор настроек sqlite, применяемых к каждому новому соединению.
+    Значение None означает, что настройка остается по умолчанию.
+
+    journal_mode - режим журнала ('WAL' позволяет читать во время записи)
+    synchronous - как часто вызывать fsync ('NORMAL' в режиме WAL безопасен
+                  для целостности базы, но последние транзакции могут
+                  потеряться при отключении питания)
+    cache_size - размер кеша страниц: положительное число - в страницах,
+                 отрицательное - в килобайтах
+    mmap_size - сколько байт файла базы отображать в память
+    temp_store - где хранить временные таблицы и индексы
+    """
+    journal_mode: str | None = None
+    synchronous: str | None = None
+    cache_size: int | None = None
+    mmap_size: int | None = None
+    temp_store: str | None = None
+
+    def __post_init__(self) -> None:
+        for name, allowed in _PRAGMA_VALUES.items():
+            value = getattr(self, name)
+            if value is not None and value.upper() not in allowed:
+                raise ValueError(f'Unknown value {value!r} for PRAGMA {name}')
+        for name in ('cache_size', 'mmap_size'):
+            if not isinstance(getattr(self, name), int | None):
+                raise ValueError(f'PRAGMA {name} must be an integer')
+
+    def statements(self) -> list[str]:
+        """ Команды PRAGMA для заданных настроек """
+        return [f'PRAGMA {name} = {value}'
+                for name, value in (('journal_mode', self.journal_mode),
+                                    ('synchronous', self.synchronous),
+                                    ('cache_size', self.cache_size),
+                                    ('mmap_size', self.mmap_size),
+                                    ('temp_store', self.temp_store))
+                if value is not None]
+
+
+DEFAULT_PROFILE = PragmaProfile()
+"""Настройки sqlite по умолчанию"""
+
+FAST_PROFILE = PragmaProfile(
+    journal_mode='WAL',
+    synchronous='NORMAL',
+    cache_size=-64_000,
+    mmap_size=256 * 1024 * 1024,
+    temp_store='MEMORY',
+)
+"""Журнал WAL, fsync только на контрольных точках, большой кеш и mmap"""
+
+
+class ConnectionPool:
+    """
+    Пул соединений с одной базой данных sqlite.
+    Соединение создается лениво при первом обращении из потока
+    и переиспользуется всеми последующими запросами этого потока.
+    profile - настройки PRAGMA, применяемые один раз к каждому соединению
+    """
+
+    def __init__(self, base_name: str | PathLike[str],
+                 profile: PragmaProfile = DEFAULT_PROFILE) -> None:
+        self._base_name = base_name
+        self._profile = profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._closed = False
+
+    @property
+    def base_name(self) -> str | PathLike[str]:
+        """ Путь к файлу базы данных """
+        return self._base_name
+
+    def connection(self) -> sqlite3.Connection:
+        """ Получить соединение текущего потока, при необходимости создав его """
+        con: sqlite3.Connection | None = getattr(self._local, 'connection', None)
+        if con is not None:
+            return con
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Cannot operate on a closed pool')
+            con = self._open()
+            self._connections.append(con)
+        self._local.connection = con
+        return con
+
+    def _open(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self._base_name, check_same_thread=False)
+        con.execute("PRAGMA foreign_keys = ON")
+        for statement in self._profile.statements():
+            con.execute(statement)
+        return con
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Транзакция на соединении текущего потока. Внешний блок начинает
+        транзакцию и фиксирует ее при выходе (или откатывает при исключении),
+        вложенные блоки, в том числе из других репозиториев на этом пуле,
+        становятся точками сохранения внутри нее, так что все изменения
+        фиксируются один раз.
+        """
+        con = self.connection()
+        depth: int = getattr(self._local, 'depth', 0)
+        savepoint = f'sp{depth}'
+        con.execute('BEGIN IMMEDIATE' if depth == 0 else f'SAVEPOINT {savepoint}')
+        self._local.depth = depth + 1
+        try:
+            yield con
+        except BaseException:
+            if depth == 0:
+                con.rollback()
+            else:
+                con.execute(f'ROLLBACK TO {savepoint}')
+                con.execute(f'RELEASE {savepoint}')
+            raise
+        else:
+            if depth == 0:
+                con.commit()
+            else:
+                con.execute(f'RELEASE {savepoint}')
+        finally:
+            self._local.depth = depth
+
+    def close(self) -> None:
+        """ Закрыть все соединения пула """
+        with self._lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
+        for con in connections:
+            con.close()
+        self._local = threading.local()
+
+    def __enter__(self) -> 'ConnectionPool':
+        return self
+
+    def __exit__(self,
+                 exc_type: type[BaseException] | None,
+                 exc_val: BaseException | None,
+                 exc_tb: TracebackType | None) -> None:
+        self.close()
@@ -1,35 +1,240 @@
+"""
+Модуль описывает репозиторий, работающий с базой данных sqlite
+"""
+
+import dataclasses
 import datetime
 import sqlite3
 import inspect
-from typing import Any, cast, Optional
+from dataclasses import dataclass
+from os import PathLike
+from types import TracebackType
+from typing import (
+    Any, Callable, ContextManager, Iterable, Iterator, Literal, Sequence, cast,
+    Optional
+)
 from bookkeeper.repository.abstract_repository import AbstractRepository, T
+from bookkeeper.repository.hierarchy import Ancestors, HierarchyQuery, Subtree
+from bookkeeper.repository.sqlite_connection import (
+    DEFAULT_PROFILE, ConnectionPool, PragmaProfile
+)
+from bookkeeper.repository.query import (
+    OrderBy, parse_condition, parse_order_by, sql_condition
+)
+
+
+DatetimeStorage = Literal["text", "seconds", "microseconds"]
+
+# объявленный тип столбца определяет, в каком виде хранятся даты в таблице
+_DATETIME_COLUMN_TYPES: dict[str, str] = {
+    "text": "TEXT",
+    "seconds": "INTEGER",
+    "microseconds": "INTEGER_MICROSECONDS",
+}
+_DATETIME_UNITS = {
+    "seconds": datetime.timedelta(seconds=1),
+    "microseconds": datetime.timedelta(microseconds=1),
+}
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _epoch_seconds_sql(column: str, storage: str) -> str:
+    if storage == "text":
+        return f"CAST(strftime('%s', {column}) AS INTEGER)"
+    if storage == "microseconds":
+        return f"{column} / 1000000"
+    return column
+
+
+def _convert_datetime_sql(column: str, old: str, new: str) -> str:
+    """ SQL-выражение, переводящее дату из одного вида хранения в другой """
+    seconds = _epoch_seconds_sql(column, old)
+    if new == "text":
+        return f"strftime('%Y-%m-%d %H:%M:%S', {seconds}, 'unixepoch')"
+    if new == "microseconds":
+        return f"{seconds} * 1000000"
+    return seconds
+
+
+@dataclass(frozen=True)
+class Index:
+    """
+    Описание вторичного индекса таблицы.
+    fields - поля, по которым строится индекс (несколько полей - составной индекс)
+    unique - запретить повторяющиеся значения
+    """
+    fields: tuple[str, ...]
+    unique: bool = False
+
+    @classmethod
+    def create(cls, index: 'str | tuple[str, ...] | Index') -> 'Index':
+        """ Получить Index из названия поля, кортежа полей или объекта Index """
+        if isinstance(index, Index):
+            return index
+        if isinstance(index, str):
+            return cls((index,))
+        return cls(tuple(index))
 
 
 class SQliteRepository(AbstractRepository[T]):
     """
-    Репозиторий, работающий в ??. ??
+    Репозиторий, работающий с базой данных sqlite. Каждый класс хранится
+    в отдельной таблице с именем класса.
+
+    base_name - путь к файлу базы данных или пул соединений ConnectionPool.
+    Пул, переданный извне, можно разделить между несколькими репозиториями,
+    открытыми на одном файле; закрывать его должен тот, кто его создал.
+    Если передан путь, репозиторий создает собственный пул с настройками
+    profile и закрывает его в методе close. Для общего пула настройки
+    задаются при его создании.
+
+    indexes - вторичные индексы, которые нужно построить по полям модели:
+    названия полей, кортежи полей для составных индексов или объекты Index.
+    Индексы создаются при открытии репозитория, если их еще нет.
+
+    datetime_storage - вид хранения полей datetime:
+    "text" - строка "YYYY-MM-DD HH:MM:SS" (по умолчанию),
+    "seconds" - целое число секунд от 1970-01-01,
+    "microseconds" - целое число микросекунд от 1970-01-01.
+    Даты без часового пояса хранятся как есть, без перевода в UTC.
+    Если таблица уже существует и хранит даты в другом виде, она
+    перестраивается с преобразованием всех значений.
+
+    Условия 'поле__in' со значениями Subtree и Ancestors из модуля
+    bookkeeper.repository.hierarchy по репозиторию sqlite на той же базе
+    выполняются одним запросом WITH RECURSIVE.
     """
 
-    def __init__(self, base_name: str, class_type: type) -> None:
-        self._base_name = base_name
+    def __init__(self,
+                 base_name: str | PathLike[str] | ConnectionPool,
+                 class_type: type,
+                 indexes: Iterable[str | tuple[str, ...] | Index] = (),
+                 datetime_storage: DatetimeStorage = "text",
+                 profile: PragmaProfile | None = None) -> None:
+        if datetime_storage not in _DATETIME_COLUMN_TYPES:
+            raise ValueError(f"Unknown datetime storage {datetime_storage!r}")
+        self._datetime_storage = datetime_storage
+        if isinstance(base_name, ConnectionPool):
+            if profile is not None:
+                raise ValueError("Profile of a shared pool is set when it is created")
+            self._pool = base_name
+            self._owns_pool = False
+        else:
+            self._pool = ConnectionPool(base_name, profile or DEFAULT_PROFILE)
+            self._owns_pool = True
         self._table_name = class_type.__name__
         self._fields = inspect.get_annotations(class_type, eval_str=True)
         self._fields.pop("pk")
         self._class_type = class_type
+        self._columns, self._from_row = self._compile_row_factory()
 
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute(
-                f"CREATE TABLE IF NOT EXISTS {self._table_name}"
-                + "(pk INTEGER PRIMARY KEY NOT NULL"
-                + " ".join(
-                    f", {name} {self._py_to_sql(tpy)}"
-                    for name, tpy in self._fields.items()
-                )
-                + ")"
+        with self._pool.transaction() as con:
+            self._migrate_datetimes(con)
+            con.execute(self._create_table_sql(self._table_name))
+            for index in map(Index.create, indexes):
+                self._create_index(con, index)
+
+    def _create_table_sql(self, table_name: str) -> str:
+        return (
+            f"CREATE TABLE IF NOT EXISTS {table_name}"
+            + "(pk INTEGER PRIMARY KEY NOT NULL"
+            + " ".join(
+                f", {name} {self._py_to_sql(tpy)}"
+                for name, tpy in self._fields.items()
             )
-        con.close()
+            + ")"
+        )
+
+    def _migrate_datetimes(self, con: sqlite3.Connection) -> None:
+        """
+        Перестроить существующую таблицу, если даты в ней хранятся не в том
+        виде, который задан при создании репозитория. Индексы старой таблицы
+        удаляются вместе с ней и создаются заново.
+        """
+        storages = {column_type: storage
+                    for storage, column_type in _DATETIME_COLUMN_TYPES.items()}
+        declared = {row[1]: row[2].upper() for row in
+                    con.execute(f"PRAGMA table_info({self._table_name})")}
+        columns = ["pk"]
+        changed = False
+        for name, tpy in self._fields.items():
+            old = storages.get(declared.get(name, ""))
+            if tpy is datetime.datetime and old not in (None, self._datetime_storage):
+                columns.append(
+                    _convert_datetime_sql(name, old, self._datetime_storage)
+                )
+                changed = True
+            else:
+                columns.append(name)
+        if not changed:
+            return
+        old_table = f"{self._table_name}__old"
+        con.execute(f"ALTER TABLE {self._table_name} RENAME TO {old_table}")
+        con.execute(self._create_table_sql(self._table_name))
+        con.execute(
+            f"INSERT INTO {self._table_name} (pk, {', '.join(self._fields)}) "
+            f"SELECT {', '.join(columns)} FROM {old_table}"
+        )
+        con.execute(f"DROP TABLE {old_table}")
+
+    def _create_index(self, con: sqlite3.Connection, index: Index) -> None:
+        columns = [self._check_field(field) for field in index.fields]
+        name = "_".join(
+            ["uix" if index.unique else "ix", self._table_name, *columns]
+        )
+        con.execute(
+            f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS {name} "
+            f"ON {self._table_name} ({', '.join(columns)})"
+        )
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        return self._pool.connection()
+
+    @property
+    def table_name(self) -> str:
+        """ Имя таблицы, в которой хранятся объекты """
+        return self._table_name
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        """ Названия полей модели (без pk) """
+        return tuple(self._fields)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """ Пул соединений, с которым работает репозиторий """
+        return self._pool
+
+    def date_sql(self, column: str) -> str:
+        """
+        SQL-выражение, дающее дату в виде 'YYYY-MM-DD' из значения столбца
+        datetime с учетом вида хранения дат
+        """
+        if self._datetime_storage == "text":
+            return f"date({column})"
+        return f"date({_epoch_seconds_sql(column, self._datetime_storage)}, 'unixepoch')"
+
+    def transaction(self) -> ContextManager[Any]:
+        """
+        Транзакция на общем пуле соединений: охватывает все репозитории,
+        открытые на этом пуле, в текущем потоке
+        """
+        return self._pool.transaction()
+
+    def close(self) -> None:
+        """ Закрыть соединения, если пул принадлежит репозиторию """
+        if self._owns_pool:
+            self._pool.close()
+
+    def __enter__(self) -> 'SQliteRepository[T]':
+        return self
+
+    def __exit__(self,
+                 exc_type: type[BaseException] | None,
+                 exc_val: BaseException | None,
+                 exc_tb: TracebackType | None) -> None:
+        self.close()
 
     def _py_to_sql(self, tpy: type) -> str:
         if tpy == int:
@@ -41,20 +246,68 @@ class SQliteRepository(AbstractRepository[T]):
         if tpy == float:
             return "REAL"
         if tpy == datetime.datetime:
-            return "TEXT"
+            return _DATETIME_COLUMN_TYPES[self._datetime_storage]
         raise ValueError(f"Type {tpy} is not supported")
 
+    def _decoder(self, tpy: type | None) -> Callable[[Any], Any] | None:
+        """ Функция преобразования значения из sqlite, None - без преобразования """
+        if tpy is not datetime.datetime:
+            return None
+        if self._datetime_storage == "text":
+            return datetime.datetime.fromisoformat
+        unit = _DATETIME_UNITS[self._datetime_storage]
+        return lambda val: None if val is None else _EPOCH + val * unit
+
     def _val_from_sql(self, tpy: type, val: Any) -> Any:
-        if tpy is datetime.datetime:
-            return datetime.datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
-        return val
+        decode = self._decoder(tpy)
+        return val if decode is None else decode(val)
 
     def _val_to_sql(self, val: Any) -> Any:
         if isinstance(val, datetime.datetime):
-            return val.strftime("%Y-%m-%d %H:%M:%S")
+            if self._datetime_storage == "text":
+                return val.strftime("%Y-%m-%d %H:%M:%S")
+            return (val - _EPOCH) // _DATETIME_UNITS[self._datetime_storage]
 
         return val
 
+    def _compile_row_factory(self) -> tuple[str, Callable[[tuple[Any, ...]], T]]:
+        """
+        Подготовить список столбцов для SELECT и функцию, создающую объект
+        из строки результата. Если модель - dataclass, столбцы выбираются
+        в порядке аргументов конструктора и объект создается одним вызовом,
+        иначе создается пустой объект и поля заполняются через setattr.
+        """
+        cls = self._class_type
+        names = ["pk", *self._fields]
+        init_names = (
+            [f.name for f in dataclasses.fields(cls) if f.init]
+            if dataclasses.is_dataclass(cls) else []
+        )
+        use_init = sorted(init_names) == sorted(names)
+        if use_init:
+            names = init_names
+        decoders = [
+            (i, decode) for i, name in enumerate(names)
+            if (decode := self._decoder(self._fields.get(name))) is not None
+        ]
+
+        def from_row(row: tuple[Any, ...]) -> T:
+            values = list(row)
+            for i, decode in decoders:
+                values[i] = decode(values[i])
+            if use_init:
+                return cast(T, cls(*values))
+            obj = cls()
+            for name, value in zip(names, values):
+                setattr(obj, name, value)
+            return cast(T, obj)
+
+        def from_row_plain(row: tuple[Any, ...]) -> T:
+            return cast(T, cls(*row))
+
+        factory = from_row_plain if use_init and not decoders else from_row
+        return ", ".join(names), factory
+
     def add(self, obj: T) -> int:
         if getattr(obj, "pk", None) != 0:
             raise ValueError("Trying to add object with filled 'pk' attribute")
@@ -64,67 +317,184 @@ class SQliteRepository(AbstractRepository[T]):
 
         values = [self._val_to_sql(getattr(obj, key)) for key in self._fields]
 
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute(
+        with self._pool.transaction() as con:
+            cur = con.execute(
                 f"INSERT INTO {self._table_name} ({names}) VALUES ({placeholders});",
                 values,
             )
-
             assert cur.lastrowid is not None
             obj.pk = cur.lastrowid
 
-        con.close()
-
         return obj.pk
 
+    def add_many(self, objs: Iterable[T]) -> list[int]:
+        """
+        Добавить несколько объектов одной транзакцией. Первичные ключи
+        выделяются подряд после максимального существующего, поэтому
+        вставка выполняется одним executemany.
+        """
+        objs = list(objs)
+        if any(getattr(obj, "pk", None) != 0 for obj in objs):
+            raise ValueError("Trying to add object with filled 'pk' attribute")
+
+        names = ", ".join(("pk", *self._fields))
+        placeholders = ", ".join("?" * (len(self._fields) + 1))
+
+        with self._pool.transaction() as con:
+            start = con.execute(
+                f"SELECT COALESCE(MAX(pk), 0) + 1 FROM {self._table_name}"
+            ).fetchone()[0]
+            pks = list(range(start, start + len(objs)))
+            con.executemany(
+                f"INSERT INTO {self._table_name} ({names}) VALUES ({placeholders});",
+                (
+                    [pk, *(self._val_to_sql(getattr(obj, key)) for key in self._fields)]
+                    for pk, obj in zip(pks, objs)
+                ),
+            )
+
+        for pk, obj in zip(pks, objs):
+            obj.pk = pk
+        return pks
+
     def get(self, pk: int) -> T | None:
         """Получить объект по id"""
-
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute(f"SELECT * FROM {self._table_name} WHERE pk = {pk}")
-            res = cur.fetchone()
-        con.close()
+        res = self._connection.execute(
+            f"SELECT {self._columns} FROM {self._table_name} WHERE pk = ?", (pk,)
+        ).fetchone()
         if res is None:
             return None
-        obj = self._class_type()
-        setattr(obj, "pk", res[0])
-        for i, (name, tpy) in enumerate(self._fields.items(), 1):
-            setattr(obj, name, self._val_from_sql(tpy, res[i]))
-        assert isinstance(obj, self._class_type)
-        return cast(T, obj)
+        return self._from_row(res)
 
-    def get_all(self, where: dict[str, Any] | None = None) -> list[T]:
+    def _check_field(self, field: str) -> str:
+        if field != "pk" and field not in self._fields:
+            raise ValueError(f"Unknown field {field!r}")
+        return field
+
+    def _where_sql(self, where: dict[str, Any] | None) -> tuple[str, list[Any]]:
+        """ Скомпилировать условие в текст WHERE и список параметров """
+        if not where:
+            return "", []
+        conditions = []
+        params: list[Any] = []
+        for key, value in where.items():
+            field, op = parse_condition(key)
+            if op == "in" and isinstance(value, HierarchyQuery):
+                hierarchy = self._hierarchy_sql(value)
+                if hierarchy is not None:
+                    sql, values = hierarchy
+                    conditions.append(f"{self._check_field(field)} IN ({sql})")
+                    params.extend(values)
+                    continue
+            sql, values = sql_condition(
+                self._check_field(field), op, value, self._val_to_sql
+            )
+            conditions.append(sql)
+            params.extend(values)
+        return " WHERE " + " AND ".join(conditions), params
+
+    def _same_database(self, other: "SQliteRepository[Any]") -> bool:
+        if other.pool is self._pool:
+            return True
+        base_name = str(self._pool.base_name)
+        return base_name != ":memory:" and base_name == str(other.pool.base_name)
+
+    def _hierarchy_sql(self, query: HierarchyQuery) -> tuple[str, list[Any]] | None:
+        """
+        Скомпилировать условие по иерархии в подзапрос WITH RECURSIVE,
+        или вернуть None, если иерархия хранится не в этой базе
+        """
+        repo = query.repo
+        if not isinstance(repo, SQliteRepository) or not self._same_database(repo):
+            return None
+        table, parent = repo.table_name, repo._check_field(query.parent_field)
+        if isinstance(query, Subtree):
+            step = f"SELECT t.pk FROM {table} t JOIN h ON t.{parent} = h.pk"
+        elif isinstance(query, Ancestors):
+            step = (f"SELECT t.pk FROM {table} t JOIN {table} c "
+                    f"ON t.pk = c.{parent} JOIN h ON c.pk = h.pk")
+        else:
+            return None
+        sql = (f"WITH RECURSIVE h(pk) AS (SELECT pk FROM {table} WHERE pk = ? "
+               f"UNION {step}) SELECT pk FROM h")
+        params = [query.pk]
+        if not query.include_root:
+            sql += " WHERE pk != ?"
+            params.append(query.pk)
+        return sql, params
+
+    def _select(self, where: dict[str, Any] | None,
+                order_by: OrderBy = None,
+                limit: int | None = None,
+                offset: int = 0) -> sqlite3.Cursor:
+        where_sql, params = self._where_sql(where)
+        text = f"SELECT {self._columns} FROM {self._table_name}{where_sql}"
+        ordering = parse_order_by(order_by)
+        if ordering:
+            text += " ORDER BY " + ", ".join(
+                self._check_field(field) + (" DESC" if descending else "")
+                for field, descending in ordering
+            )
+        if limit is not None or offset:
+            text += " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        return self._connection.execute(text, params)
+
+    def get_all(self, where: dict[str, Any] | None = None, *,
+                order_by: OrderBy = None,
+                limit: int | None = None,
+                offset: int = 0) -> list[T]:
         """
         Получить все записи по некоторому условию
-        where - условие в виде словаря {'название_поля': значение}
+        where - условие в виде словаря {'название_поля': значение},
+        см. модуль bookkeeper.repository.query
         если условие не задано (по умолчанию), вернуть все записи
+        order_by, limit, offset - сортировка и постраничная выборка
         """
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            if where is None:
-                cur.execute(f"SELECT * FROM {self._table_name}")
-            else:
-                where_keys = list(where.keys())
-                where_values = list(where.values())
-                text = f"SELECT * FROM {self._table_name} WHERE {where_keys[0]} = ?"
-                for i in range(1, len(where)):
-                    text += f" AND {where_keys[i]} = ?"
-                cur.execute(text, where_values)
-            res = cur.fetchall()
-        con.close()
-        out = []
-        for element in res:
-            obj = self._class_type()
-            setattr(obj, "pk", element[0])
-            for j, (name, tpy) in enumerate(self._fields.items(), 1):
-                setattr(obj, name, self._val_from_sql(tpy, element[j]))
-            out.append(obj)
-        return out
+        cur = self._select(where, order_by, limit, offset)
+        return [self._from_row(row) for row in cur.fetchall()]
+
+    def iter_all(self, where: dict[str, Any] | None = None,
+                 batch_size: int = 1000, *,
+                 order_by: OrderBy = None,
+                 limit: int | None = None,
+                 offset: int = 0) -> Iterator[T]:
+        """
+        Лениво перебрать записи по условию, читая их из курсора
+        порциями по batch_size строк
+        """
+        cur = self._select(where, order_by, limit, offset)
+        try:
+            while rows := cur.fetchmany(batch_size):
+                for row in rows:
+                    yield self._from_row(row)
+        finally:
+            cur.close()
+
+    def iter_columns(self, fields: Sequence[str],
+                     where: dict[str, Any] | None = None,
+                     batch_size: int = 1000) -> Iterator[tuple[Any, ...]]:
+        """
+        Перебрать значения полей fields записей, удовлетворяющих условию
+        where, в виде кортежей, не создавая объектов модели. Поля datetime
+        выдаются как целое число секунд от 1970-01-01, остальные - в том
+        виде, в котором хранятся в базе.
+        """
+        columns = []
+        for field in fields:
+            column = self._check_field(field)
+            if self._fields.get(field) is datetime.datetime:
+                column = _epoch_seconds_sql(column, self._datetime_storage)
+            columns.append(column)
+        where_sql, params = self._where_sql(where)
+        cur = self._connection.execute(
+            f"SELECT {', '.join(columns)} FROM {self._table_name}{where_sql}", params
+        )
+        try:
+            while rows := cur.fetchmany(batch_size):
+                yield from rows
+        finally:
+            cur.close()
 
     def update(self, obj: T) -> None:
         """Обновить данные об объекте. Объект должен содержать поле pk."""
@@ -136,25 +506,94 @@ class SQliteRepository(AbstractRepository[T]):
 
         values = [self._val_to_sql(getattr(obj, key)) for key in self._fields]
 
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute(
+        with self._pool.transaction() as con:
+            cur = con.execute(
                 f"UPDATE {self._table_name} "
-                + f"SET ({names}) = ({placeholders}) WHERE pk={obj.pk}",
-                values,
+                + f"SET ({names}) = ({placeholders}) WHERE pk = ?",
+                [*values, obj.pk],
             )
-            if con.total_changes == 0:
+            if cur.rowcount == 0:
                 raise ValueError(f"Object with pk = {obj.pk} does not exist")
 
-        con.close()
+    def update_many(self, objs: Iterable[T]) -> None:
+        """
+        Обновить несколько объектов одной транзакцией. Если хотя бы одного
+        объекта нет в базе, изменения откатываются.
+        """
+        objs = list(objs)
+        names = ", ".join(self._fields)
+        placeholders = ", ".join("?" * len(self._fields))
+
+        with self._pool.transaction() as con:
+            cur = con.executemany(
+                f"UPDATE {self._table_name} "
+                + f"SET ({names}) = ({placeholders}) WHERE pk = ?",
+                (
+                    [*(self._val_to_sql(getattr(obj, key)) for key in self._fields),
+                     obj.pk]
+                    for obj in objs
+                ),
+            )
+            if cur.rowcount != len(objs):
+                raise ValueError("Some of the objects do not exist")
+
+    def update_where(self, where: dict[str, Any] | None,
+                     values: dict[str, Any]) -> int:
+        """ Обновить записи по условию одним запросом UPDATE ... WHERE """
+        if "pk" in values:
+            raise ValueError("Primary key cannot be changed")
+        assignments = ", ".join(f"{self._check_field(field)} = ?" for field in values)
+        where_sql, params = self._where_sql(where)
+        with self._pool.transaction() as con:
+            cur = con.execute(
+                f"UPDATE {self._table_name} SET {assignments}{where_sql}",
+                [*(self._val_to_sql(val) for val in values.values()), *params],
+            )
+        return cur.rowcount
 
     def delete(self, pk: int) -> None:
         """Удалить запись"""
-        with sqlite3.connect(self._base_name) as con:
-            cur = con.cursor()
-            cur.execute("PRAGMA foreign_keys = ON")
-            cur.execute(f"DELETE FROM {self._table_name} WHERE pk = {pk}")
-            if con.total_changes == 0:
+        with self._pool.transaction() as con:
+            cur = con.execute(f"DELETE FROM {self._table_name} WHERE pk = ?", (pk,))
+            if cur.rowcount == 0:
                 raise KeyError(f"Object with pk = {pk} does not exist")
-        con.close()
+
+    def delete_many(self, pks: Iterable[int]) -> None:
+        """
+        Удалить несколько записей одной транзакцией. Если хотя бы одной
+        записи нет в базе, изменения откатываются.
+        """
+        pks = list(pks)
+        with self._pool.transaction() as con:
+            cur = con.executemany(
+                f"DELETE FROM {self._table_name} WHERE pk = ?", ((pk,) for pk in pks)
+            )
+            if cur.rowcount != len(pks):
+                raise KeyError("Some of the objects do not exist")
+
+    def count(self, where: dict[str, Any] | None = None) -> int:
+        where_sql, params = self._where_sql(where)
+        res = self._connection.execute(
+            f"SELECT COUNT(*) FROM {self._table_name}{where_sql}", params
+        ).fetchone()
+        return cast(int, res[0])
+
+    def sum(self, field: str, where: dict[str, Any] | None = None) -> float:
+        where_sql, params = self._where_sql(where)
+        res = self._connection.execute(
+            f"SELECT COALESCE(SUM({self._check_field(field)}), 0) "
+            f"FROM {self._table_name}{where_sql}",
+            params,
+        ).fetchone()
+        return cast(float, res[0])
+
+    def sum_by(self, field: str, group_by: str,
+               where: dict[str, Any] | None = None) -> dict[Any, float]:
+        where_sql, params = self._where_sql(where)
+        cur = self._connection.execute(
+            f"SELECT {self._check_field(group_by)}, SUM({self._check_field(field)}) "
+            f"FROM {self._table_name}{where_sql} GROUP BY {group_by}",
+            params,
+        )
+        tpy = self._fields.get(group_by, int)
+        return {self._val_from_sql(tpy, key): total for key, total in cur}
@@ -0,0 +1,159 @@
+"""
+Модуль описывает таблицу дневных итогов для репозитория sqlite
+
+Таблица хранит для каждого дня и группы (например, категории расходов)
+сумму и количество записей и поддерживается триггерами sqlite, поэтому
+итоги за период читаются из нескольких десятков строк независимо от того,
+сколько записей в основной таблице.
+"""
+
+import datetime
+from typing import Any, cast
+
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+
+class DailyRollup:
+    """
+    Дневные итоги по таблице репозитория repo.
+    date_field - поле datetime, по дню которого группируются записи
+    group_field - поле, по которому записи группируются внутри дня
+                  (значение NULL не допускается)
+    value_field - суммируемое поле
+
+    Таблица итогов и триггеры создаются при первом создании объекта,
+    существующие записи при этом учитываются.
+    """
+
+    def __init__(self, repo: SQliteRepository[Any],
+                 date_field: str = "expense_date",
+                 group_field: str = "category",
+                 value_field: str = "amount") -> None:
+        for field in (date_field, group_field, value_field):
+            if field not in repo.fields:
+                raise ValueError(f"Unknown field {field!r}")
+        self._pool = repo.pool
+        self._source = repo.table_name
+        self._table_name = f"{repo.table_name}_{group_field}_daily"
+        self._date_field = date_field
+        self._group_field = group_field
+        self._value_field = value_field
+        self._day = repo.date_sql
+
+        with self._pool.transaction() as con:
+            con.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table_name}"
+                "(day TEXT NOT NULL, grp NOT NULL, total NOT NULL, cnt INTEGER NOT NULL,"
+                " PRIMARY KEY (day, grp))"
+            )
+            exists = con.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                (f"{self._table_name}_insert",),
+            ).fetchone()[0]
+            if not exists:
+                self._create_triggers()
+                self.rebuild()
+
+    @property
+    def table_name(self) -> str:
+        """ Имя таблицы итогов """
+        return self._table_name
+
+    def _add_sql(self, row: str) -> str:
+        return (
+            f"INSERT INTO {self._table_name} (day, grp, total, cnt) VALUES ("
+            f"{self._day(f'{row}.{self._date_field}')}, {row}.{self._group_field}, "
+            f"{row}.{self._value_field}, 1) "
+            "ON CONFLICT (day, grp) DO UPDATE "
+            "SET total = total + excluded.total, cnt = cnt + 1;"
+        )
+
+    def _remove_sql(self, row: str) -> str:
+        key = (f"day = {self._day(f'{row}.{self._date_field}')} "
+               f"AND grp = {row}.{self._group_field}")
+        return (
+            f"UPDATE {self._table_name} SET total = total - {row}.{self._value_field}, "
+            f"cnt = cnt - 1 WHERE {key}; "
+            f"DELETE FROM {self._table_name} WHERE {key} AND cnt = 0;"
+        )
+
+    def _create_triggers(self) -> None:
+        con = self._pool.connection()
+        fields = ", ".join((self._date_field, self._group_field, self._value_field))
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {self._table_name}_insert "
+            f"AFTER INSERT ON {self._source} BEGIN {self._add_sql('NEW')} END"
+        )
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {self._table_name}_delete "
+            f"AFTER DELETE ON {self._source} BEGIN {self._remove_sql('OLD')} END"
+        )
+        con.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {self._table_name}_update "
+            f"AFTER UPDATE OF {fields} ON {self._source} "
+            f"BEGIN {self._remove_sql('OLD')} {self._add_sql('NEW')} END"
+        )
+
+    def rebuild(self) -> None:
+        """ Пересчитать таблицу итогов по всем записям основной таблицы """
+        with self._pool.transaction() as con:
+            con.execute(f"DELETE FROM {self._table_name}")
+            con.execute(
+                f"INSERT INTO {self._table_name} (day, grp, total, cnt) "
+                f"SELECT {self._day(self._date_field)}, {self._group_field}, "
+                f"SUM({self._value_field}), COUNT(*) FROM {self._source} "
+                f"GROUP BY 1, 2"
+            )
+
+    @staticmethod
+    def _range_sql(since: datetime.date | None,
+                   until: datetime.date | None) -> tuple[str, list[Any]]:
+        conditions = []
+        params: list[Any] = []
+        if since is not None:
+            conditions.append("day >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("day <= ?")
+            params.append(until.isoformat())
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def daily(self, since: datetime.date | None = None,
+              until: datetime.date | None = None
+              ) -> list[tuple[datetime.date, Any, float, int]]:
+        """
+        Итоги за дни с since по until включительно (None - без ограничения)
+        в виде списка (день, группа, сумма, количество), упорядоченного по дням
+        """
+        where_sql, params = self._range_sql(since, until)
+        cur = self._pool.connection().execute(
+            f"SELECT day, grp, total, cnt FROM {self._table_name}{where_sql} "
+            "ORDER BY day, grp",
+            params,
+        )
+        return [(datetime.date.fromisoformat(day), grp, total, cnt)
+                for day, grp, total, cnt in cur]
+
+    def total(self, since: datetime.date | None = None,
+              until: datetime.date | None = None,
+              group: Any = None) -> float:
+        """ Сумма за дни с since по until включительно, для группы group или всех """
+        where_sql, params = self._range_sql(since, until)
+        if group is not None:
+            where_sql += " AND grp = ?" if where_sql else " WHERE grp = ?"
+            params.append(group)
+        res = self._pool.connection().execute(
+            f"SELECT COALESCE(SUM(total), 0) FROM {self._table_name}{where_sql}",
+            params,
+        ).fetchone()
+        return cast(float, res[0])
+
+    def total_by_group(self, since: datetime.date | None = None,
+                       until: datetime.date | None = None) -> dict[Any, float]:
+        """ Суммы за дни с since по until включительно по группам """
+        where_sql, params = self._range_sql(since, until)
+        cur = self._pool.connection().execute(
+            f"SELECT grp, SUM(total) FROM {self._table_name}{where_sql} GROUP BY grp",
+            params,
+        )
+        return dict(cur.fetchall())
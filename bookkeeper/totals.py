@@ -0,0 +1,103 @@
+"""
+Суммы расходов за день, неделю и месяц с пересчетом по изменениям
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.abstract_repository import AbstractRepository
+
+
+def _start_of(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+class RunningTotals:
+    """
+    Суммы расходов за периоды, заканчивающиеся сегодняшним днем.
+    Полный пересчет по репозиторию выполняется только при создании и если
+    суммы перестали сходиться с репозиторием, а при добавлении, изменении
+    и удалении расхода суммы меняются на величину изменения.
+    При смене календарного дня из сумм вычитаются только расходы
+    за дни, вышедшие из периодов.
+
+    periods - для каждой суммы количество дней до сегодняшнего, начиная
+    с которого учитываются расходы (0 - только сегодня)
+    today - функция, возвращающая текущую дату
+    """
+
+    def __init__(self,
+                 repo: AbstractRepository[Expense],
+                 periods: tuple[int, ...] = (0, 7, 31),
+                 today: Callable[[], date] = date.today) -> None:
+        self._repo = repo
+        self._periods = periods
+        self._today_func = today
+        self._today = today()
+        self._summs: list[float] = [0] * len(periods)
+        self._count = 0
+        self.recompute()
+
+    def _starts(self, today: date) -> list[date]:
+        return [today - timedelta(days) for days in self._periods]
+
+    def recompute(self) -> None:
+        """ Пересчитать суммы по всем расходам в репозитории """
+        self._today = self._today_func()
+        self._summs = [
+            self._repo.sum("amount", {"expense_date__ge": _start_of(start)})
+            for start in self._starts(self._today)
+        ]
+        self._count = self._repo.count()
+
+    def _roll_over(self) -> None:
+        today = self._today_func()
+        if today == self._today:
+            return
+        if today < self._today or self._repo.count() != self._count:
+            self.recompute()
+            return
+        for i, (old, new) in enumerate(zip(self._starts(self._today),
+                                           self._starts(today))):
+            self._summs[i] -= self._repo.sum("amount", {
+                "expense_date__ge": _start_of(old),
+                "expense_date__lt": _start_of(new),
+            })
+        self._today = today
+
+    def _apply(self, exp: Expense, sign: int) -> None:
+        exp_date = exp.expense_date.date()
+        for i, start in enumerate(self._starts(self._today)):
+            if exp_date >= start:
+                self._summs[i] += sign * exp.amount
+
+    def added(self, exp: Expense) -> None:
+        """ Учесть добавленный расход """
+        self._roll_over()
+        self._apply(exp, 1)
+        self._count += 1
+
+    def removed(self, exp: Expense) -> None:
+        """ Учесть удаленный расход """
+        self._roll_over()
+        self._apply(exp, -1)
+        self._count -= 1
+
+    def changed(self, old: Expense | None, new: Expense) -> None:
+        """
+        Учесть изменение расхода. Если прежнее состояние расхода неизвестно,
+        суммы пересчитываются полностью.
+        """
+        if old is None:
+            self.recompute()
+            return
+        self._roll_over()
+        self._apply(old, -1)
+        self._apply(new, 1)
+
+    @property
+    def summs(self) -> list[float]:
+        """ Суммы расходов за периоды на сегодняшний день """
+        self._roll_over()
+        return list(self._summs)
@@ -2,18 +2,84 @@
 Вспомогательные функции
 """
 
-from typing import Iterable, Iterator
+from itertools import chain
+from os import PathLike
+from typing import IO, Iterable, Iterator
 
 
-def _get_indent(line: str) -> int:
-    return len(line) - len(line.lstrip())
+def _read_chunks(file: IO[str], chunk_size: int) -> Iterator[list[str]]:
+    """ Списки строк из блоков файла по chunk_size символов """
+    tail = ''
+    while chunk := file.read(chunk_size):
+        lines = (tail + chunk).split('\n')
+        tail = lines.pop()
+        yield lines
+    yield [tail]
 
 
-def _lines_with_indent(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+def iter_tree(lines: Iterable[str]) -> Iterator[tuple[str, str | None]]:
+    """
+    Прочитать структуру дерева из текста на основе отступов, выдавая пары
+    "потомок-родитель" по мере чтения строк. Формат текста и порядок пар -
+    как в read_tree. В памяти хранится только стек родителей текущей строки.
+    IndentationError выбрасывается при чтении ошибочной строки, после того
+    как все предыдущие пары уже выданы.
+
+    Parameters
+    ----------
+    lines - Итерируемый объект, содержащий строки текста (файл или список строк)
+
+    Yields
+    -------
+    Пары "потомок-родитель"
+    """
+    parents: list[tuple[str | None, int]] = []
+    last_indent = -1
+    last_name = None
+    i = 0
     for line in lines:
-        if not line or line.isspace():
+        name = line.strip()
+        if not name:
             continue
-        yield _get_indent(line), line.strip()
+        indent = len(line) - len(line.lstrip())
+        if indent > last_indent:
+            parents.append((last_name, last_indent))
+        elif indent < last_indent:
+            while indent < last_indent:
+                _, last_indent = parents.pop()
+            if indent != last_indent:
+                raise IndentationError(
+                    f'unindent does not match any outer indentation '
+                    f'level in line {i}:\n'
+                )
+        yield name, parents[-1][0]
+        last_name = name
+        last_indent = indent
+        i += 1
+
+
+def iter_tree_file(file: str | PathLike[str] | IO[str],
+                   chunk_size: int = 1 << 20,
+                   encoding: str = 'utf-8') -> Iterator[tuple[str, str | None]]:
+    """
+    То же, что iter_tree, для файла, который читается блоками
+    по chunk_size символов, а не построчно.
+
+    Parameters
+    ----------
+    file - путь к файлу или открытый текстовый файл
+    chunk_size - размер блока чтения в символах
+    encoding - кодировка файла, если передан путь
+
+    Yields
+    -------
+    Пары "потомок-родитель"
+    """
+    if isinstance(file, (str, PathLike)):
+        with open(file, encoding=encoding) as opened:
+            yield from iter_tree(chain.from_iterable(_read_chunks(opened, chunk_size)))
+    else:
+        yield from iter_tree(chain.from_iterable(_read_chunks(file, chunk_size)))
 
 
 def read_tree(lines: Iterable[str]) -> list[tuple[str, str | None]]:
@@ -32,7 +98,8 @@ def read_tree(lines: Iterable[str]) -> list[tuple[str, str | None]]:
     [('parent', None), ('child1', 'parent'),
      ('child2', 'child1'), ('child3', 'parent')]
 
-    Пустые строки игнорируются.
+    Пустые строки игнорируются. Для больших файлов, которые не нужно
+    держать в памяти целиком, есть генераторы iter_tree и iter_tree_file.
 
     Parameters
     ----------
@@ -42,22 +109,4 @@ def read_tree(lines: Iterable[str]) -> list[tuple[str, str | None]]:
     -------
     Список пар "потомок-родитель"
     """
-    parents: list[tuple[str | None, int]] = []
-    last_indent = -1
-    last_name = None
-    result: list[tuple[str, str | None]] = []
-    for i, (indent, name) in enumerate(_lines_with_indent(lines)):
-        if indent > last_indent:
-            parents.append((last_name, last_indent))
-        elif indent < last_indent:
-            while indent < last_indent:
-                _, last_indent = parents.pop()
-            if indent != last_indent:
-                raise IndentationError(
-                    f'unindent does not match any outer indentation '
-                    f'level in line {i}:\n'
-                )
-        result.append((name, parents[-1][0]))
-        last_name = name
-        last_indent = indent
-    return result
+    return list(iter_tree(lines))
@@ -6,10 +6,11 @@
 import sys
 import datetime
 from PySide6 import QtWidgets, QtCore
-from typing import Callable
+from typing import Any, Callable
 from bookkeeper.models.category import Category
 from bookkeeper.models.expense import Expense
 from bookkeeper.models.budget import Budget
+from bookkeeper.view.expense_model import ExpensePageLoader, ExpenseTableModel
 
 
 def check_float(text: str) -> float | None:
@@ -55,29 +56,7 @@ class CategoryChangeWindow(QtWidgets.QWidget):
         return self.combo_cor
 
     def _on_ok_button_click(self) -> None:
-        text = self.combo_cor.currentText()
-        self.par.expenses_table.setItem(
-            self.ro,
-            self.col,
-            QtWidgets.QTableWidgetItem(text),
-        )
-        summ = int(self.par.expenses_table.item(self.ro, 1).text())
-        cat = text
-        date = datetime.datetime.strptime(
-            self.par.expenses_table.item(self.ro, 0).text(), "%Y-%m-%d %H:%M:%S"
-        )
-        comm = self.par.expenses_table.item(self.ro, 3)
-        if comm is None:
-            comment = ""
-        else:
-            comment = comm.text()
-        self.par.handler_expense_changer(
-            summ,
-            cat,
-            date,
-            comment,
-            self.ro + 1,
-        )
+        self.par.change_expense(self.ro, category=self.combo_cor.currentText())
 
 
 class CategoryWindow(QtWidgets.QWidget):
@@ -211,26 +190,7 @@ class DayChangeWindow(QtWidgets.QWidget):
             dlg.exec()
         else:
             date = datetime.datetime(int(year), int(month), int(day))
-            self.par.expenses_table.setItem(
-                self.ro,
-                self.col,
-                QtWidgets.QTableWidgetItem(date.strftime("%Y-%m-%d %H:%M:%S")),
-            )
-
-            summ = int(self.par.expenses_table.item(self.ro, 1).text())
-            cat = self.par.expenses_table.item(self.ro, 2).text()
-            comm = self.par.expenses_table.item(self.ro, 3)
-            if comm is None:
-                comment = ""
-            else:
-                comment = comm.text()
-            self.par.handler_expense_changer(
-                summ,
-                cat,
-                date,
-                comment,
-                self.ro + 1,
-            )
+            self.par.change_expense(self.ro, expense_date=date)
 
     def _month_combo(self) -> QtWidgets.QWidget:
         self.combo_month = QtWidgets.QComboBox()
@@ -379,7 +339,8 @@ class MainWindow(QtWidgets.QWidget):
         self.combo: QtWidgets.QComboBox
         self.expenses_input_field: QtWidgets.QLineEdit
         self.control_table: QtWidgets.QTableWidget
-        self.expenses_table: QtWidgets.QTableWidget
+        self.expenses_model = ExpenseTableModel()
+        self.expenses_table: QtWidgets.QTableView
         self.day_change_win: DayChangeWindow
         self.cat_win: CategoryWindow
 
@@ -428,7 +389,9 @@ class MainWindow(QtWidgets.QWidget):
         add_button.clicked.connect(self._on_add_button_click)
         correct_budget_button.clicked.connect(self._on_budget_button_click)
         correct_category_button.clicked.connect(self._on_category_button_click)
-        self.expenses_table.cellDoubleClicked.connect(self._expenses_cell_change)
+        self.expenses_table.doubleClicked.connect(
+            lambda index: self._expenses_cell_change(index.row(), index.column())
+        )
         self.setWindowTitle("Bookkeeper App")
         self.setGeometry(900, 100, 700, 500)
 
@@ -470,9 +433,6 @@ class MainWindow(QtWidgets.QWidget):
         """
         self.handler_budget = handler
 
-    def clear_expense_table(self) -> None:
-        self.expenses_table.clearContents()
-
     def set_budget(self, budgets: list[Budget]) -> None:
         self.control_table.setItem(
             0, 1, QtWidgets.QTableWidgetItem(str(budgets[0].summa))
@@ -490,46 +450,59 @@ class MainWindow(QtWidgets.QWidget):
 
     def set_expense_list(
         self,
-        expenses: list[Expense],
+        loader: ExpensePageLoader,
         categories: dict[int, str],
     ) -> None:
-        row = 0
-        while self.expenses_table.item(row, 0) is not None:
-            row += 1
-        for exp in expenses:
-            if exp.category in categories:
-                cat_name = categories[exp.category]
-            else:
-                cat_name = "Удаленная категория"
-            date = exp.expense_date.strftime("%Y-%m-%d %H:%M:%S")
-            self.expenses_table.setItem(row, 0, QtWidgets.QTableWidgetItem(date))
-            self.expenses_table.setItem(
-                row, 1, QtWidgets.QTableWidgetItem(str(exp.amount))
-            )
-            self.expenses_table.setItem(row, 2, QtWidgets.QTableWidgetItem(cat_name))
-            self.expenses_table.setItem(row, 3, QtWidgets.QTableWidgetItem(exp.comment))
-            row += 1
+        """
+        Показать расходы, которые подгружаются через loader страницами
+        по мере прокрутки таблицы
+        """
+        self.expenses_model.set_source(loader, categories)
+
+    def set_category_names(self, categories: dict[int, str]) -> None:
+        """
+        Обновить названия категорий в таблице расходов
+        """
+        self.expenses_model.set_categories(categories)
+
+    def append_expense(self, exp: Expense) -> None:
+        """
+        Добавить новый расход в таблицу
+        """
+        self.expenses_model.append_expense(exp)
+
+    def change_expense(self, row: int, **changes: Any) -> None:
+        """
+        Изменить расход в строке row таблицы и передать изменение обработчику.
+        changes - новые значения полей amount, expense_date, comment
+        и category (название категории)
+        """
+        model = self.expenses_model
+        cat_name = changes.get("category")
+        if cat_name is not None:
+            changes["category"] = model.category_pk(cat_name)
+        exp = model.update_expense(row, **changes)
+        self.handler_expense_changer(
+            exp.amount,
+            cat_name if cat_name is not None else model.category_name(exp.category),
+            exp.expense_date,
+            exp.comment,
+            exp.pk,
+        )
 
     def set_summ(self, summs: list[float]) -> None:
         for i, summ in enumerate(summs):
             self.control_table.setItem(i, 0, QtWidgets.QTableWidgetItem(str(summ)))
 
     def _expenses_cell_change(self, row: int, column: int) -> None:
-        if self.expenses_table.item(row, 0) is None:
-            dlg = QtWidgets.QErrorMessage()
-            dlg.showMessage("Этой записи пока не существует.\n")
-            dlg.setWindowTitle("Ошибка")
-            dlg.resize(200, 50)
-            dlg.exec()
-        else:
-            if column == 0:
-                self._day_changing(row, column)
-            if column == 1:
-                self._summa_changing(row, column)
-            if column == 2:
-                self._category_changing(row, column)
-            if column == 3:
-                self._comment_changing(row, column)
+        if column == 0:
+            self._day_changing(row, column)
+        if column == 1:
+            self._summa_changing(row, column)
+        if column == 2:
+            self._category_changing(row, column)
+        if column == 3:
+            self._comment_changing(row, column)
 
     def _day_changing(self, row: int, column: int) -> None:
         self.day_change_win = DayChangeWindow(self, row, column)
@@ -549,27 +522,7 @@ class MainWindow(QtWidgets.QWidget):
             dlg.resize(200, 50)
             dlg.exec()
         elif ok_button and text:
-            self.expenses_table.setItem(
-                row,
-                column,
-                QtWidgets.QTableWidgetItem(text),
-            )
-            date = datetime.datetime.strptime(
-                self.expenses_table.item(row, 0).text(), "%Y-%m-%d %H:%M:%S"
-            )
-
-            comm = self.expenses_table.item(row, 3)
-            if comm is None:
-                comment = ""
-            else:
-                comment = comm.text()
-            self.handler_expense_changer(
-                int(text),
-                self.expenses_table.item(row, 2).text(),
-                date,
-                comment,
-                row + 1,
-            )
+            self.change_expense(row, amount=int(text))
 
     def _category_changing(self, row: int, column: int) -> None:
         count = self.combo.count()
@@ -587,21 +540,7 @@ class MainWindow(QtWidgets.QWidget):
             "",
         )
         if ok_button and text:
-            self.expenses_table.setItem(
-                row,
-                column,
-                QtWidgets.QTableWidgetItem(text),
-            )
-            val = self.expenses_table.item(row, 0).text()
-            date = datetime.datetime.strptime(val, "%Y-%m-%d %H:%M:%S")
-
-            self.handler_expense_changer(
-                int(self.expenses_table.item(row, 1).text()),
-                self.expenses_table.item(row, 2).text(),
-                date,
-                text,
-                row + 1,
-            )
+            self.change_expense(row, comment=text)
 
     def _on_add_button_click(self) -> None:
         category_text = str(self.reading_combobox())
@@ -613,23 +552,7 @@ class MainWindow(QtWidgets.QWidget):
             dlg.resize(200, 50)
             dlg.exec()
         else:
-            row_count = 0
-            while self.expenses_table.item(row_count, 0) is not None:
-                row_count += 1
-            # row_count = self.expenses_table.rowCount()
-            self.expenses_table.setItem(
-                row_count, 1, QtWidgets.QTableWidgetItem(sum_text)
-            )
-            self.expenses_table.setItem(
-                row_count, 2, QtWidgets.QTableWidgetItem(category_text)
-            )
             date = datetime.datetime.now()
-            self.expenses_table.setItem(
-                row_count,
-                0,
-                QtWidgets.QTableWidgetItem(date.strftime("%Y-%m-%d %H:%M:%S")),
-            )
-
             self.status_label.setText("Расходы добавлены")
             self.handler_expense_adder(
                 int(sum_text),
@@ -647,13 +570,9 @@ class MainWindow(QtWidgets.QWidget):
         self.budg_win = BudgetWindow(self)
         self.budg_win.show()
 
-    def _expenses_table_func(self) -> QtWidgets.QTableWidget:
-        self.expenses_table = QtWidgets.QTableWidget(4, 1000)
-        self.expenses_table.setColumnCount(4)
-        self.expenses_table.setRowCount(1000)
-        self.expenses_table.setHorizontalHeaderLabels(
-            "Дата Сумма Категория Комментарий".split()
-        )
+    def _expenses_table_func(self) -> QtWidgets.QTableView:
+        self.expenses_table = QtWidgets.QTableView()
+        self.expenses_table.setModel(self.expenses_model)
         header = self.expenses_table.horizontalHeader()
         header.setSectionResizeMode(
             0, QtWidgets.QHeaderView.ResizeMode.ResizeToContents
@@ -0,0 +1,167 @@
+"""
+Модель таблицы расходов для QTableView
+
+Строки подгружаются из репозитория страницами по мере прокрутки таблицы
+(canFetchMore/fetchMore), поэтому время открытия окна не зависит от того,
+сколько всего расходов в базе. Страница запрашивается у загрузчика, который
+передает ее в модель по готовности, так что чтение из базы может идти
+в фоновом потоке, не блокируя прокрутку.
+"""
+
+from dataclasses import replace
+from typing import Any, Callable
+
+from PySide6 import QtCore
+
+from bookkeeper.models.expense import Expense
+
+DELETED_CATEGORY = "Удаленная категория"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ExpensePageLoader = Callable[[int, int, Callable[[list[Expense]], None]], None]
+"""
+Функция загрузки страницы расходов: принимает pk последнего уже загруженного
+расхода (0 - с начала), размер страницы и функцию, в которую нужно передать
+следующие расходы в порядке возрастания pk (сразу или позже, в потоке
+интерфейса)
+"""
+
+_Index = QtCore.QModelIndex | QtCore.QPersistentModelIndex
+
+
+class ExpenseTableModel(QtCore.QAbstractTableModel):
+    """
+    Таблица расходов: дата, сумма, категория, комментарий.
+    Хранит только уже загруженные строки.
+    """
+
+    HEADERS = ("Дата", "Сумма", "Категория", "Комментарий")
+
+    def __init__(self, page_size: int = 200,
+                 parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._page_size = page_size
+        self._loader: ExpensePageLoader = lambda after_pk, limit, deliver: deliver([])
+        self._rows: list[Expense] = []
+        self._categories: dict[int, str] = {}
+        self._exhausted = True
+        self._loading = False
+        self._appended: list[Expense] = []
+        # номер источника: страницы, запрошенные до set_source, отбрасываются
+        self._generation = 0
+
+    def set_source(self, loader: ExpensePageLoader,
+                   categories: dict[int, str]) -> None:
+        """ Задать источник строк и сбросить уже загруженные строки """
+        self.beginResetModel()
+        self._loader = loader
+        self._categories = dict(categories)
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self._appended = []
+        self._generation += 1
+        self.endResetModel()
+
+    def set_categories(self, categories: dict[int, str]) -> None:
+        """ Обновить названия категорий, не перезагружая строки """
+        self._categories = dict(categories)
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 2), self.index(len(self._rows) - 1, 2))
+
+    def category_name(self, category: int) -> str:
+        """ Название категории по pk """
+        return self._categories.get(category, DELETED_CATEGORY)
+
+    def category_pk(self, name: str) -> int:
+        """ pk категории по названию, 0 для удаленной категории """
+        for pk, cat_name in self._categories.items():
+            if cat_name == name:
+                return pk
+        return 0
+
+    def expense(self, row: int) -> Expense:
+        """ Расход в строке row """
+        return self._rows[row]
+
+    def update_expense(self, row: int, **changes: Any) -> Expense:
+        """ Изменить поля расхода в строке row и вернуть новый расход """
+        exp = replace(self._rows[row], **changes)
+        self._rows[row] = exp
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+        return exp
+
+    def append_expense(self, exp: Expense) -> None:
+        """
+        Показать новый расход. Если загружены еще не все строки,
+        расход появится при загрузке последней страницы.
+        """
+        if self._loading:
+            # загружаемая страница могла быть прочитана до добавления расхода
+            self._appended.append(exp)
+            return
+        if not self._exhausted:
+            return
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(exp)
+        self.endInsertRows()
+
+    def rowCount(self, parent: _Index = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: _Index = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: _Index,
+             role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        exp = self._rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return exp.expense_date.strftime(DATE_FORMAT)
+        if column == 1:
+            return str(exp.amount)
+        if column == 2:
+            return self.category_name(exp.category)
+        return exp.comment
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation,
+                   role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if (orientation == QtCore.Qt.Orientation.Horizontal
+                and role == QtCore.Qt.ItemDataRole.DisplayRole):
+            return self.HEADERS[section]
+        return None
+
+    def is_loading(self) -> bool:
+        """ Запрошена ли страница, которая еще не получена """
+        return self._loading
+
+    def canFetchMore(self, parent: _Index) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent: _Index) -> None:
+        if not self.canFetchMore(parent):
+            return
+        after_pk = self._rows[-1].pk if self._rows else 0
+        generation = self._generation
+        self._loading = True
+        self._loader(after_pk, self._page_size,
+                     lambda page: self._add_page(generation, page))
+
+    def _add_page(self, generation: int, page: list[Expense]) -> None:
+        if generation != self._generation:
+            return
+        self._loading = False
+        if len(page) < self._page_size:
+            self._exhausted = True
+            last_pk = page[-1].pk if page else (self._rows[-1].pk if self._rows else 0)
+            page = page + [exp for exp in self._appended if exp.pk > last_pk]
+        self._appended = []
+        if not page:
+            return
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
@@ -0,0 +1,119 @@
+"""
+Исполнитель задач на пуле потоков Qt
+
+Задачи выполняются в фоновом потоке QThreadPool, а результаты передаются
+обратно в поток интерфейса сигналом, поэтому работа с базой данных
+не блокирует окно.
+"""
+
+import sys
+from itertools import count
+from typing import Any, Callable, Hashable, TypeVar
+
+from PySide6 import QtCore
+
+R = TypeVar('R')
+
+
+class _Signals(QtCore.QObject):
+    finished = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, object)
+
+
+class _Task(QtCore.QRunnable):
+    def __init__(self, task_id: int, fn: Callable[[], Any],
+                 signals: _Signals) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self._task_id = task_id
+        self._fn = fn
+        self._signals = signals
+
+    def run(self) -> None:
+        try:
+            result = self._fn()
+        except Exception as exc:  # pylint: disable=broad-except
+            self._signals.failed.emit(self._task_id, exc)
+        else:
+            self._signals.finished.emit(self._task_id, result)
+
+
+class QtExecutor(QtCore.QObject):
+    """
+    Исполнитель задач в фоновых потоках Qt.
+    По умолчанию задачи выполняются в одном фоновом потоке по очереди,
+    так что изменения в базе данных применяются в порядке отправки.
+    Фоновые потоки живут до удаления исполнителя и не завершаются
+    при простое, поэтому соединения с базой открываются один раз на поток.
+    Задача с ключом заменяет еще не начатую задачу с тем же ключом,
+    поэтому частые обновления, например сумм расходов, не копятся в очереди.
+
+    max_threads - количество фоновых потоков
+    on_error - обработчик исключения задачи, вызывается в потоке интерфейса
+    (по умолчанию sys.excepthook)
+    """
+
+    def __init__(self, max_threads: int = 1,
+                 on_error: Callable[[Exception], None] | None = None,
+                 parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        # простаивающие потоки не завершаются: иначе каждый новый поток
+        # открывал бы в ConnectionPool еще одно соединение с базой
+        self._pool.setExpiryTimeout(-1)
+        self._signals = _Signals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._on_error = on_error
+        self._ids = count(1)
+        self._tasks: dict[int, tuple[_Task, Callable[[Any], Any] | None,
+                                     Hashable | None]] = {}
+        self._latest: dict[Hashable, int] = {}
+
+    def submit(self, fn: Callable[[], R],
+               callback: Callable[[R], Any] | None = None,
+               key: Hashable | None = None) -> None:
+        task_id = next(self._ids)
+        if key is not None:
+            old_id = self._latest.get(key)
+            if old_id is not None and self._pool.tryTake(self._tasks[old_id][0]):
+                del self._tasks[old_id]
+            self._latest[key] = task_id
+        task = _Task(task_id, fn, self._signals)
+        self._tasks[task_id] = (task, callback, key)
+        self._pool.start(task)
+
+    def _finish(self, task_id: int) -> Callable[[Any], Any] | None:
+        """
+        Забыть завершенную задачу и вернуть ее callback,
+        или None, если результат задачи устарел
+        """
+        _, callback, key = self._tasks.pop(task_id)
+        if key is None:
+            return callback
+        if self._latest.get(key) != task_id:
+            return None
+        del self._latest[key]
+        return callback
+
+    @QtCore.Slot(int, object)
+    def _on_finished(self, task_id: int, result: Any) -> None:
+        callback = self._finish(task_id)
+        if callback is not None:
+            callback(result)
+
+    @QtCore.Slot(int, object)
+    def _on_failed(self, task_id: int, exc: Exception) -> None:
+        self._finish(task_id)
+        if self._on_error is not None:
+            self._on_error(exc)
+        else:
+            sys.excepthook(type(exc), exc, exc.__traceback__)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """
+        Дождаться завершения всех задач (результаты будут переданы
+        в callback при следующей обработке событий)
+        """
+        return self._pool.waitForDone(msecs)
@@ -0,0 +1,33 @@
+import importlib.util
+from datetime import date, datetime
+
+import pytest
+
+from bookkeeper.models.expense import Expense
+
+if importlib.util.find_spec("PySide6") is None:
+    # презентер импортирует окно приложения
+    collect_ignore = ["test_presenter.py"]
+
+
+class Clock:
+    def __init__(self, today):
+        self.today = today
+
+    def __call__(self):
+        return self.today
+
+
+@pytest.fixture
+def clock():
+    return Clock(date(2023, 2, 1))
+
+
+@pytest.fixture
+def window_expenses():
+    return [
+        Expense(1, 3, datetime(2022, 12, 31)),
+        Expense(10, 3, datetime(2023, 1, 20)),
+        Expense(100, 2, datetime(2023, 1, 28)),
+        Expense(1000, 1, datetime(2023, 2, 1, 9)),
+    ]
@@ -0,0 +1,152 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from bookkeeper.budget_engine import BudgetEngine, BudgetStatus, category_scopes
+from bookkeeper.models.budget import Budget
+from bookkeeper.models.category import Category
+from bookkeeper.models.category_tree import CategoryTree
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+from bookkeeper.repository.sqlite_rollup import DailyRollup
+
+
+@pytest.fixture
+def tree():
+    return CategoryTree([
+        Category('food', pk=1),
+        Category('meat', 1, pk=2),
+        Category('books', pk=3),
+    ])
+
+
+@pytest.fixture
+def budgets():
+    return [
+        Budget(1000, 1),
+        Budget(5000, 7),
+        Budget(20000, 30),
+        Budget(500, 7, 'food'),
+        Budget(100, 7, 'meat'),
+        Budget(300, 30, 'books'),
+    ]
+
+
+def brute_force(budgets, scopes, expenses, today):
+    result = []
+    for budg in budgets:
+        first = today - timedelta(budg.term - 1)
+        result.append(sum(
+            exp.amount for exp in expenses
+            if budg.term > 0 and exp.expense_date.date() >= first
+            and (not budg.category or exp.category in scopes.get(budg.category, ()))
+        ))
+    return result
+
+
+def test_category_scopes(tree):
+    assert category_scopes(tree) == {'food': [1, 2], 'meat': [2], 'books': [3]}
+
+
+def test_load_expenses(budgets, tree, window_expenses, clock):
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.load_expenses(window_expenses)
+    assert engine.spent() == [1000, 1100, 1110, 1100, 100, 10]
+    assert engine.since() == date(2023, 1, 3)
+
+
+def test_statuses(budgets, tree, window_expenses, clock):
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.load_expenses(window_expenses)
+    statuses = engine.statuses()
+    assert statuses[3] == BudgetStatus(budgets[3], 1100)
+    assert statuses[3].remaining == -600
+    assert statuses[3].utilization == 2.2
+    assert statuses[4].utilization == 1
+    assert [status.budget for status in engine.exceeded()] == [budgets[3]]
+    assert BudgetStatus(Budget(0, 1), 0).utilization == 0
+    assert BudgetStatus(Budget(0, 1), 1).utilization == float('inf')
+
+
+def test_unknown_category_is_never_spent(window_expenses, clock):
+    engine = BudgetEngine([Budget(10, 30, 'travel')], {'food': [1]}, clock)
+    engine.load_expenses(window_expenses)
+    assert engine.spent() == [0]
+
+
+def test_incremental_updates(budgets, tree, window_expenses, clock):
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.load_expenses(window_expenses)
+    exp = Expense(5, 2, datetime(2023, 2, 1, 10))
+    engine.added(exp)
+    assert engine.spent() == [1005, 1105, 1115, 1105, 105, 10]
+    new = Expense(7, 3, datetime(2023, 1, 29))
+    engine.changed(exp, new)
+    assert engine.spent() == [1000, 1107, 1117, 1100, 100, 17]
+    engine.removed(new)
+    assert engine.spent() == [1000, 1100, 1110, 1100, 100, 10]
+
+
+def test_sliding_windows(budgets, tree, window_expenses, clock):
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.load_expenses(window_expenses)
+    clock.today = date(2023, 2, 3)
+    assert engine.spent() == [0, 1100, 1110, 1100, 100, 10]
+    clock.today = date(2023, 2, 7)
+    assert engine.spent() == [0, 1000, 1110, 1000, 0, 10]
+    clock.today = date(2023, 2, 20)
+    assert engine.spent() == [0, 0, 1100, 0, 0, 0]
+    engine.added(Expense(3, 2, datetime(2023, 2, 15)))
+    assert engine.spent() == [0, 3, 1103, 3, 3, 0]
+
+
+def test_future_expenses_count_as_today(budgets, tree, clock):
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.added(Expense(10, 1, datetime(2023, 2, 3)))
+    assert engine.spent()[:3] == [10, 10, 10]
+    clock.today = date(2023, 2, 4)
+    assert engine.spent()[:3] == [0, 10, 10]
+
+
+def test_random_against_brute_force(tree, clock):
+    rng = random.Random(0)
+    scopes = category_scopes(tree)
+    budgets = [Budget(100, rng.randint(0, 40), rng.choice(['', 'food', 'meat', 'books']))
+               for _ in range(50)]
+    start = datetime(2023, 1, 1)
+    expenses = [Expense(rng.randint(1, 100), rng.randint(1, 4),
+                        start + timedelta(hours=rng.randint(0, 24 * 90)))
+                for _ in range(500)]
+    clock.today = date(2023, 2, 15)
+    engine = BudgetEngine(budgets, scopes, clock)
+    engine.load_expenses(expenses[:300])
+    for exp in expenses[300:]:
+        engine.added(exp)
+    assert engine.spent() == brute_force(budgets, scopes, expenses, clock.today)
+    for days in [rng.randint(1, 10) for _ in range(5)] + [45]:
+        clock.today += timedelta(days)
+        assert engine.spent() == brute_force(budgets, scopes, expenses, clock.today)
+
+
+@pytest.mark.parametrize('datetime_storage', ['text', 'seconds'])
+def test_load_from_sqlite(tmp_path, budgets, tree, window_expenses, clock,
+                          datetime_storage):
+    repo = SQliteRepository[Expense](tmp_path / 'test_data.db', Expense,
+                                     datetime_storage=datetime_storage)
+    rollup = DailyRollup(repo)
+    repo.add_many(window_expenses)
+    from_repo = BudgetEngine(budgets, category_scopes(tree), clock)
+    from_repo.load_repository(repo)
+    from_rollup = BudgetEngine(budgets, category_scopes(tree), clock)
+    from_rollup.load_rollup(rollup)
+    assert from_repo.spent() == from_rollup.spent() == [1000, 1100, 1110, 1100, 100, 10]
+
+
+def test_load_from_memory_repository(budgets, tree, window_expenses, clock):
+    repo = MemoryRepository[Expense]()
+    repo.add_many(window_expenses)
+    engine = BudgetEngine(budgets, category_scopes(tree), clock)
+    engine.load_repository(repo)
+    assert engine.spent() == [1000, 1100, 1110, 1100, 100, 10]
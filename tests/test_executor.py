@@ -0,0 +1,10 @@
+from bookkeeper.executor import ImmediateExecutor
+
+
+def test_immediate_executor_runs_in_place():
+    results = []
+    executor = ImmediateExecutor()
+    executor.submit(lambda: 1, results.append)
+    executor.submit(lambda: 2, results.append, key="k")
+    executor.submit(lambda: results.append(3))
+    assert results == [1, 2, 3]
@@ -0,0 +1,161 @@
+from datetime import date, datetime
+
+import pytest
+
+from bookkeeper.expense_frame import ExpenseFrame
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+EXPENSES = [
+    (100, 1, datetime(2023, 1, 2, 10, 30), "bread"),
+    (200, 2, datetime(2023, 1, 2, 23, 59), "taxi"),
+    (300, 1, datetime(2023, 1, 8, 12), "bread"),
+    (400, 3, datetime(2023, 1, 9), ""),
+    (500, 1, datetime(2023, 2, 1, 8), "cheese"),
+]
+
+
+def make_expenses():
+    return [Expense(amount, cat, date_, comment=comment)
+            for amount, cat, date_, comment in EXPENSES]
+
+
+@pytest.fixture(params=["memory", "sqlite-text", "sqlite-seconds"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        repo = MemoryRepository[Expense]()
+    else:
+        storage = request.param.split("-")[1]
+        repo = SQliteRepository[Expense](tmp_path / "test.db", Expense,
+                                         datetime_storage=storage)
+    repo.add_many(make_expenses())
+    yield repo
+    if request.param != "memory":
+        repo.close()
+
+
+@pytest.fixture
+def frame():
+    exps = make_expenses()
+    for pk, exp in enumerate(exps, 1):
+        exp.pk = pk
+    return ExpenseFrame.from_expenses(exps)
+
+
+def test_from_repository(repo, frame):
+    loaded = ExpenseFrame.from_repository(repo)
+    assert list(loaded.pk) == [1, 2, 3, 4, 5]
+    assert list(loaded.amount) == list(frame.amount)
+    assert list(loaded.category) == list(frame.category)
+    assert list(loaded.expense_date) == list(frame.expense_date)
+    assert [loaded.comments[code] for code in loaded.comment] == [
+        "bread", "taxi", "bread", "", "cheese"
+    ]
+
+
+def test_from_repository_where(repo):
+    loaded = ExpenseFrame.from_repository(repo, {"category": 1}, batch_size=2)
+    assert list(loaded.amount) == [100, 300, 500]
+
+
+def test_comments_are_interned(frame):
+    assert frame.comments == ["bread", "taxi", "", "cheese"]
+    assert list(frame.comment) == [0, 1, 0, 2, 3]
+
+
+def test_to_expenses(frame):
+    exps = frame.to_expenses()
+    assert [(e.amount, e.category, e.expense_date, e.comment) for e in exps] == EXPENSES
+    assert [e.pk for e in exps] == [1, 2, 3, 4, 5]
+
+
+def test_filter(frame):
+    assert list(frame.filter({"category": 1}).amount) == [100, 300, 500]
+    assert list(frame.filter({"amount__gt": 200, "category__in": [1, 3]}).amount) == [
+        300, 400, 500
+    ]
+    assert list(frame.filter({"amount__between": (200, 400)}).amount) == [200, 300, 400]
+    assert list(frame.filter({"expense_date__ge": date(2023, 1, 8),
+                              "expense_date__lt": datetime(2023, 2, 1)}).amount) == [
+        300, 400
+    ]
+    assert list(frame.filter({"amount__le": 250.5}).amount) == [100, 200]
+    assert len(frame.filter()) == 5
+
+
+def test_filter_comments(frame):
+    assert list(frame.filter({"comment": "bread"}).amount) == [100, 300]
+    assert list(frame.filter({"comment__in": ["taxi", "cheese"]}).amount) == [200, 500]
+    assert list(frame.filter({"comment__like": "%E%"}).amount) == [100, 300, 500]
+    assert len(frame.filter({"comment": "missing"})) == 0
+
+
+def test_filter_errors(frame):
+    with pytest.raises(ValueError):
+        frame.filter({"added_date": datetime.now()})
+    with pytest.raises(ValueError):
+        frame.filter({"amount__like": "1%"})
+
+
+def test_aggregates(frame):
+    assert frame.total() == 1500
+    assert frame.sum_by_category() == {1: 900, 2: 200, 3: 400}
+    assert frame.filter({"category": 2}).total() == 200
+
+
+def test_resample(frame):
+    assert frame.resample("day") == {
+        date(2023, 1, 2): 300, date(2023, 1, 8): 300,
+        date(2023, 1, 9): 400, date(2023, 2, 1): 500,
+    }
+    assert frame.resample("week") == {
+        date(2023, 1, 2): 600, date(2023, 1, 9): 400, date(2023, 1, 30): 500,
+    }
+    assert frame.resample("month") == {date(2023, 1, 1): 1000, date(2023, 2, 1): 500}
+    assert list(frame.resample("month")) == [date(2023, 1, 1), date(2023, 2, 1)]
+    with pytest.raises(ValueError):
+        frame.resample("year")
+
+
+def test_empty():
+    frame = ExpenseFrame()
+    assert len(frame) == 0
+    assert frame.total() == 0
+    assert frame.resample() == {}
+    assert len(frame.filter({"amount__gt": 0})) == 0
+
+
+def test_indices(frame):
+    assert frame.indices() == [0, 1, 2, 3, 4]
+    assert frame.indices({"category": 1, "amount__gt": 100}) == [2, 4]
+    period = (date(2023, 1, 2), datetime(2023, 1, 8, 12))
+    assert frame.indices({"expense_date__between": period}) == [0, 1, 2]
+    assert frame.indices({"expense_date__lt": date(2023, 1, 2)}) == []
+
+
+@pytest.mark.parametrize("dates_sorted", [True, False])
+def test_filter_by_date_sorted_and_not(dates_sorted):
+    exps = make_expenses()
+    if not dates_sorted:
+        exps.reverse()
+    frame = ExpenseFrame.from_expenses(exps)
+    assert frame._dates_sorted is dates_sorted
+    conditions = [
+        {"expense_date": datetime(2023, 1, 9)},
+        {"expense_date__gt": datetime(2023, 1, 2, 10, 30)},
+        {"expense_date__ge": date(2023, 1, 8), "expense_date__le": date(2023, 1, 9)},
+        {"expense_date__between": (date(2023, 1, 2), date(2023, 1, 8))},
+        {"expense_date__in": [datetime(2023, 1, 9)]},
+    ]
+    expected = [[400], [200, 300, 400, 500], [300, 400], [100, 200]]
+    expected.append([400])
+    for where, amounts in zip(conditions, expected):
+        assert sorted(frame.filter(where).amount) == amounts
+        assert sorted(frame.amount[i] for i in frame.indices(where)) == amounts
+
+
+def test_filter_scattered_rows():
+    frame = ExpenseFrame.from_expenses(Expense(i, i % 2) for i in range(100))
+    assert list(frame.filter({"category": 1}).amount) == list(range(1, 100, 2))
+    assert list(frame.filter({"category": 1, "amount__lt": 10}).amount) == [1, 3, 5, 7, 9]
@@ -33,3 +33,10 @@ def test_can_add_to_repo(repo):
     budg = Budget(100, timedelta(1))
     pk = repo.add(budg)
     assert budg.pk == pk
+
+
+def test_has_slots():
+    budg = Budget(100, 7)
+    assert not hasattr(budg, "__dict__")
+    with pytest.raises(AttributeError):
+        budg.unknown = 1
@@ -107,3 +107,52 @@ def test_create_from_tree_error(repo):
     tree = [("1", "parent"), ("parent", None)]
     with pytest.raises(KeyError):
         Category.create_from_tree(tree, repo)
+
+
+def test_create_from_tree_error_saves_nothing(repo):
+    tree = [("parent", None), ("1", "parent"), ("2", "missing")]
+    with pytest.raises(KeyError):
+        Category.create_from_tree(tree, repo)
+    assert repo.get_all() == []
+
+
+def test_create_from_tree_batches_by_level(repo, monkeypatch):
+    batches = []
+    add_many = repo.add_many
+    monkeypatch.setattr(repo, "add_many",
+                        lambda objs: batches.append(list(objs)) or add_many(batches[-1]))
+    tree = [("a", None), ("a1", "a"), ("b", None), ("a11", "a1"), ("b1", "b")]
+    cats = Category.create_from_tree(tree, repo)
+    assert [[c.name for c in batch] for batch in batches] == [
+        ["a", "b"], ["a1", "b1"], ["a11"]
+    ]
+    assert [c.name for c in cats] == ["a", "a1", "b", "a11", "b1"]
+    by_name = {c.name: c for c in cats}
+    assert by_name["a11"].parent == by_name["a1"].pk
+    assert by_name["b1"].parent == by_name["b"].pk
+
+
+def test_create_from_tree_duplicate_names(repo):
+    tree = [("x", None), ("y", "x"), ("x", "y"), ("z", "x")]
+    cats = Category.create_from_tree(tree, repo)
+    assert [(c.name, c.parent) for c in cats] == [
+        ("x", cats[1].pk), ("y", repo.get_all({"name": "x", "parent": None})[0].pk),
+        ("z", cats[0].pk),
+    ]
+
+
+def test_has_slots():
+    c = Category("name")
+    assert not hasattr(c, "__dict__")
+    with pytest.raises(AttributeError):
+        c.unknown = 1
+
+
+def test_get_all_parents_stops_on_cycle(repo):
+    first = Category("a")
+    repo.add(first)
+    second = Category("b", parent=first.pk)
+    repo.add(second)
+    first.parent = second.pk
+    repo.update(first)
+    assert [c.name for c in second.get_all_parents(repo)] == ["a"]
@@ -0,0 +1,153 @@
+"""
+Тесты для индекса иерархии категорий
+"""
+
+import pytest
+
+from bookkeeper.models.category import Category
+from bookkeeper.models.category_tree import CategoryTree
+from bookkeeper.repository.memory_repository import MemoryRepository
+
+
+@pytest.fixture
+def repo():
+    repo = MemoryRepository()
+    Category.create_from_tree([
+        ("food", None),
+        ("meat", "food"),
+        ("beef", "meat"),
+        ("pork", "meat"),
+        ("fruit", "food"),
+        ("home", None),
+        ("rent", "home"),
+    ], repo)
+    return repo
+
+
+@pytest.fixture
+def tree(repo):
+    return CategoryTree.from_repository(repo)
+
+
+def pk(repo, name):
+    return repo.get_all({"name": name})[0].pk
+
+
+def names(tree, pks):
+    return [tree.get(p).name for p in pks]
+
+
+def test_subtree(tree, repo):
+    assert names(tree, tree.subtree(pk(repo, "food"))) == [
+        "food", "meat", "beef", "pork", "fruit"
+    ]
+    assert names(tree, tree.subtree(pk(repo, "beef"))) == ["beef"]
+    assert [c.name for c in tree.subcategories(pk(repo, "home"))] == ["rent"]
+
+
+def test_matches_get_subcategories(tree, repo):
+    for cat in repo.get_all():
+        expected = {c.pk for c in cat.get_subcategories(repo)}
+        assert {c.pk for c in tree.subcategories(cat.pk)} == expected
+
+
+def test_is_ancestor(tree, repo):
+    food, beef, rent = pk(repo, "food"), pk(repo, "beef"), pk(repo, "rent")
+    assert tree.is_ancestor(food, beef)
+    assert tree.is_ancestor(food, food)
+    assert not tree.is_ancestor(beef, food)
+    assert not tree.is_ancestor(food, rent)
+
+
+def test_depth_and_ancestors(tree, repo):
+    beef = pk(repo, "beef")
+    assert tree.depth(pk(repo, "food")) == 0
+    assert tree.depth(beef) == 2
+    assert [c.name for c in tree.ancestors(beef)] == ["meat", "food"]
+    assert tree.ancestors(beef) == list(repo.get(beef).get_all_parents(repo))
+    assert tree.parent(pk(repo, "food")) is None
+
+
+def test_children(tree, repo):
+    assert [c.name for c in tree.children(None)] == ["food", "home"]
+    assert [c.name for c in tree.children(pk(repo, "meat"))] == ["beef", "pork"]
+
+
+def test_add_and_update(tree, repo):
+    veal = Category("veal", parent=pk(repo, "beef"))
+    repo.add(veal)
+    tree.add(veal)
+    assert tree.depth(veal.pk) == 3
+    assert tree.is_ancestor(pk(repo, "food"), veal.pk)
+    with pytest.raises(ValueError):
+        tree.add(veal)
+    moved = Category("meat", parent=pk(repo, "home"), pk=pk(repo, "meat"))
+    tree.update(moved)
+    assert names(tree, tree.subtree(pk(repo, "home"))) == [
+        "home", "rent", "meat", "beef", "veal", "pork"
+    ]
+    assert not tree.is_ancestor(pk(repo, "food"), veal.pk)
+
+
+def test_remove(tree, repo):
+    removed = tree.remove(pk(repo, "meat"))
+    assert names_removed(repo, removed) == ["meat", "beef", "pork"]
+    assert len(tree) == 4
+    assert pk(repo, "beef") not in tree
+    assert names(tree, tree.subtree(pk(repo, "food"))) == ["food", "fruit"]
+
+
+def names_removed(repo, pks):
+    return [repo.get(p).name for p in pks]
+
+
+def test_orphans_are_roots():
+    tree = CategoryTree([Category("a", parent=10, pk=1), Category("b", parent=1, pk=2)])
+    assert tree.depth(1) == 0
+    assert tree.subtree(1) == [1, 2]
+
+
+def test_deep_tree():
+    tree = CategoryTree(Category(str(i), parent=i - 1 if i > 1 else None, pk=i)
+                        for i in range(1, 5001))
+    assert tree.depth(5000) == 4999
+    assert tree.is_ancestor(1, 5000)
+    assert len(tree.ancestors(5000)) == 4999
+    assert len(tree.subtree(1)) == 5000
+
+
+def test_deep_get_all_parents():
+    repo = MemoryRepository()
+    parent = None
+    for i in range(3000):
+        cat = Category(str(i), parent=parent)
+        parent = repo.add(cat)
+    assert len(list(cat.get_all_parents(repo))) == 2999
+    assert len(list(repo.get(1).get_subcategories(repo))) == 2999
+
+
+def test_cycle_is_broken_at_first_category():
+    tree = CategoryTree([Category("a", parent=3, pk=1), Category("b", parent=1, pk=2),
+                         Category("c", parent=2, pk=3), Category("d", parent=2, pk=4)])
+    assert [c.name for c in tree.ancestors(1)] == ["c", "b"]
+    assert tree.depth(1) == 0
+    assert tree.depth(3) == 2
+    assert tree.subtree(1) == [1, 2, 3, 4]
+    assert tree.subtree(2) == [2, 3, 4]
+    assert tree.is_ancestor(1, 3)
+    assert not tree.is_ancestor(3, 1)
+    assert [c.name for c in tree.children(None)] == ["a"]
+    assert tree.remove(2) == [2, 3, 4]
+    assert tree.subtree(1) == [1]
+
+
+def test_update_and_add_reject_cycles(tree, repo):
+    food, beef = pk(repo, "food"), pk(repo, "beef")
+    with pytest.raises(ValueError):
+        tree.update(Category("food", parent=beef, pk=food))
+    with pytest.raises(ValueError):
+        tree.update(Category("food", parent=food, pk=food))
+    assert tree.depth(beef) == 2
+    tree.add(Category("x", parent=100, pk=101))
+    with pytest.raises(ValueError):
+        tree.add(Category("y", parent=101, pk=100))
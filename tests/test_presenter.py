@@ -0,0 +1,172 @@
+from datetime import datetime
+
+import pytest
+
+from bookkeeper.models.budget import Budget
+from bookkeeper.models.category import Category
+from bookkeeper.models.expense import Expense
+from bookkeeper.presenter import Bookkeeper
+from bookkeeper.repository.memory_repository import MemoryRepository
+
+
+class FakeView:
+    def __init__(self):
+        self.handlers = {}
+        self.budgets = None
+        self.categories = None
+        self.category_names = None
+        self.loader = None
+        self.appended = []
+        self.summs = []
+
+    def init_ui(self):
+        pass
+
+    def do_show(self):
+        pass
+
+    def expense_change_handler(self, handler):
+        self.handlers['change_expense'] = handler
+
+    def expense_add_handler(self, handler):
+        self.handlers['add_expense'] = handler
+
+    def delete_category_handler(self, handler):
+        self.handlers['delete_category'] = handler
+
+    def add_category_handler(self, handler):
+        self.handlers['add_category'] = handler
+
+    def budget_change_handler(self, handler):
+        self.handlers['budget_change'] = handler
+
+    def set_budget(self, budgets):
+        self.budgets = budgets
+
+    def set_categories(self, categories):
+        self.categories = categories
+
+    def set_expense_list(self, loader, categories):
+        self.loader = loader
+        self.category_names = categories
+
+    def set_category_names(self, categories):
+        self.category_names = categories
+
+    def append_expense(self, exp):
+        self.appended.append(exp)
+
+    def set_summ(self, summs):
+        self.summs.append(summs)
+
+
+class DeferredExecutor:
+    """ Очередь задач, выполняемых по run_all, с заменой задач по ключу """
+
+    def __init__(self):
+        self.queue = []
+
+    def submit(self, fn, callback=None, key=None):
+        if key is not None:
+            self.queue = [task for task in self.queue if task[2] != key]
+        self.queue.append((fn, callback, key))
+
+    def run_all(self):
+        while self.queue:
+            fn, callback, _ = self.queue.pop(0)
+            result = fn()
+            if callback is not None:
+                callback(result)
+
+
+@pytest.fixture
+def view():
+    return FakeView()
+
+
+@pytest.fixture
+def repos():
+    return MemoryRepository[Category](), MemoryRepository[Budget](), \
+        MemoryRepository[Expense]()
+
+
+def test_startup_fills_defaults(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo)
+    assert [cat.name for cat in view.categories] == ['Продукты', 'Дом', 'Прочее']
+    assert [budg.term for budg in view.budgets] == [1, 7, 30]
+    assert view.summs == [[0, 0, 0]]
+    pages = []
+    view.loader(0, 10, pages.append)
+    assert pages == [[]]
+
+
+def test_add_and_change_expense(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo)
+    now = datetime.now()
+    view.handlers['add_expense'](100, 'Дом', now)
+    exp = view.appended[0]
+    assert exp_repo.get(exp.pk) == exp
+    assert view.summs[-1] == [100, 100, 100]
+    view.handlers['change_expense'](30, 'Прочее', now, 'bread', exp.pk)
+    assert exp_repo.get(exp.pk).comment == 'bread'
+    assert view.summs[-1] == [30, 30, 30]
+
+
+def test_deferred_add_expense(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    executor = DeferredExecutor()
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo, executor)
+    executor.run_all()
+    view.handlers['add_expense'](100, 'Дом', datetime.now())
+    executor.run_all()
+    assert len(view.appended) == 1
+    assert view.summs[-1] == [100, 100, 100]
+
+
+def test_expense_pages_load_through_executor(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    exp_repo.add(Expense(100, 1))
+    executor = DeferredExecutor()
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo, executor)
+    executor.run_all()
+    pages = []
+    view.loader(0, 10, pages.append)
+    assert pages == []
+    executor.run_all()
+    assert pages == [exp_repo.get_all()]
+
+
+def test_summ_refresh_does_not_cancel_totals_loading(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    cat_repo.add(Category('Дом'))
+    executor = DeferredExecutor()
+    bookkeeper = Bookkeeper(view, cat_repo, budget_repo, exp_repo, executor)
+    view.handlers['add_expense'](100, 'Дом', datetime.now())
+    view.handlers['add_expense'](10, 'Дом', datetime.now())
+    executor.run_all()
+    assert len(view.appended) == 2
+    assert view.summs[-1] == [110, 110, 110]
+    assert bookkeeper.totals.summs == [110, 110, 110]
+
+
+def test_categories(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo)
+    home = cat_repo.get_all({'name': 'Дом'})[0]
+    view.handlers['add_category'](Category('Ремонт', home.pk))
+    assert 'Ремонт' in view.category_names.values()
+    view.handlers['add_expense'](100, 'Ремонт', datetime.now())
+    view.handlers['delete_category']('Дом')
+    assert [cat.name for cat in cat_repo.get_all()] == ['Продукты', 'Прочее']
+    assert exp_repo.get_all()[0].category == 0
+
+
+def test_budget_change(view, repos):
+    cat_repo, budget_repo, exp_repo = repos
+    Bookkeeper(view, cat_repo, budget_repo, exp_repo)
+    budg = view.budgets[0]
+    budg.summa = 5
+    view.handlers['budget_change'](budg)
+    assert budget_repo.get(budg.pk).summa == 5
@@ -1,4 +1,6 @@
-from bookkeeper.repository.abstract_repository import AbstractRepository
+from contextlib import contextmanager
+
+from bookkeeper.repository.abstract_repository import AbstractRepository, unit_of_work
 
 import pytest
 
@@ -18,3 +20,59 @@ def test_can_create_subclass():
 
     t = Test()
     assert isinstance(t, AbstractRepository)
+
+
+def test_default_batch_methods():
+    class Test(AbstractRepository):
+        def __init__(self): self.calls = []
+
+        def add(self, obj):
+            self.calls.append(('add', obj))
+            return obj
+
+        def get(self, pk): pass
+        def get_all(self, where=None): pass
+        def update(self, obj): self.calls.append(('update', obj))
+        def delete(self, pk): self.calls.append(('delete', pk))
+
+    t = Test()
+    assert t.add_many([1, 2]) == [1, 2]
+    t.update_many([3])
+    t.delete_many([4, 5])
+    assert t.calls == [('add', 1), ('add', 2), ('update', 3),
+                       ('delete', 4), ('delete', 5)]
+
+
+def test_unit_of_work_enters_all_transactions():
+    events = []
+
+    class Test(AbstractRepository):
+        def __init__(self, name): self.name = name
+        def add(self, obj): pass
+        def get(self, pk): pass
+        def get_all(self, where=None): pass
+        def update(self, obj): pass
+        def delete(self, pk): pass
+
+        @contextmanager
+        def transaction(self):
+            events.append(('begin', self.name))
+            try:
+                yield
+            except Exception:
+                events.append(('rollback', self.name))
+                raise
+            events.append(('commit', self.name))
+
+    uow = unit_of_work(Test('a'), Test('b'))
+    assert events == []
+    with uow:
+        events.append('work')
+    assert events == [('begin', 'a'), ('begin', 'b'), 'work',
+                      ('commit', 'b'), ('commit', 'a')]
+    events.clear()
+    with pytest.raises(ValueError):
+        with unit_of_work(Test('a'), Test('b')):
+            raise ValueError
+    assert events == [('begin', 'a'), ('begin', 'b'),
+                      ('rollback', 'b'), ('rollback', 'a')]
@@ -0,0 +1,146 @@
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.async_repository import (
+    AsyncAbstractRepository, AsyncMemoryRepository, AsyncRepositoryAdapter,
+    AsyncSQliteRepository, DatabaseThread
+)
+from bookkeeper.repository.memory_repository import MemoryRepository
+import asyncio
+import threading
+import pytest
+
+from datetime import datetime
+
+
+@pytest.fixture(params=["sqlite", "sqlite-memory", "memory"])
+def make_repo(request, tmp_path):
+    def make():
+        if request.param == "sqlite":
+            return AsyncSQliteRepository[Expense](tmp_path / "test.db", Expense)
+        if request.param == "sqlite-memory":
+            return AsyncSQliteRepository[Expense](":memory:", Expense)
+        return AsyncMemoryRepository[Expense]()
+
+    repos = []
+    yield lambda: repos.append(make()) or repos[-1]
+    for repo in repos:
+        if hasattr(repo, "close"):
+            repo.close()
+
+
+def expense(amount, category=1):
+    return Expense(amount, category, expense_date=datetime(2023, 1, 5),
+                   added_date=datetime(2023, 1, 5))
+
+
+def test_crud(make_repo):
+    async def main():
+        repo = make_repo()
+        obj = expense(100)
+        pk = await repo.add(obj)
+        assert obj.pk == pk
+        assert await repo.get(pk) == obj
+        obj2 = expense(200)
+        obj2.pk = pk
+        await repo.update(obj2)
+        assert await repo.get(pk) == obj2
+        await repo.delete(pk)
+        assert await repo.get(pk) is None
+
+    asyncio.run(main())
+
+
+def test_get_all_and_iter_all(make_repo):
+    async def main():
+        repo = make_repo()
+        for i in range(10):
+            await repo.add(expense(i, category=i % 2))
+        objs = await repo.get_all({"category": 1}, order_by="-amount", limit=3)
+        assert [obj.amount for obj in objs] == [9, 7, 5]
+        amounts = [obj.amount async for obj in repo.iter_all(batch_size=3)]
+        assert sorted(amounts) == list(range(10))
+        amounts = [obj.amount async for obj in repo.iter_all({"amount__lt": 4},
+                                                             order_by="amount")]
+        assert amounts == [0, 1, 2, 3]
+
+    asyncio.run(main())
+
+
+def test_errors_are_raised_in_coroutine(make_repo):
+    async def main():
+        repo = make_repo()
+        with pytest.raises(ValueError):
+            await repo.update(expense(1))
+        with pytest.raises(KeyError):
+            await repo.delete(1)
+
+    asyncio.run(main())
+
+
+def test_concurrent_coroutines(make_repo):
+    async def main():
+        repo = make_repo()
+        pks = await asyncio.gather(*(repo.add(expense(i)) for i in range(50)))
+        assert sorted(pks) == list(range(1, 51))
+        objs = await asyncio.gather(*(repo.get(pk) for pk in pks))
+        assert [obj.amount for obj in objs] == list(range(50))
+
+    asyncio.run(main())
+
+
+def test_calls_run_in_database_thread(tmp_path):
+    async def main():
+        thread = DatabaseThread()
+        release = threading.Event()
+        slow = thread.call(release.wait)
+        ticks = 0
+        while ticks < 5:
+            await asyncio.sleep(0)
+            ticks += 1
+        assert not slow.done()
+        release.set()
+        assert await slow
+        assert await thread.call(threading.get_ident) != threading.get_ident()
+        thread.close()
+        with pytest.raises(RuntimeError):
+            thread.call(int)
+
+    asyncio.run(main())
+
+
+def test_adapter_shares_thread(tmp_path):
+    async def main():
+        thread = DatabaseThread()
+        first = AsyncRepositoryAdapter[Expense](MemoryRepository(), thread)
+        second = AsyncRepositoryAdapter[Expense](MemoryRepository(), thread)
+        await first.add(expense(1))
+        await second.add_many([expense(2), expense(3)])
+        assert await first.run(lambda repo: repo.count()) == 1
+        assert await second.run(lambda repo: repo.count()) == 2
+        first.close()
+        assert await second.get(1) is not None
+        thread.close()
+
+    asyncio.run(main())
+
+
+def test_can_create_subclass():
+    class Test(AsyncAbstractRepository):
+        async def add(self, obj):
+            pass
+
+        async def get(self, pk):
+            pass
+
+        async def get_all(self, where=None, *, order_by=None, limit=None, offset=0):
+            return [1, 2]
+
+        async def update(self, obj):
+            pass
+
+        async def delete(self, pk):
+            pass
+
+    async def main():
+        return [obj async for obj in Test().iter_all()]
+
+    assert asyncio.run(main()) == [1, 2]
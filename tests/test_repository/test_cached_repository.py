@@ -0,0 +1,139 @@
+from bookkeeper.models.category import Category
+from bookkeeper.repository.cached_repository import CacheStats, CachedRepository
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+import pytest
+
+
+class CountingRepository(MemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+        self.queries = 0
+
+    def get(self, pk):
+        self.gets += 1
+        return super().get(pk)
+
+    def get_all(self, where=None, **kwargs):
+        self.queries += 1
+        return super().get_all(where, **kwargs)
+
+
+@pytest.fixture
+def inner():
+    return CountingRepository()
+
+
+@pytest.fixture
+def repo(inner):
+    return CachedRepository(inner, maxsize=3, max_queries=2)
+
+
+def test_crud(repo, inner):
+    cat = Category("food")
+    pk = repo.add(cat)
+    assert inner.get(pk) is cat
+    assert repo.get(pk) is cat
+    cat2 = Category("drinks", pk=pk)
+    repo.update(cat2)
+    assert repo.get(pk) is cat2
+    repo.delete(pk)
+    assert repo.get(pk) is None
+    assert inner.get(pk) is None
+
+
+def test_get_is_cached(repo, inner):
+    pk = inner.add(Category("food"))
+    repo.get(pk)
+    repo.get(pk)
+    repo.get(pk)
+    assert inner.gets == 1
+    assert repo.object_stats == CacheStats(hits=2, misses=1)
+    assert repo.object_stats.hit_rate == pytest.approx(2 / 3)
+
+
+def test_lru_eviction(repo, inner):
+    pks = [inner.add(Category(str(i))) for i in range(4)]
+    for pk in pks[:3]:
+        repo.get(pk)
+    repo.get(pks[0])
+    repo.get(pks[3])
+    assert repo.object_stats.evictions == 1
+    inner.gets = 0
+    repo.get(pks[0])
+    assert inner.gets == 0
+    repo.get(pks[1])
+    assert inner.gets == 1
+
+
+def test_get_all_is_cached_until_write(repo, inner):
+    repo.add(Category("food"))
+    assert [c.name for c in repo.get_all({"name": "food"})] == ["food"]
+    repo.get_all({"name": "food"})
+    assert inner.queries == 1
+    result = repo.get_all({"name": "food"})
+    result.clear()
+    assert len(repo.get_all({"name": "food"})) == 1
+    repo.add(Category("food"))
+    assert len(repo.get_all({"name": "food"})) == 2
+    assert inner.queries == 2
+    assert repo.query_stats.hits == 3
+
+
+def test_get_all_key_includes_paging(repo, inner):
+    for name in "abc":
+        repo.add(Category(name))
+    assert [c.name for c in repo.get_all(order_by="-name", limit=1)] == ["c"]
+    assert [c.name for c in repo.get_all(order_by="name", limit=1)] == ["a"]
+    assert [c.name for c in repo.get_all({"name__in": ["a", "b"]})] == ["a", "b"]
+    assert [c.name for c in repo.get_all({"name__in": ["a", "b"]})] == ["a", "b"]
+    assert repo.query_stats.evictions == 1
+    assert repo.query_stats.hits == 1
+
+
+def test_get_all_not_cached_by_default(inner):
+    repo = CachedRepository(inner)
+    repo.get_all()
+    repo.get_all()
+    assert inner.queries == 2
+
+
+def test_get_all_fills_object_cache(repo, inner):
+    pk = inner.add(Category("food"))
+    repo.get_all()
+    repo.get(pk)
+    assert inner.gets == 0
+
+
+def test_batch_writes(repo, inner):
+    cats = [Category("a"), Category("b")]
+    repo.add_many(cats)
+    assert repo.get(cats[0].pk) is cats[0]
+    repo.delete_many([cat.pk for cat in cats])
+    assert repo.get(cats[0].pk) is None
+    assert repo.get_all() == []
+
+
+def test_update_where_clears_cache(repo):
+    cat = Category("a", parent=1)
+    repo.add(cat)
+    repo.get_all({"parent": 1})
+    assert repo.update_where({"parent": 1}, {"parent": None}) == 1
+    assert repo.get_all({"parent": 1}) == []
+
+
+def test_rollback_clears_cache(tmp_path):
+    repo = CachedRepository(SQliteRepository(tmp_path / "test.db", Category))
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            cat = Category("food")
+            repo.add(cat)
+            raise RuntimeError
+    assert repo.get(cat.pk) is None
+
+
+def test_negative_size(inner):
+    with pytest.raises(ValueError):
+        CachedRepository(inner, maxsize=-1)
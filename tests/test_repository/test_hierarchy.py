@@ -0,0 +1,116 @@
+from bookkeeper.models.category import Category
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.hierarchy import Ancestors, HierarchyQuery, Subtree
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.sqlite_connection import ConnectionPool
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+
+import pytest
+
+TREE = [
+    ("food", None),
+    ("meat", "food"),
+    ("beef", "meat"),
+    ("pork", "meat"),
+    ("fruit", "food"),
+    ("home", None),
+]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repos(request, tmp_path):
+    if request.param == "memory":
+        cat_repo = MemoryRepository[Category]()
+        exp_repo = MemoryRepository[Expense]()
+    else:
+        pool = ConnectionPool(tmp_path / "test.db")
+        cat_repo = SQliteRepository[Category](pool, Category, indexes=["parent"])
+        exp_repo = SQliteRepository[Expense](pool, Expense)
+    cats = {cat.name: cat.pk for cat in Category.create_from_tree(TREE, cat_repo)}
+    for name, amount in [("food", 1), ("meat", 10), ("beef", 100),
+                         ("fruit", 1000), ("home", 10000)]:
+        exp_repo.add(Expense(amount, cats[name]))
+    yield cat_repo, exp_repo, cats
+    if request.param == "sqlite":
+        pool.close()
+
+
+def names(cat_repo, pks):
+    return {cat_repo.get(pk).name for pk in pks}
+
+
+def test_subtree(repos):
+    cat_repo, _, cats = repos
+    assert names(cat_repo, Subtree(cat_repo, cats["meat"])) == {"meat", "beef", "pork"}
+    result = cat_repo.get_all({"pk__in": Subtree(cat_repo, cats["food"],
+                                                 include_root=False)})
+    assert {cat.name for cat in result} == {"meat", "beef", "pork", "fruit"}
+
+
+def test_ancestors(repos):
+    cat_repo, _, cats = repos
+    assert list(Ancestors(cat_repo, cats["beef"], include_root=False)) == [
+        cats["meat"], cats["food"]
+    ]
+    result = cat_repo.get_all({"pk__in": Ancestors(cat_repo, cats["beef"])})
+    assert {cat.name for cat in result} == {"beef", "meat", "food"}
+
+
+def test_missing_root(repos):
+    cat_repo, exp_repo, _ = repos
+    assert list(Subtree(cat_repo, 100)) == []
+    assert exp_repo.get_all({"category__in": Ancestors(cat_repo, 100)}) == []
+
+
+def test_expenses_of_subtree(repos):
+    cat_repo, exp_repo, cats = repos
+    where = {"category__in": Subtree(cat_repo, cats["food"])}
+    assert exp_repo.count(where) == 4
+    assert exp_repo.sum("amount", where) == 1111
+    meat = Subtree(cat_repo, cats["meat"])
+    assert exp_repo.sum("amount", {"category__in": meat}) == 110
+
+
+def test_sqlite_compiles_to_single_query(tmp_path, monkeypatch):
+    pool = ConnectionPool(tmp_path / "test.db")
+    cat_repo = SQliteRepository[Category](pool, Category)
+    exp_repo = SQliteRepository[Expense](tmp_path / "test.db", Expense)
+    cats = {cat.name: cat.pk for cat in Category.create_from_tree(TREE, cat_repo)}
+    exp_repo.add(Expense(5, cats["beef"]))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("hierarchy evaluated in Python")
+
+    monkeypatch.setattr(cat_repo, "get", fail)
+    monkeypatch.setattr(cat_repo, "get_all", fail)
+    assert exp_repo.sum("amount", {"category__in": Subtree(cat_repo, cats["food"])}) == 5
+    assert exp_repo.count({"category__in": Ancestors(cat_repo, cats["beef"])}) == 1
+    exp_repo.close()
+    pool.close()
+
+
+def test_sqlite_other_database_falls_back(tmp_path):
+    cat_repo = MemoryRepository[Category]()
+    exp_repo = SQliteRepository[Expense](tmp_path / "test.db", Expense)
+    cats = {cat.name: cat.pk for cat in Category.create_from_tree(TREE, cat_repo)}
+    exp_repo.add(Expense(5, cats["beef"]))
+    exp_repo.add(Expense(7, cats["home"]))
+    assert exp_repo.sum("amount", {"category__in": Subtree(cat_repo, cats["food"])}) == 5
+    exp_repo.close()
+
+
+def test_cycle_terminates(repos):
+    cat_repo, _, cats = repos
+    food = cat_repo.get(cats["food"])
+    food.parent = cats["beef"]
+    cat_repo.update(food)
+    assert names(cat_repo, Subtree(cat_repo, cats["meat"])) == {
+        "meat", "beef", "pork", "food", "fruit"
+    }
+    result = cat_repo.get_all({"pk__in": Ancestors(cat_repo, cats["meat"])})
+    assert {cat.name for cat in result} == {"meat", "food", "beef"}
+
+
+def test_base_query_is_abstract():
+    with pytest.raises(TypeError):
+        HierarchyQuery(MemoryRepository[Category](), 1)
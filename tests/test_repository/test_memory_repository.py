@@ -1,4 +1,11 @@
+from datetime import datetime
+from inspect import isgenerator
+from types import SimpleNamespace
+
+from bookkeeper.models.category import Category
+from bookkeeper.models.expense import Expense
 from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.repository.sqlite_repository import SQliteRepository
 
 import pytest
 
@@ -69,3 +76,225 @@ def test_get_all_with_condition(repo, custom_class):
         objects.append(o)
     assert repo.get_all({'name': '0'}) == [objects[0]]
     assert repo.get_all({'test': 'test'}) == objects
+
+
+def test_add_many(repo, custom_class):
+    objects = [custom_class() for i in range(5)]
+    pks = repo.add_many(objects)
+    assert pks == [o.pk for o in objects]
+    assert len(set(pks)) == 5
+    assert repo.get_all() == objects
+
+
+def test_cannot_add_many_with_pk(repo, custom_class):
+    objects = [custom_class() for i in range(3)]
+    objects[1].pk = 1
+    with pytest.raises(ValueError):
+        repo.add_many(objects)
+    assert repo.get_all() == []
+    assert objects[0].pk == 0
+
+
+def test_update_many(repo, custom_class):
+    objects = [custom_class() for i in range(3)]
+    repo.add_many(objects)
+    updated = []
+    for o in objects:
+        new = custom_class()
+        new.pk = o.pk
+        new.test = 'new'
+        updated.append(new)
+    repo.update_many(updated)
+    assert [repo.get(o.pk) for o in objects] == updated
+
+
+def test_delete_many(repo, custom_class):
+    objects = [custom_class() for i in range(5)]
+    repo.add_many(objects)
+    repo.delete_many([objects[1].pk, objects[3].pk])
+    assert repo.get_all() == [objects[0], objects[2], objects[4]]
+
+
+def test_cannot_delete_many_unexistent(repo, custom_class):
+    obj = custom_class()
+    repo.add(obj)
+    with pytest.raises(KeyError):
+        repo.delete_many([obj.pk, obj.pk + 1])
+    assert repo.get_all() == [obj]
+
+
+def test_iter_all(repo, custom_class):
+    objects = []
+    for i in range(5):
+        o = custom_class()
+        o.name = str(i % 2)
+        repo.add(o)
+        objects.append(o)
+    gen = repo.iter_all()
+    assert isgenerator(gen)
+    assert list(gen) == objects
+    assert list(repo.iter_all({'name': '1'})) == [objects[1], objects[3]]
+
+
+@pytest.fixture
+def expense_repo():
+    return MemoryRepository[Expense]()
+
+
+@pytest.fixture
+def expenses():
+    return [
+        Expense(100, 1, datetime(2023, 1, 1, 12), datetime(2023, 1, 5)),
+        Expense(200, 2, datetime(2023, 1, 2, 12), datetime(2023, 1, 5)),
+        Expense(300, 1, datetime(2023, 1, 3, 12), datetime(2023, 1, 5)),
+        Expense(400, 2, datetime(2023, 1, 4, 12), datetime(2023, 1, 5)),
+    ]
+
+
+def test_get_all_with_range(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(
+        {"expense_date__ge": datetime(2023, 1, 2),
+         "expense_date__lt": datetime(2023, 1, 4)}
+    ) == expenses[1:3]
+    assert expense_repo.get_all({"amount__gt": 100, "category": 1}) == [expenses[2]]
+
+
+def test_aggregates(expense_repo, expenses):
+    assert expense_repo.count() == 0
+    assert expense_repo.sum("amount") == 0
+    assert expense_repo.sum_by("amount", "category") == {}
+    expense_repo.add_many(expenses)
+    assert expense_repo.count() == 4
+    assert expense_repo.count({"category": 2}) == 2
+    assert expense_repo.sum("amount") == 1000
+    assert expense_repo.sum("amount", {"expense_date__ge": datetime(2023, 1, 3)}) == 700
+    assert expense_repo.sum_by("amount", "category") == {1: 400, 2: 600}
+    assert expense_repo.sum_by(
+        "amount", "category", {"expense_date__le": datetime(2023, 1, 2, 12)}
+    ) == {1: 100, 2: 200}
+
+
+def test_get_all_with_operators(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(
+        {"expense_date__between": (datetime(2023, 1, 2), datetime(2023, 1, 3, 12))}
+    ) == expenses[1:3]
+    assert expense_repo.get_all({"amount__in": [100, 400, 500]}) == [
+        expenses[0], expenses[3]
+    ]
+    assert expense_repo.get_all({"amount__in": []}) == []
+    expenses[1].comment = "Хлеб и молоко"
+    expense_repo.update(expenses[1])
+    assert expense_repo.get_all({"comment__like": "%молоко"}) == [expenses[1]]
+    assert expense_repo.get_all({"comment__like": "Хлеб%"}) == [expenses[1]]
+    # как и в sqlite, регистр не учитывается только для латинских букв
+    assert expense_repo.get_all({"comment__like": "хлеб%"}) == []
+    expenses[2].comment = "Milk"
+    expense_repo.update(expenses[2])
+    assert expense_repo.get_all({"comment__like": "mIL_"}) == [expenses[2]]
+
+
+def test_get_all_ordered_and_paged(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(order_by="-amount") == expenses[::-1]
+    assert expense_repo.get_all(order_by=["category", "-expense_date"]) == [
+        expenses[2], expenses[0], expenses[3], expenses[1]
+    ]
+    assert expense_repo.get_all(order_by="pk", limit=2, offset=1) == expenses[1:3]
+    assert expense_repo.get_all(offset=3) == expenses[3:]
+    assert list(expense_repo.iter_all(
+        {"category": 2}, batch_size=1, order_by="-pk", limit=1
+    )) == [expenses[3]]
+
+
+@pytest.fixture
+def indexed_repo():
+    return MemoryRepository[Expense](indexes=["category"],
+                                     sorted_indexes=["expense_date", "amount"])
+
+
+def test_indexed_queries(indexed_repo, expenses):
+    indexed_repo.add_many(expenses)
+    assert indexed_repo.get_all({"category": 2}) == [expenses[1], expenses[3]]
+    assert indexed_repo.get_all({"category": 3}) == []
+    assert indexed_repo.get_all({"category__in": [1, 2]}) == expenses
+    assert indexed_repo.get_all(
+        {"expense_date__ge": datetime(2023, 1, 2),
+         "expense_date__lt": datetime(2023, 1, 4)}
+    ) == expenses[1:3]
+    assert indexed_repo.get_all({"amount__gt": 200}) == expenses[2:]
+    assert indexed_repo.get_all({"amount__le": 200}) == expenses[:2]
+    assert indexed_repo.get_all({"amount__between": (200, 300), "category": 1}) == [
+        expenses[2]
+    ]
+    assert indexed_repo.sum("amount", {"category": 1}) == 400
+
+
+def test_indexes_follow_changes(indexed_repo, expenses):
+    indexed_repo.add_many(expenses)
+    expenses[0].category = 2
+    expenses[0].amount = 1000
+    indexed_repo.update(expenses[0])
+    assert indexed_repo.get_all({"category": 1}) == [expenses[2]]
+    assert indexed_repo.get_all({"category": 2}) == [
+        expenses[0], expenses[1], expenses[3]
+    ]
+    assert indexed_repo.get_all({"amount__ge": 400}) == [expenses[0], expenses[3]]
+    indexed_repo.delete(expenses[3].pk)
+    indexed_repo.delete_many([expenses[1].pk])
+    assert indexed_repo.get_all({"category": 2}) == [expenses[0]]
+    assert indexed_repo.get_all({"amount__ge": 400}) == [expenses[0]]
+    assert indexed_repo._hash_indexes["category"] == {1: {3}, 2: {1}}
+    assert indexed_repo._sorted_indexes["amount"] == [(300, 3), (1000, 1)]
+
+
+def test_indexed_in_with_generator(indexed_repo, expenses):
+    indexed_repo.add_many(expenses)
+    assert indexed_repo.get_all({"category__in": (c for c in [1])}) == [
+        expenses[0], expenses[2]
+    ]
+    assert indexed_repo.get_all({"amount__in": iter([100, 400]),
+                                 "category__in": (c for c in [2])}) == [expenses[3]]
+
+
+def test_hash_index_with_none():
+    repo = MemoryRepository(indexes=["parent"], sorted_indexes=["parent"])
+    objs = [SimpleNamespace(pk=0, parent=None), SimpleNamespace(pk=0, parent=1)]
+    repo.add_many(objs)
+    assert repo.get_all({"parent": None}) == [objs[0]]
+    assert repo.get_all({"parent__ge": 0}) == [objs[1]]
+
+
+def test_update_where(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    values = {"category": 0, "comment": "x"}
+    assert expense_repo.update_where({"category": 1}, values) == 2
+    assert [e.category for e in expense_repo.get_all()] == [0, 2, 0, 2]
+    assert expense_repo.count({"comment": "x"}) == 2
+    assert expense_repo.update_where({"category": 5}, {"category": 0}) == 0
+    assert expense_repo.update_where(None, {"amount": 1}) == 4
+    assert expense_repo.sum("amount") == 4
+
+
+def test_update_where_keeps_indexes(indexed_repo, expenses):
+    indexed_repo.add_many(expenses)
+    indexed_repo.update_where({"category__in": [1]}, {"category": 0})
+    assert indexed_repo.get_all({"category": 0}) == [expenses[0], expenses[2]]
+    assert indexed_repo.get_all({"category": 1}) == []
+
+
+@pytest.mark.parametrize("where", [
+    {"parent__lt": 5}, {"parent__ge": 1}, {"parent__between": (0, 10)},
+    {"name__like": "%"},
+])
+def test_none_fails_range_conditions_like_sqlite(tmp_path, where):
+    results = []
+    for repo in [MemoryRepository[Category](),
+                 SQliteRepository[Category](tmp_path / "test.db", Category)]:
+        root = Category("food")
+        repo.add(root)
+        repo.add_many([Category("meat", root.pk), Category("fruit", root.pk),
+                       Category(None)])
+        results.append([cat.pk for cat in repo.get_all(where)])
+    assert results[0] == results[1]
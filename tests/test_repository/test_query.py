@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bookkeeper.repository.query import make_predicate, order_and_slice, parse_condition
+
+
+def test_parse_condition():
+    assert parse_condition('name') == ('name', 'eq')
+    assert parse_condition('expense_date__ge') == ('expense_date', 'ge')
+
+
+def test_parse_unknown_operator():
+    with pytest.raises(ValueError):
+        parse_condition('name__approx')
+
+
+def test_make_predicate():
+    obj = SimpleNamespace(name='a', value=5)
+    assert make_predicate(None)(obj)
+    assert make_predicate({'name': 'a', 'value__ge': 5})(obj)
+    assert make_predicate({'value__gt': 4, 'value__lt': 6})(obj)
+    assert not make_predicate({'value__lt': 5})(obj)
+    assert not make_predicate({'name': 'b', 'value__le': 5})(obj)
+
+
+def test_make_predicate_between_in_like():
+    obj = SimpleNamespace(name='Продукты', value=5)
+    assert make_predicate({'value__between': (5, 6)})(obj)
+    assert not make_predicate({'value__between': (6, 7)})(obj)
+    assert make_predicate({'value__in': [1, 5]})(obj)
+    assert not make_predicate({'value__in': []})(obj)
+    assert make_predicate({'name__like': 'Прод%'})(obj)
+    assert not make_predicate({'name__like': 'прод%'})(obj)
+    assert make_predicate({'name__like': 'mILK'})(SimpleNamespace(name='Milk'))
+    assert make_predicate({'name__like': '_родукт_'})(obj)
+    assert not make_predicate({'name__like': 'прод'})(obj)
+    assert not make_predicate({'name__like': '.*'})(obj)
+
+
+def test_order_and_slice():
+    objs = [SimpleNamespace(a=a, b=b) for a, b in [(1, 2), (None, 1), (1, 1), (0, 3)]]
+    assert list(order_and_slice(objs)) == objs
+    assert list(order_and_slice(objs, 'a')) == [objs[1], objs[3], objs[0], objs[2]]
+    assert list(order_and_slice(objs, ['a', '-b'])) == [objs[1], objs[3],
+                                                        objs[0], objs[2]]
+    assert list(order_and_slice(objs, ['-a', 'b'])) == [objs[2], objs[0],
+                                                        objs[3], objs[1]]
+    assert list(order_and_slice(objs, limit=2, offset=1)) == objs[1:3]
+    assert list(order_and_slice(objs, 'b', offset=3)) == [objs[3]]
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+from bookkeeper.repository.sqlite_connection import (
+    ConnectionPool, PragmaProfile, FAST_PROFILE
+)
+
+
+def test_same_connection_in_thread(tmp_path):
+    with ConnectionPool(tmp_path / "test.db") as pool:
+        assert pool.connection() is pool.connection()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert other[0] is not pool.connection()
+
+
+def test_closed_pool(tmp_path):
+    pool = ConnectionPool(tmp_path / "test.db")
+    con = pool.connection()
+    pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.connection()
+
+
+def test_foreign_keys_enabled(tmp_path):
+    with ConnectionPool(tmp_path / "test.db") as pool:
+        assert pool.connection().execute("PRAGMA foreign_keys").fetchone() == (1,)
+
+
+def test_profile_applied(tmp_path):
+    with ConnectionPool(tmp_path / "test.db", FAST_PROFILE) as pool:
+        con = pool.connection()
+        assert con.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        assert con.execute("PRAGMA synchronous").fetchone() == (1,)
+        assert con.execute("PRAGMA cache_size").fetchone() == (-64000,)
+        assert con.execute("PRAGMA temp_store").fetchone() == (2,)
+
+
+def test_profile_statements():
+    assert PragmaProfile().statements() == []
+    assert PragmaProfile(synchronous="OFF", mmap_size=0).statements() == [
+        "PRAGMA synchronous = OFF", "PRAGMA mmap_size = 0"
+    ]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"journal_mode": "WAL; DROP TABLE Expense"},
+    {"synchronous": "sometimes"},
+    {"cache_size": "1000"},
+])
+def test_profile_rejects_unknown_values(kwargs):
+    with pytest.raises(ValueError):
+        PragmaProfile(**kwargs)
+
+
+def test_transaction_commits_once(tmp_path):
+    path = tmp_path / "test.db"
+    with ConnectionPool(path) as pool:
+        pool.connection().execute("CREATE TABLE t (x INTEGER)")
+        with pool.transaction() as con:
+            con.execute("INSERT INTO t VALUES (1)")
+            with pool.transaction() as inner:
+                assert inner is con
+                inner.execute("INSERT INTO t VALUES (2)")
+            with sqlite3.connect(path) as other:
+                assert other.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+            other.close()
+        assert con.execute("SELECT COUNT(*) FROM t").fetchone() == (2,)
+
+
+def test_transaction_rollback(tmp_path):
+    with ConnectionPool(tmp_path / "test.db") as pool:
+        con = pool.connection()
+        con.execute("CREATE TABLE t (x INTEGER)")
+        with pool.transaction():
+            con.execute("INSERT INTO t VALUES (1)")
+            with pytest.raises(ValueError):
+                with pool.transaction():
+                    con.execute("INSERT INTO t VALUES (2)")
+                    raise ValueError
+        assert con.execute("SELECT x FROM t").fetchall() == [(1,)]
+        with pytest.raises(ValueError):
+            with pool.transaction():
+                con.execute("INSERT INTO t VALUES (3)")
+                raise ValueError
+        assert con.execute("SELECT x FROM t").fetchall() == [(1,)]
+        assert not con.in_transaction
@@ -1,7 +1,14 @@
-from bookkeeper.repository.sqlite_repository import SQliteRepository
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.abstract_repository import unit_of_work
+from bookkeeper.repository.sqlite_repository import Index, SQliteRepository
+from bookkeeper.repository.sqlite_connection import ConnectionPool, FAST_PROFILE
+import sqlite3
+import threading
 import pytest
 
 from dataclasses import dataclass
+from datetime import datetime
+from inspect import isgenerator
 
 
 @pytest.fixture
@@ -74,3 +81,338 @@ def test_get_all_with_condition(repo, custom_class):
         objects.append(o)
     assert repo.get_all({"shop": "test"}) == objects
     assert repo.get_all({"it": 42}) == [objects[-1]]
+
+
+def test_shared_pool(tmp_path, custom_class):
+    with ConnectionPool(tmp_path / "test_data.db") as pool:
+        repo1 = SQliteRepository(pool, custom_class)
+        repo2 = SQliteRepository(pool, custom_class)
+        obj = custom_class(shop="shared")
+        repo1.add(obj)
+        assert repo2.get(obj.pk) == obj
+        repo1.close()
+        assert repo2.get(obj.pk) == obj
+
+
+def test_close(tmp_path, custom_class):
+    with SQliteRepository(tmp_path / "test_data.db", custom_class) as repo:
+        repo.add(custom_class())
+    with pytest.raises(sqlite3.ProgrammingError):
+        repo.get_all()
+
+
+def test_connection_per_thread(tmp_path, custom_class):
+    with ConnectionPool(tmp_path / "test_data.db") as pool:
+        repo = SQliteRepository(pool, custom_class)
+        obj = custom_class(it=1)
+        repo.add(obj)
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append((pool.connection(), repo.get(obj.pk)))
+        )
+        thread.start()
+        thread.join()
+        assert result[0][0] is not pool.connection()
+        assert result[0][1] == obj
+
+
+def test_add_many(repo, custom_class):
+    objects = [custom_class() for i in range(5)]
+    pks = repo.add_many(objects)
+    assert pks == [o.pk for o in objects]
+    assert len(set(pks)) == 5
+    assert repo.get_all() == objects
+
+
+def test_cannot_add_many_with_pk(repo, custom_class):
+    objects = [custom_class() for i in range(3)]
+    objects[1].pk = 1
+    with pytest.raises(ValueError):
+        repo.add_many(objects)
+    assert repo.get_all() == []
+    assert objects[0].pk == 0
+
+
+def test_update_many(repo, custom_class):
+    objects = [custom_class() for i in range(3)]
+    repo.add_many(objects)
+    updated = [custom_class(pk=o.pk, shop="new", it=i) for i, o in enumerate(objects)]
+    repo.update_many(updated)
+    assert [repo.get(o.pk) for o in objects] == updated
+
+
+def test_cannot_update_many_unexistent(repo, custom_class):
+    obj = custom_class()
+    repo.add(obj)
+    with pytest.raises(ValueError):
+        repo.update_many([custom_class(pk=obj.pk, it=1), custom_class(pk=obj.pk + 1)])
+    assert repo.get(obj.pk) == obj
+
+
+def test_delete_many(repo, custom_class):
+    objects = [custom_class() for i in range(5)]
+    repo.add_many(objects)
+    repo.delete_many([objects[1].pk, objects[3].pk])
+    assert repo.get_all() == [objects[0], objects[2], objects[4]]
+
+
+def test_cannot_delete_many_unexistent(repo, custom_class):
+    obj = custom_class()
+    repo.add(obj)
+    with pytest.raises(KeyError):
+        repo.delete_many([obj.pk, obj.pk + 1])
+    assert repo.get_all() == [obj]
+
+
+def test_iter_all(repo, custom_class):
+    objects = [custom_class(it=i % 3) for i in range(10)]
+    repo.add_many(objects)
+    gen = repo.iter_all(batch_size=3)
+    assert isgenerator(gen)
+    assert list(gen) == objects
+    assert list(repo.iter_all({"it": 0}, batch_size=2)) == objects[::3]
+
+
+@pytest.fixture
+def expense_repo(tmp_path):
+    return SQliteRepository[Expense](tmp_path / "test_data.db", Expense)
+
+
+@pytest.fixture
+def expenses():
+    return [
+        Expense(100, 1, datetime(2023, 1, 1, 12), datetime(2023, 1, 5)),
+        Expense(200, 2, datetime(2023, 1, 2, 12), datetime(2023, 1, 5)),
+        Expense(300, 1, datetime(2023, 1, 3, 12), datetime(2023, 1, 5)),
+        Expense(400, 2, datetime(2023, 1, 4, 12), datetime(2023, 1, 5)),
+    ]
+
+
+def test_get_all_with_range(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(
+        {"expense_date__ge": datetime(2023, 1, 2),
+         "expense_date__lt": datetime(2023, 1, 4)}
+    ) == expenses[1:3]
+    assert expense_repo.get_all({"amount__gt": 100, "category": 1}) == [expenses[2]]
+
+
+def test_aggregates(expense_repo, expenses):
+    assert expense_repo.count() == 0
+    assert expense_repo.sum("amount") == 0
+    assert expense_repo.sum_by("amount", "category") == {}
+    expense_repo.add_many(expenses)
+    assert expense_repo.count() == 4
+    assert expense_repo.count({"category": 2}) == 2
+    assert expense_repo.sum("amount") == 1000
+    assert expense_repo.sum("amount", {"expense_date__ge": datetime(2023, 1, 3)}) == 700
+    assert expense_repo.sum_by("amount", "category") == {1: 400, 2: 600}
+    assert expense_repo.sum_by(
+        "amount", "category", {"expense_date__le": datetime(2023, 1, 2, 12)}
+    ) == {1: 100, 2: 200}
+
+
+def test_get_all_with_operators(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(
+        {"expense_date__between": (datetime(2023, 1, 2), datetime(2023, 1, 3, 12))}
+    ) == expenses[1:3]
+    assert expense_repo.get_all({"amount__in": [100, 400, 500]}) == [
+        expenses[0], expenses[3]
+    ]
+    assert expense_repo.get_all({"amount__in": []}) == []
+    expenses[1].comment = "Хлеб и молоко"
+    expense_repo.update(expenses[1])
+    assert expense_repo.get_all({"comment__like": "%молоко"}) == [expenses[1]]
+    assert expense_repo.get_all({"comment__like": "Хлеб%"}) == [expenses[1]]
+    # как и в sqlite, регистр не учитывается только для латинских букв
+    assert expense_repo.get_all({"comment__like": "хлеб%"}) == []
+    expenses[2].comment = "Milk"
+    expense_repo.update(expenses[2])
+    assert expense_repo.get_all({"comment__like": "mIL_"}) == [expenses[2]]
+
+
+def test_get_all_ordered_and_paged(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all(order_by="-amount") == expenses[::-1]
+    assert expense_repo.get_all(order_by=["category", "-expense_date"]) == [
+        expenses[2], expenses[0], expenses[3], expenses[1]
+    ]
+    assert expense_repo.get_all(order_by="pk", limit=2, offset=1) == expenses[1:3]
+    assert expense_repo.get_all(offset=3) == expenses[3:]
+    assert list(expense_repo.iter_all(
+        {"category": 2}, batch_size=1, order_by="-pk", limit=1
+    )) == [expenses[3]]
+
+
+def query_plan(path, sql, params=()):
+    with sqlite3.connect(path) as con:
+        plan = con.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    con.close()
+    return " ".join(row[-1] for row in plan)
+
+
+def test_indexes(tmp_path, custom_class):
+    path = tmp_path / "test_data.db"
+    indexes = ["shop", ("it", "expen"), Index(("expen",), unique=True)]
+    repo = SQliteRepository(path, custom_class, indexes=indexes)
+    repo.close()
+    # second start must not fail on existing indexes
+    repo = SQliteRepository(path, custom_class, indexes=indexes)
+    assert "USING INDEX ix_Custom_shop" in query_plan(
+        path, "SELECT * FROM Custom WHERE shop = ?", ("a",)
+    )
+    assert "USING INDEX ix_Custom_it_expen" in query_plan(
+        path, "SELECT * FROM Custom WHERE it = ? AND expen > ?", (1, 2.0)
+    )
+    repo.add(custom_class(expen=1.0))
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add(custom_class(expen=1.0))
+    repo.close()
+
+
+def test_unknown_index_field(tmp_path, custom_class):
+    with pytest.raises(ValueError):
+        SQliteRepository(tmp_path / "test_data.db", custom_class, indexes=["nope"])
+
+
+def test_expense_indexes_used(tmp_path):
+    path = tmp_path / "test_data.db"
+    repo = SQliteRepository[Expense](path, Expense,
+                                     indexes=["expense_date", "category"])
+    assert "USING INDEX ix_Expense_expense_date" in query_plan(
+        path, "SELECT SUM(amount) FROM Expense WHERE expense_date >= ?", ("2023",)
+    )
+    assert "USING INDEX ix_Expense_category" in query_plan(
+        path, "SELECT * FROM Expense WHERE category = ?", (1,)
+    )
+    repo.close()
+
+
+def test_plain_class_model(tmp_path):
+    class Plain:
+        pk: int
+        name: str
+        date: datetime
+
+        def __init__(self):
+            self.pk = 0
+            self.name = ""
+            self.date = datetime(2000, 1, 1)
+
+    repo = SQliteRepository(tmp_path / "test_data.db", Plain)
+    obj = Plain()
+    obj.name = "plain"
+    obj.date = datetime(2023, 5, 6, 7, 8, 9)
+    repo.add(obj)
+    [res] = repo.get_all()
+    assert isinstance(res, Plain)
+    assert (res.pk, res.name, res.date) == (obj.pk, obj.name, obj.date)
+
+
+def test_expense_round_trip(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    assert expense_repo.get_all() == expenses
+    assert expense_repo.get(expenses[2].pk) == expenses[2]
+
+
+@pytest.mark.parametrize("storage", ["text", "seconds", "microseconds"])
+def test_datetime_storage(tmp_path, expenses, storage):
+    path = tmp_path / "test_data.db"
+    repo = SQliteRepository[Expense](path, Expense, datetime_storage=storage)
+    expenses[0].expense_date = datetime(1969, 7, 20, 20, 17, 40)
+    repo.add_many(expenses)
+    assert repo.get_all() == expenses
+    assert repo.get_all(
+        {"expense_date__between": (datetime(2023, 1, 2), datetime(2023, 1, 3, 12))}
+    ) == expenses[1:3]
+    assert repo.get_all(order_by="-expense_date", limit=1) == [expenses[3]]
+    with sqlite3.connect(path) as con:
+        [(value,)] = con.execute("SELECT typeof(expense_date) FROM Expense LIMIT 1")
+    con.close()
+    assert value == ("text" if storage == "text" else "integer")
+
+
+def test_microseconds_are_kept(tmp_path):
+    repo = SQliteRepository[Expense](tmp_path / "test_data.db", Expense,
+                                     datetime_storage="microseconds")
+    exp = Expense(1, 1, datetime(2023, 1, 1, 1, 1, 1, 123456))
+    repo.add(exp)
+    assert repo.get(exp.pk) == exp
+
+
+@pytest.mark.parametrize("old, new", [
+    ("text", "seconds"), ("text", "microseconds"), ("seconds", "text"),
+    ("microseconds", "seconds"), ("seconds", "microseconds"),
+])
+def test_datetime_storage_migration(tmp_path, expenses, old, new):
+    path = tmp_path / "test_data.db"
+    with SQliteRepository[Expense](path, Expense, indexes=["expense_date"],
+                                   datetime_storage=old) as repo:
+        repo.add_many(expenses)
+    with SQliteRepository[Expense](path, Expense, indexes=["expense_date"],
+                                   datetime_storage=new) as repo:
+        assert repo.get_all() == expenses
+        assert repo.count({"expense_date__ge": datetime(2023, 1, 3)}) == 2
+        repo.add(Expense(500, 1, datetime(2023, 1, 5), datetime(2023, 1, 5)))
+    assert "USING INDEX ix_Expense_expense_date" in query_plan(
+        path, "SELECT * FROM Expense WHERE expense_date >= ?", (0,)
+    )
+
+
+def test_profile(tmp_path, custom_class):
+    path = tmp_path / "test_data.db"
+    with SQliteRepository(path, custom_class, profile=FAST_PROFILE) as repo:
+        repo.add(custom_class())
+        assert repo._connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    with ConnectionPool(path) as pool:
+        with pytest.raises(ValueError):
+            SQliteRepository(pool, custom_class, profile=FAST_PROFILE)
+
+
+def test_unit_of_work(tmp_path, custom_class):
+    with ConnectionPool(tmp_path / "test_data.db") as pool:
+        repo = SQliteRepository(pool, custom_class)
+        expense_repo = SQliteRepository[Expense](pool, Expense)
+        obj = custom_class(it=1)
+        repo.add(obj)
+        with unit_of_work(repo, expense_repo):
+            repo.delete(obj.pk)
+            expense_repo.add(Expense(100, 1))
+        assert repo.get_all() == []
+        assert expense_repo.count() == 1
+
+        with pytest.raises(KeyError):
+            with unit_of_work(repo, expense_repo):
+                expense_repo.add(Expense(200, 1))
+                repo.delete(obj.pk)
+        assert expense_repo.count() == 1
+
+
+def test_unit_of_work_begins_on_enter(tmp_path):
+    with ConnectionPool(tmp_path / "test_data.db") as pool:
+        expense_repo = SQliteRepository[Expense](pool, Expense)
+        uow = unit_of_work(expense_repo)
+        other = sqlite3.connect(tmp_path / "test_data.db", timeout=0)
+        other.execute("INSERT INTO expense (amount) VALUES (1)")
+        other.commit()
+        other.close()
+        with uow:
+            expense_repo.add(Expense(100, 1))
+        assert expense_repo.count() == 2
+
+
+def test_update_where(expense_repo, expenses):
+    expense_repo.add_many(expenses)
+    values = {"category": 0, "comment": "x"}
+    assert expense_repo.update_where({"category": 1}, values) == 2
+    assert [e.category for e in expense_repo.get_all()] == [0, 2, 0, 2]
+    assert expense_repo.count({"comment": "x"}) == 2
+    assert expense_repo.update_where({"category": 5}, {"category": 0}) == 0
+    assert expense_repo.update_where(None, {"amount": 1}) == 4
+    assert expense_repo.sum("amount") == 4
+
+
+def test_update_where_cannot_change_pk(expense_repo):
+    with pytest.raises(ValueError):
+        expense_repo.update_where(None, {"pk": 1})
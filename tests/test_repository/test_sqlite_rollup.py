@@ -0,0 +1,88 @@
+from datetime import date, datetime
+
+import pytest
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.sqlite_repository import SQliteRepository
+from bookkeeper.repository.sqlite_rollup import DailyRollup
+
+
+@pytest.fixture(params=["text", "seconds", "microseconds"])
+def repo(tmp_path, request):
+    return SQliteRepository[Expense](tmp_path / "test_data.db", Expense,
+                                     datetime_storage=request.param)
+
+
+@pytest.fixture
+def expenses():
+    return [
+        Expense(100, 1, datetime(2023, 1, 1, 10)),
+        Expense(200, 1, datetime(2023, 1, 1, 20)),
+        Expense(300, 2, datetime(2023, 1, 2, 12)),
+        Expense(400, 1, datetime(2023, 1, 3, 23, 59, 59)),
+    ]
+
+
+def test_existing_rows_are_counted(repo, expenses):
+    repo.add_many(expenses)
+    rollup = DailyRollup(repo)
+    assert rollup.daily() == [
+        (date(2023, 1, 1), 1, 300, 2),
+        (date(2023, 1, 2), 2, 300, 1),
+        (date(2023, 1, 3), 1, 400, 1),
+    ]
+
+
+def test_rollup_follows_changes(repo, expenses):
+    rollup = DailyRollup(repo)
+    repo.add_many(expenses)
+    assert rollup.total() == 1000
+    expenses[0].category = 2
+    expenses[0].amount = 150
+    repo.update(expenses[0])
+    repo.delete(expenses[3].pk)
+    repo.add(Expense(50, 3, datetime(2023, 1, 2)))
+    assert rollup.daily() == [
+        (date(2023, 1, 1), 1, 200, 1),
+        (date(2023, 1, 1), 2, 150, 1),
+        (date(2023, 1, 2), 2, 300, 1),
+        (date(2023, 1, 2), 3, 50, 1),
+    ]
+    repo.update_where({"category": 2}, {"category": 3})
+    assert rollup.total_by_group() == {1: 200, 3: 500}
+
+
+def test_queries(repo, expenses):
+    repo.add_many(expenses)
+    rollup = DailyRollup(repo)
+    assert rollup.total(since=date(2023, 1, 2)) == 700
+    assert rollup.total(date(2023, 1, 1), date(2023, 1, 2)) == 600
+    assert rollup.total(until=date(2023, 1, 2), group=1) == 300
+    assert rollup.total(group=1) == 700
+    assert rollup.total(since=date(2023, 2, 1)) == 0
+    assert rollup.total_by_group(since=date(2023, 1, 2)) == {1: 400, 2: 300}
+    assert rollup.daily(date(2023, 1, 2), date(2023, 1, 2)) == [
+        (date(2023, 1, 2), 2, 300, 1)
+    ]
+
+
+def test_reopen(tmp_path, expenses):
+    path = tmp_path / "test_data.db"
+    with SQliteRepository[Expense](path, Expense) as repo:
+        DailyRollup(repo)
+        repo.add_many(expenses[:2])
+    with SQliteRepository[Expense](path, Expense) as repo:
+        rollup = DailyRollup(repo)
+        repo.add_many(expenses[2:])
+        assert rollup.total() == 1000
+    # migration rebuilds the table and drops its triggers
+    with SQliteRepository[Expense](path, Expense, datetime_storage="seconds") as repo:
+        rollup = DailyRollup(repo)
+        repo.delete(expenses[0].pk)
+        assert rollup.total() == 900
+        assert rollup.total_by_group() == {1: 600, 2: 300}
+
+
+def test_unknown_field(repo):
+    with pytest.raises(ValueError):
+        DailyRollup(repo, value_field="price")
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+import pytest
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.totals import RunningTotals
+
+
+@pytest.fixture
+def repo(window_expenses):
+    repo = MemoryRepository()
+    repo.add_many(window_expenses)
+    return repo
+
+
+def test_initial_summs(repo, clock):
+    totals = RunningTotals(repo, today=clock)
+    assert totals.summs == [1000, 1100, 1110]
+
+
+def test_incremental_updates(repo, clock):
+    totals = RunningTotals(repo, today=clock)
+    exp = Expense(5, 1, datetime(2023, 2, 1, 10))
+    repo.add(exp)
+    totals.added(exp)
+    assert totals.summs == [1005, 1105, 1115]
+    new = Expense(7, 1, datetime(2023, 1, 29), pk=exp.pk)
+    totals.changed(repo.get(exp.pk), new)
+    repo.update(new)
+    assert totals.summs == [1000, 1107, 1117]
+    repo.delete(new.pk)
+    totals.removed(new)
+    assert totals.summs == [1000, 1100, 1110]
+
+
+def test_roll_over(repo, clock):
+    totals = RunningTotals(repo, today=clock)
+    clock.today = date(2023, 2, 5)
+    assert totals.summs == [0, 1000, 1110]
+    clock.today = date(2023, 2, 21)
+    assert totals.summs == [0, 0, 1100]
+    clock.today = date(2023, 2, 1)
+    assert totals.summs == [1000, 1100, 1110]
+
+
+def test_recompute_when_not_reconciled(repo, clock):
+    totals = RunningTotals(repo, today=clock)
+    repo.add(Expense(5, 1, datetime(2023, 2, 2)))
+    clock.today = date(2023, 2, 2)
+    assert totals.summs == [5, 1105, 1115]
+
+
+def test_unknown_old_state(repo, clock):
+    totals = RunningTotals(repo, today=clock)
+    repo.get(4).amount = 2000
+    totals.changed(None, repo.get(4))
+    assert totals.summs == [2000, 2100, 2110]
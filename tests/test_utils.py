@@ -3,7 +3,9 @@ from textwrap import dedent
 
 import pytest
 
-from bookkeeper.utils import read_tree
+from inspect import isgenerator
+
+from bookkeeper.utils import iter_tree, iter_tree_file, read_tree
 
 
 def test_create_tree():
@@ -71,3 +73,45 @@ def test_with_file():
             ('child2', 'parent1'),
             ('parent2', None)
         ]
+
+
+TREE_TEXT = dedent('''
+    parent1
+        child1
+            grandchild
+
+        child2
+    parent2
+''')
+TREE = [
+    ('parent1', None),
+    ('child1', 'parent1'),
+    ('grandchild', 'child1'),
+    ('child2', 'parent1'),
+    ('parent2', None)
+]
+
+
+def test_iter_tree_is_lazy():
+    lines = iter(TREE_TEXT.splitlines())
+    gen = iter_tree(lines)
+    assert isgenerator(gen)
+    assert next(gen) == ('parent1', None)
+    assert next(lines).strip() == 'child1'
+
+
+def test_iter_tree_yields_pairs_before_error():
+    gen = iter_tree(['a', '    b', '  c'])
+    assert next(gen) == ('a', None)
+    assert next(gen) == ('b', 'a')
+    with pytest.raises(IndentationError):
+        next(gen)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1 << 20])
+def test_iter_tree_file(tmp_path, chunk_size):
+    path = tmp_path / 'tree.txt'
+    path.write_text(TREE_TEXT.strip('\n'), encoding='utf-8')
+    assert list(iter_tree_file(path, chunk_size)) == TREE
+    with open(path, encoding='utf-8') as file:
+        assert list(iter_tree_file(file, chunk_size)) == TREE
@@ -0,0 +1,15 @@
+import importlib.util
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+if importlib.util.find_spec("PySide6") is None:
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app():
+    from PySide6 import QtCore
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
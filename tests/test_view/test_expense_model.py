@@ -0,0 +1,125 @@
+from datetime import datetime
+
+import pytest
+from PySide6 import QtCore
+
+from bookkeeper.models.expense import Expense
+from bookkeeper.repository.memory_repository import MemoryRepository
+from bookkeeper.view.expense_model import DELETED_CATEGORY, ExpenseTableModel
+
+
+@pytest.fixture
+def repo():
+    repo = MemoryRepository[Expense]()
+    repo.add_many(
+        Expense(i, 1, expense_date=datetime(2023, 1, 5), comment=f"c{i}")
+        for i in range(1, 11)
+    )
+    return repo
+
+
+@pytest.fixture
+def model(repo):
+    calls = []
+
+    def loader(after_pk, limit, deliver):
+        calls.append((after_pk, limit))
+        deliver(repo.get_all({"pk__gt": after_pk}, order_by="pk", limit=limit))
+
+    model = ExpenseTableModel(page_size=4)
+    model.set_source(loader, {1: "food"})
+    model.calls = calls
+    return model
+
+
+def fetch_all(model):
+    root = QtCore.QModelIndex()
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+
+
+def test_starts_empty_and_fetches_pages(model):
+    root = QtCore.QModelIndex()
+    assert model.rowCount() == 0
+    assert model.canFetchMore(root)
+    model.fetchMore(root)
+    assert model.rowCount() == 4
+    assert model.calls == [(0, 4)]
+    fetch_all(model)
+    assert model.rowCount() == 10
+    assert model.calls == [(0, 4), (4, 4), (8, 4)]
+    assert not model.canFetchMore(root)
+
+
+def test_data(model):
+    fetch_all(model)
+    assert model.columnCount() == 4
+    assert model.data(model.index(0, 0)) == "2023-01-05 00:00:00"
+    assert model.data(model.index(0, 1)) == "1"
+    assert model.data(model.index(0, 2)) == "food"
+    assert model.data(model.index(0, 3)) == "c1"
+    assert model.headerData(1, QtCore.Qt.Orientation.Horizontal) == "Сумма"
+
+
+def test_unknown_category(model):
+    model.set_categories({})
+    fetch_all(model)
+    assert model.data(model.index(0, 2)) == DELETED_CATEGORY
+    assert model.category_pk(DELETED_CATEGORY) == 0
+
+
+def test_update_expense_keeps_pk(model):
+    fetch_all(model)
+    exp = model.update_expense(2, amount=100, comment="new")
+    assert exp.pk == 3
+    assert model.expense(2) is exp
+    assert model.data(model.index(2, 1)) == "100"
+
+
+def test_append_expense_after_last_page(model, repo):
+    model.fetchMore(QtCore.QModelIndex())
+    exp = Expense(5, 1)
+    repo.add(exp)
+    model.append_expense(exp)
+    assert model.rowCount() == 4
+    fetch_all(model)
+    assert model.rowCount() == 11
+    exp = Expense(6, 1)
+    repo.add(exp)
+    model.append_expense(exp)
+    assert model.rowCount() == 12
+    assert model.expense(11) is exp
+
+
+def test_deferred_pages(repo):
+    pending = []
+    model = ExpenseTableModel(page_size=4)
+    model.set_source(lambda after_pk, limit, deliver: pending.append(deliver), {})
+    root = QtCore.QModelIndex()
+    model.fetchMore(root)
+    assert model.is_loading()
+    assert not model.canFetchMore(root)
+    model.fetchMore(root)
+    assert len(pending) == 1
+    pending.pop()(repo.get_all(limit=4))
+    assert model.rowCount() == 4
+    assert model.canFetchMore(root)
+    model.fetchMore(root)
+    model.set_source(lambda after_pk, limit, deliver: pending.append(deliver), {})
+    pending.pop(0)(repo.get_all({"pk__gt": 4}, limit=4))
+    assert model.rowCount() == 0
+    assert model.canFetchMore(root)
+
+
+def test_append_while_last_page_loads(repo):
+    pending = []
+    model = ExpenseTableModel(page_size=20)
+    model.set_source(lambda after_pk, limit, deliver: pending.append(deliver), {})
+    model.fetchMore(QtCore.QModelIndex())
+    page = repo.get_all()
+    exp = Expense(5, 1)
+    repo.add(exp)
+    model.append_expense(exp)
+    pending.pop()(page)
+    assert model.rowCount() == 11
+    assert model.expense(10) is exp
@@ -0,0 +1,86 @@
+import threading
+
+from PySide6 import QtCore
+
+from bookkeeper.view.qt_executor import QtExecutor
+
+
+def finish(executor):
+    assert executor.wait(5000)
+    QtCore.QCoreApplication.processEvents()
+
+
+def test_results_delivered_in_gui_thread():
+    executor = QtExecutor()
+    results = []
+    gui_thread = threading.get_ident()
+    executor.submit(threading.get_ident,
+                    lambda ident: results.append((ident, threading.get_ident())))
+    finish(executor)
+    assert len(results) == 1
+    worker, receiver = results[0]
+    assert worker != gui_thread
+    assert receiver == gui_thread
+
+
+def test_tasks_run_in_order():
+    executor = QtExecutor()
+    done = []
+    for i in range(20):
+        executor.submit(lambda i=i: done.append(i))
+    finish(executor)
+    assert done == list(range(20))
+
+
+def test_queued_task_with_same_key_is_replaced():
+    executor = QtExecutor()
+    release = threading.Event()
+    ran, results = [], []
+    executor.submit(release.wait)
+    for i in range(5):
+        executor.submit(lambda i=i: ran.append(i) or i, results.append, key="summ")
+    release.set()
+    finish(executor)
+    assert ran == [4]
+    assert results == [4]
+
+
+def test_stale_result_is_dropped():
+    executor = QtExecutor()
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow():
+        started.set()
+        release.wait()
+        return "old"
+
+    executor.submit(slow, results.append, key="k")
+    assert started.wait(5)
+    executor.submit(lambda: "new", results.append, key="k")
+    release.set()
+    finish(executor)
+    assert results == ["new"]
+
+
+def test_errors_go_to_handler():
+    errors = []
+    executor = QtExecutor(on_error=errors.append)
+    results = []
+    executor.submit(lambda: 1 / 0, results.append)
+    finish(executor)
+    assert results == []
+    assert isinstance(errors[0], ZeroDivisionError)
+
+
+def test_idle_workers_do_not_expire():
+    executor = QtExecutor()
+    threads = set()
+    for _ in range(3):
+        done = threading.Event()
+        executor.submit(lambda done=done: (threads.add(threading.get_ident()),
+                                           done.set()))
+        assert done.wait(5)
+    finish(executor)
+    assert len(threads) == 1
+    assert executor._pool.expiryTimeout() == -1